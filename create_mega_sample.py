@@ -5,10 +5,12 @@ Script simple pour créer un dataset représentatif de 10K composés
 """
 
 import pandas as pd
-import json
 import numpy as np
 from pathlib import Path
 
+from mega_json_stream import load_compounds_table
+from mega_structure_dedup import deduplicate_structures
+
 def create_mega_representative_sample():
     """
     Crée un échantillon représentatif de 10K composés depuis les données MEGA
@@ -37,60 +39,18 @@ def create_mega_representative_sample():
         return None
     
     try:
-        # Chargement des données
+        # Chargement des données en streaming (lots colonnaires, sans arbre JSON complet)
         print("⏳ Chargement des données MEGA...")
-        with open(dataset_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        print(f"📋 Type de données: {type(data)}")
-        print(f"📋 Clés disponibles: {list(data.keys()) if isinstance(data, dict) else 'Liste'}")
+        compounds_key, df = load_compounds_table(dataset_path)
         
-        # Gestion des différents formats
-        df = None
-        
-        if isinstance(data, list):
-            # Format liste directe
+        if compounds_key is None and len(df) > 0:
             print("📊 Format: Liste de composés")
-            df = pd.DataFrame(data)
-            
-        elif isinstance(data, dict):
-            # Format dictionnaire avec metadata
+        elif compounds_key is not None:
             print("📊 Format: Dictionnaire avec metadata")
-            
-            # Chercher la clé des composés
-            possible_keys = ['compounds', 'data', 'molecules', 'phytochemicals']
-            compounds_key = None
-            
-            for key in possible_keys:
-                if key in data and isinstance(data[key], list):
-                    compounds_key = key
-                    break
-            
-            if not compounds_key:
-                # Prendre la première clé qui contient une liste
-                for key, value in data.items():
-                    if isinstance(value, list) and len(value) > 0:
-                        compounds_key = key
-                        break
-            
-            if compounds_key:
-                print(f"📊 Clé des composés trouvée: {compounds_key}")
-                compounds_data = data[compounds_key]
-                
-                if len(compounds_data) > 0:
-                    # Vérifier si c'est une liste de dictionnaires
-                    if isinstance(compounds_data[0], dict):
-                        df = pd.DataFrame(compounds_data)
-                    else:
-                        print("⚠️ Format de composés non reconnu")
-                        return None
-                else:
-                    print("❌ Liste de composés vide")
-                    return None
-            else:
-                print("❌ Clé des composés non trouvée")
-                print(f"📋 Clés disponibles: {list(data.keys())}")
-                return None
+            print(f"📊 Clé des composés trouvée: {compounds_key}")
+        else:
+            print("❌ Clé des composés non trouvée")
+            return None
         
         if df is None or len(df) == 0:
             print("❌ Impossible de charger les données en DataFrame")
@@ -120,6 +80,9 @@ def create_mega_representative_sample():
                     print(f"✅ {possible_name} → {target_col}")
                     break
         
+        # Une ligne par structure (SMILES canonique / InChIKey), même sous plusieurs noms
+        df = deduplicate_structures(df)
+        
         # Générer les colonnes manquantes avec des valeurs intelligentes
         if 'bioactivity_score' not in df.columns:
             # Créer des scores basés sur une distribution réaliste
@@ -204,7 +167,7 @@ def create_mega_representative_sample():
         # 4. Échantillon général pour diversité
         if sample_parts:
             used_indices = pd.concat(sample_parts).index
-            remaining_df = df.drop(used_indices).drop_duplicates()
+            remaining_df = df.drop(used_indices)
         else:
             remaining_df = df
         
@@ -217,7 +180,9 @@ def create_mega_representative_sample():
         
         # Combinaison finale
         if sample_parts:
-            representative_sample = pd.concat(sample_parts).drop_duplicates()
+            representative_sample = pd.concat(sample_parts)
+            # Structures déjà uniques : un composé tiré par plusieurs stratégies ne compte qu'une fois
+            representative_sample = representative_sample[~representative_sample.index.duplicated()]
         else:
             representative_sample = df.sample(sample_size, random_state=42)
         
@@ -5,10 +5,12 @@ Script corrigé pour gérer les colonnes avec dictionnaires
 """
 
 import pandas as pd
-import json
 import numpy as np
 from pathlib import Path
 
+from mega_json_stream import load_compounds_table
+from mega_structure_dedup import deduplicate_structures
+
 def clean_dataframe_columns(df):
     """
     Nettoie le DataFrame en convertissant les colonnes problématiques
@@ -57,36 +59,18 @@ def create_mega_representative_sample():
         return None
     
     try:
-        # Chargement des données
+        # Chargement des données en streaming (lots colonnaires, sans arbre JSON complet)
         print("⏳ Chargement des données MEGA...")
-        with open(dataset_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        print(f"📋 Type de données: {type(data)}")
+        compounds_key, df = load_compounds_table(dataset_path)
         
-        # Gestion des différents formats
-        df = None
-        
-        if isinstance(data, list):
+        if compounds_key is None and len(df) > 0:
             print("📊 Format: Liste de composés")
-            df = pd.DataFrame(data)
-        elif isinstance(data, dict):
+        elif compounds_key is not None:
             print("📊 Format: Dictionnaire avec metadata")
-            print(f"📋 Clés disponibles: {list(data.keys())}")
-            
-            # Chercher la clé des composés
-            compounds_key = None
-            for key in ['compounds', 'data', 'molecules', 'phytochemicals']:
-                if key in data and isinstance(data[key], list):
-                    compounds_key = key
-                    break
-            
-            if compounds_key:
-                print(f"📊 Clé des composés trouvée: {compounds_key}")
-                df = pd.DataFrame(data[compounds_key])
-            else:
-                print("❌ Clé des composés non trouvée")
-                return None
+            print(f"📊 Clé des composés trouvée: {compounds_key}")
+        else:
+            print("❌ Clé des composés non trouvée")
+            return None
         
         if df is None or len(df) == 0:
             print("❌ Impossible de charger les données")
@@ -98,6 +82,9 @@ def create_mega_representative_sample():
         # Nettoyer les colonnes problématiques
         df = clean_dataframe_columns(df)
         
+        # Une ligne par structure (SMILES canonique / InChIKey), même sous plusieurs noms
+        df = deduplicate_structures(df)
+        
         # Normalisation des colonnes essentielles
         print("\n🔧 Normalisation des colonnes...")
         
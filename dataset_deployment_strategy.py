@@ -12,6 +12,9 @@ import streamlit as st
 import requests
 from pathlib import Path
 
+from mega_json_stream import load_compounds_table
+from mega_structure_dedup import deduplicate_structures
+
 # =============================================================================
 # SOLUTION 1: HUGGING FACE DATASETS (RECOMMANDÉE)
 # =============================================================================
@@ -27,9 +30,7 @@ def deploy_to_huggingface(local_dataset_path, hf_token=None):
     
     # 1. Chargement du dataset local
     if local_dataset_path.endswith('.json'):
-        with open(local_dataset_path, 'r') as f:
-            data = json.load(f)
-        df = pd.DataFrame(data)
+        _, df = load_compounds_table(local_dataset_path)
     else:
         df = pd.read_csv(local_dataset_path)
     
@@ -123,10 +124,10 @@ def create_representative_sample(full_dataset_path, sample_size=10000):
     """
     print(f"🎯 Création échantillon représentatif ({sample_size:,} composés)...")
     
-    # Chargement dataset complet
-    with open(full_dataset_path, 'r') as f:
-        data = json.load(f)
-    df = pd.DataFrame(data)
+    # Chargement dataset complet en streaming (lots colonnaires)
+    _, df = load_compounds_table(full_dataset_path)
+    # Une ligne par structure (SMILES canonique / InChIKey), même sous plusieurs noms
+    df = deduplicate_structures(df)
     
     # Stratégie d'échantillonnage intelligent
     sample_parts = []
@@ -158,7 +159,8 @@ def create_representative_sample(full_dataset_path, sample_size=10000):
         sample_parts.append(general_sample)
     
     # Combinaison finale
-    representative_sample = pd.concat(sample_parts).drop_duplicates().head(sample_size)
+    representative_sample = pd.concat(sample_parts)
+    representative_sample = representative_sample[~representative_sample.index.duplicated()].head(sample_size)
     
     print(f"🎯 Échantillon final: {len(representative_sample):,} composés uniques")
     
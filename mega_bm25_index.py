@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+📑 PhytoAI - Index Multi-Champs avec Classement BM25
+Un index par champ texte (nom, famille, cibles) sur les valeurs distinctes ;
+la pertinence BM25 pondérée par champ n'est calculée que pour les valeurs
+qui contiennent le terme, et les meilleurs résultats sont extraits par tas
+borné : le coût d'une requête large dépend de limit, pas du nombre de résultats
+"""
+
+import heapq
+import math
+import re
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mega_search_index import TrigramIndex, normalize_name
+from mega_text_normalization import NORMALIZED_NAME_COLUMN, normalize_series
+
+# Paramètres BM25 classiques
+K1 = 1.2
+B = 0.75
+
+# Poids des champs (un terme trouvé dans le nom compte triple)
+DEFAULT_FIELD_BOOSTS = {'name': 3.0, 'molecular_family': 1.0, 'targets': 0.5}
+# A priori ajouté à la pertinence textuelle de chaque composé
+DEFAULT_PRIOR_WEIGHTS = {'bioactivity_score': 2.0, 'complexity_score': 0.1}
+
+
+def _is_text(series: pd.Series) -> bool:
+    return (series.dtype == object or isinstance(series.dtype, (pd.StringDtype, pd.CategoricalDtype))
+            or pd.api.types.is_string_dtype(series.dtype))
+
+
+class _FieldIndex:
+    """
+    Valeurs distinctes d'un champ, index trigrammes sur ces valeurs et
+    lignes de chaque valeur (CSR, triées par a priori décroissant)
+    """
+
+    def __init__(self, values: pd.Series, prior: np.ndarray, normalized: bool = False):
+        normalized = (values.astype('string').fillna('') if normalized else normalize_series(values)).reset_index(drop=True)
+        codes, uniques = pd.factorize(normalized)
+        self.codes = codes.astype(np.int32)
+        self.values = pd.Series(uniques, dtype='string')
+        self.sizes = np.bincount(codes, minlength=len(uniques))
+        self.offsets = np.r_[0, np.cumsum(self.sizes)]
+        self.rows = np.lexsort((-prior, codes)).astype(np.int32)
+
+        # Longueur en caractères (les noms MEGA sont d'un seul mot)
+        self.lengths = self.values.str.len().to_numpy(dtype=np.float64)
+        self.average_length = max(float(np.dot(self.lengths, self.sizes)) / max(len(codes), 1), 1.0)
+        self.trigrams = TrigramIndex(self.values, normalized=True)
+
+    def match(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(valeurs contenant term, nombre d'occurrences dans chacune)"""
+        value_ids = self.trigrams.search(term)
+        counts = self.values.iloc[value_ids].str.count(re.escape(term)).to_numpy(dtype=np.float64)
+        return value_ids, counts
+
+
+class BM25Index:
+    """
+    Recherche pondérée par champ (BM25F simplifié) avec a priori par composé
+
+    score(ligne) = Σ champs boost × idf × tf(k1+1) / (tf + k1(1-b+b·long/moy)) + a priori
+
+    Le score textuel d'un champ ne dépend que de sa valeur : il est calculé
+    une fois par valeur distincte correspondante. Les lignes de chaque valeur
+    étant triées par a priori décroissant, un tas de groupes ordonné par
+    borne supérieure produit les lignes du meilleur au moins bon ; la
+    recherche s'arrête quand aucune ligne restante ne peut entrer dans le top.
+    """
+
+    def __init__(self, df: pd.DataFrame, field_boosts: Optional[Dict[str, float]] = None,
+                 prior_weights: Optional[Dict[str, float]] = None):
+        field_boosts = DEFAULT_FIELD_BOOSTS if field_boosts is None else field_boosts
+        prior_weights = DEFAULT_PRIOR_WEIGHTS if prior_weights is None else prior_weights
+
+        self._size = len(df)
+        self._prior = np.zeros(len(df), dtype=np.float64)
+        for column, weight in prior_weights.items():
+            if column in df.columns:
+                self._prior += weight * pd.to_numeric(df[column], errors='coerce').fillna(0).to_numpy(np.float64)
+
+        # Champs texte seulement (ex: targets est un nombre de cibles dans la base MEGA)
+        self._fields = {
+            field: (boost, self._field_index(df, field))
+            for field, boost in field_boosts.items()
+            if field in df.columns and _is_text(df[field])
+        }
+
+    def _field_index(self, df: pd.DataFrame, field: str) -> _FieldIndex:
+        # Les noms sont déjà normalisés à l'ingestion
+        if field == 'name' and NORMALIZED_NAME_COLUMN in df.columns:
+            return _FieldIndex(df[NORMALIZED_NAME_COLUMN], self._prior, normalized=True)
+        return _FieldIndex(df[field], self._prior)
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return tuple(self._fields)
+
+    def _field_scores(self, term: str):
+        """Par champ correspondant : (index, valeurs, scores BM25 pondérés)"""
+        matches = []
+        for boost, field in self._fields.values():
+            value_ids, tf = field.match(term)
+            if len(value_ids) == 0:
+                continue
+            document_frequency = field.sizes[value_ids].sum()
+            idf = math.log(1 + (self._size - document_frequency + 0.5) / (document_frequency + 0.5))
+            norm = K1 * (1 - B + B * field.lengths[value_ids] / field.average_length)
+            matches.append((field, value_ids, boost * idf * tf * (K1 + 1) / (tf + norm)))
+        return matches
+
+    def search(self, term: str, limit: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (positions, pertinences) des limit meilleurs composés, pertinence décroissante
+
+        Args:
+            term: Sous-chaîne recherchée dans les champs indexés (casse ignorée)
+            limit: Nombre de résultats
+        """
+        needle = normalize_name(term)
+        matches = self._field_scores(needle) if needle else []
+        if not matches or limit <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        # Champs sélectifs d'abord : les champs larges (familles...) viennent en dernier
+        matches.sort(key=lambda match: match[0].sizes[match[1]].sum())
+        score_lookups = [dict(zip(value_ids.tolist(), scores.tolist())) for _, value_ids, scores in matches]
+        best_by_field = [float(scores.max()) for _, _, scores in matches]
+
+        # Un groupe = (champ, valeur) ; borne = score de la valeur + meilleurs scores
+        # possibles des champs suivants + a priori de la prochaine ligne du groupe.
+        # Une ligne est bornée correctement dans le groupe du premier champ où elle
+        # correspond (les champs précédents ne lui apportent rien) : c'est suffisant.
+        groups = []
+        for f, (field, value_ids, scores) in enumerate(matches):
+            others = sum(best_by_field[f + 1:])
+            starts = field.offsets[value_ids]
+            bounds = scores + others + self._prior[field.rows[starts]]
+            groups.extend(zip((-bounds).tolist(), [f] * len(value_ids), value_ids.tolist(), starts.tolist()))
+        heapq.heapify(groups)
+
+        top = []  # tas min (pertinence, -position) de taille limit
+        seen = set()
+        while groups:
+            negative_bound, f, value_id, position = groups[0]
+            if len(top) >= limit and -negative_bound <= top[0][0]:
+                break
+            field = matches[f][0]
+            row = int(field.rows[position])
+            if position + 1 < field.offsets[value_id + 1]:
+                # Ligne suivante du groupe : seul l'a priori change dans la borne
+                next_bound = -negative_bound - self._prior[row] + self._prior[field.rows[position + 1]]
+                heapq.heapreplace(groups, (-next_bound, f, value_id, position + 1))
+            else:
+                heapq.heappop(groups)
+
+            if row in seen:
+                continue
+            seen.add(row)
+            relevance = self._prior[row] + sum(
+                lookup.get(int(other.codes[row]), 0.0)
+                for (other, _, _), lookup in zip(matches, score_lookups)
+            )
+            if len(top) < limit:
+                heapq.heappush(top, (relevance, -row))
+            elif (relevance, -row) > top[0]:
+                heapq.heapreplace(top, (relevance, -row))
+
+        ranked = sorted(top, reverse=True)
+        return (np.array([-row for _, row in ranked], dtype=np.int64),
+                np.array([relevance for relevance, _ in ranked], dtype=np.float64))
+
+
+def get_bm25_index(repository=None) -> BM25Index:
+    """Index BM25 des composés du dépôt MEGA (une fois par version des données)"""
+    if repository is None:
+        from mega_data_repository import get_mega_repository
+        repository = get_mega_repository()
+    return repository.view(('bm25_index',), lambda repo: BM25Index(repo.compounds))
+
+
+if __name__ == "__main__":
+    import time
+
+    from mega_data_repository import get_mega_repository
+
+    repository = get_mega_repository()
+    started = time.time()
+    index = get_bm25_index(repository)
+    print(f"📑 Index BM25 ({', '.join(index.fields)}): {time.time() - started:.1f}s")
+    for term in ('flavon', 'curcumin', 'alcalo', 'zzz'):
+        started = time.time()
+        rows, relevance = index.search(term, 10)
+        print(f"   '{term}': {repository.compounds['name'].iloc[rows].tolist()[:5]} "
+              f"({(time.time() - started) * 1000:.1f} ms)")
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+🧊 PhytoAI - Cache Invalidé par Empreinte de Contenu
+Les entrées sont indexées par l'empreinte des fichiers sources (taille,
+mtime, hash du contenu) au lieu d'un TTL ; un changement de données est
+rechargé en arrière-plan pendant que l'ancienne valeur continue d'être servie
+"""
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+_HASH_BLOCK_SIZE = 8 << 20
+# Budget mémoire du cache de résultats de requêtes (Mo, réglable en production)
+QUERY_CACHE_MAX_BYTES = int(os.getenv('PHYTOAI_QUERY_CACHE_MB', '64')) << 20
+_ENTRY_OVERHEAD = 256  # clé, entrée OrderedDict, en-têtes de tableaux
+
+# (chemin, taille, mtime_ns) → hash du contenu, pour ne hacher qu'après un changement
+_content_hashes = {}
+_content_hashes_lock = threading.Lock()
+
+
+def _stat_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def content_hash(path: str) -> str:
+    """Hash BLAKE2b du contenu, mémorisé tant que taille et mtime ne changent pas"""
+    signature = _stat_signature(path)
+    key = (path, signature)
+    with _content_hashes_lock:
+        if key in _content_hashes:
+            return _content_hashes[key]
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+
+    with _content_hashes_lock:
+        _content_hashes[key] = digest.hexdigest()
+    return _content_hashes[key]
+
+
+def stat_fingerprint(paths: Iterable[str]) -> tuple:
+    """Empreinte rapide (un stat par fichier) : détecte un changement possible"""
+    return tuple((path, _stat_signature(path)) for path in paths)
+
+
+def content_fingerprint(paths: Iterable[str]) -> tuple:
+    """Empreinte de contenu : identique tant que les octets ne changent pas"""
+    return tuple(
+        (path, content_hash(path) if _stat_signature(path) is not None else None)
+        for path in paths
+    )
+
+
+class _Entry:
+    __slots__ = ('value', 'stat', 'content', 'refreshing')
+
+    def __init__(self, value, stat, content):
+        self.value = value
+        self.stat = stat
+        self.content = content
+        self.refreshing = False
+
+
+def _returned(value, copy: bool):
+    if copy and isinstance(value, (pd.DataFrame, pd.Series)):
+        # Copie superficielle : l'appelant peut ajouter des colonnes sans toucher au cache
+        return value.copy(deep=False)
+    if copy and isinstance(value, tuple):
+        return tuple(_returned(item, copy) for item in value)
+    return value
+
+
+def fingerprint_cache(paths: Iterable[str] = (), version: Optional[Callable[[], Hashable]] = None,
+                      maxsize: int = 128, copy: bool = True) -> Callable:
+    """
+    Décorateur de cache invalidé par empreinte des données (stale-while-revalidate)
+
+    - Données inchangées : la valeur est servie sans expiration (un stat par fichier)
+    - Taille/mtime modifiés : la valeur actuelle est servie, le hash du contenu
+      est recalculé en arrière-plan et la fonction n'est réexécutée que si le
+      contenu a réellement changé ; la nouvelle valeur remplace alors l'ancienne
+    - Premier appel pour une clé : calcul synchrone, un seul calcul même si
+      plusieurs sessions le demandent en même temps ; seule l'empreinte
+      rapide est prise avant, le hash du contenu suit en arrière-plan
+
+    Args:
+        paths: Fichiers sources dont dépend la fonction
+        version: À la place de paths, jeton de version bon marché d'une donnée
+                 déjà en mémoire (ex: repository_version pour le dépôt MEGA)
+        maxsize: Nombre max de clés conservées par fonction (LRU)
+        copy: Retourne des copies superficielles des DataFrames (comme st.cache_data)
+
+    Comme avec st.cache_data, les arguments dont le nom commence par '_'
+    (ex: _self) n'entrent pas dans la clé. Le cache est partagé par tout le
+    processus.
+    """
+    paths = tuple(paths)
+    if version is not None:
+        quick_fingerprint = full_fingerprint = version
+    else:
+        quick_fingerprint = functools.partial(stat_fingerprint, paths)
+        full_fingerprint = functools.partial(content_fingerprint, paths)
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        entries = OrderedDict()
+        lock = threading.RLock()
+        key_locks = {}
+
+        def make_key(args, kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            hashed = [(name, value) for name, value in bound.arguments.items()
+                      if not name.startswith('_')]
+            try:
+                return hashlib.blake2b(pickle.dumps(hashed), digest_size=16).hexdigest()
+            except Exception:
+                return repr(hashed)
+
+        def store(key, entry):
+            with lock:
+                entries[key] = entry
+                entries.move_to_end(key)
+                while len(entries) > maxsize:
+                    evicted, _ = entries.popitem(last=False)
+                    key_locks.pop(evicted, None)
+
+        def record_content(entry):
+            """Hash du contenu d'une entrée fraîche, calculé hors de la requête"""
+            try:
+                content = full_fingerprint()
+                # Fichiers modifiés pendant le hachage : contenu inconnu, la
+                # prochaine revalidation rechargera
+                if quick_fingerprint() == entry.stat:
+                    entry.content = content
+            except Exception as e:
+                print(f"⚠️ Empreinte {func.__name__} échouée: {e}")
+
+        def revalidate(key, entry, args, kwargs):
+            replaced = False
+            try:
+                stat = quick_fingerprint()
+                content = full_fingerprint()
+                if entry.content is not None and content == entry.content:
+                    # Fichiers touchés mais contenu identique : rien à recharger
+                    entry.stat = stat
+                    return
+                value = func(*args, **kwargs)
+                store(key, _Entry(value, stat, content))
+                replaced = True
+                print(f"🧊 Cache {func.__name__} rafraîchi (données modifiées)")
+            except Exception as e:
+                print(f"⚠️ Rafraîchissement {func.__name__} échoué: {e}")
+            finally:
+                # Entrée remplacée : reste marquée, une requête qui la détient
+                # encore ne relance pas de rafraîchissement
+                if not replaced:
+                    entry.refreshing = False
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+
+            with lock:
+                entry = entries.get(key)
+                if entry is not None:
+                    entries.move_to_end(key)
+                key_lock = key_locks.setdefault(key, threading.Lock())
+
+            if entry is None:
+                with key_lock:
+                    with lock:
+                        entry = entries.get(key)
+                    if entry is None:
+                        # Seule l'empreinte rapide bloque la requête ; le hash du
+                        # contenu est calculé en arrière-plan
+                        stat = quick_fingerprint()
+                        entry = _Entry(func(*args, **kwargs), stat, stat if version is not None else None)
+                        store(key, entry)
+                        if entry.content is None:
+                            threading.Thread(target=record_content, args=(entry,),
+                                             name=f"phytoai-fingerprint-{func.__name__}", daemon=True).start()
+                return _returned(entry.value, copy)
+
+            if quick_fingerprint() != entry.stat:
+                with lock:
+                    start = not entry.refreshing
+                    entry.refreshing = True
+                if start:
+                    threading.Thread(target=revalidate, args=(key, entry, args, kwargs),
+                                     name=f"phytoai-revalidate-{func.__name__}", daemon=True).start()
+
+            # Valeur actuelle (éventuellement périmée) servie sans attendre
+            return _returned(entry.value, copy)
+
+        def clear():
+            with lock:
+                entries.clear()
+                key_locks.clear()
+
+        wrapper.clear = clear
+        return wrapper
+
+    return decorator
+
+
+def _result_nbytes(value) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_result_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_result_nbytes(k) + _result_nbytes(v) for k, v in value.items())
+    # bytes, str, nombres... : taille de l'objet Python
+    return sys.getsizeof(value)
+
+
+def _frozen(value):
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, tuple):
+        for item in value:
+            _frozen(item)
+    return value
+
+
+_MISSING = object()
+
+
+class QueryResultCache:
+    """
+    Cache LRU des résultats de requêtes (positions de lignes), borné en mémoire
+
+    Partagé par toutes les sessions du processus : une même recherche saisie
+    par plusieurs utilisateurs n'est calculée qu'une fois. Les clés sont
+    construites par l'appelant à partir de la requête normalisée, des filtres
+    et de la version des données ; les valeurs sont surtout des tableaux
+    numpy (ou des tuples en contenant), figés en lecture seule. La taille
+    des autres valeurs (octets, listes, DataFrames...) est estimée ; None
+    est une valeur comme une autre.
+    """
+
+    def __init__(self, max_bytes: int = QUERY_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # clé → (valeur, octets)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value):
+        size = _result_nbytes(value) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            # Résultat plus gros que le budget : jamais conservé
+            with self._lock:
+                self._key_locks.pop(key, None)
+            return value
+        value = _frozen(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                evicted, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._key_locks.pop(evicted, None)
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]):
+        """Valeur en cache, sinon calculée une seule fois même en cas d'appels concurrents"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            try:
+                return self.put(key, compute())
+            except BaseException:
+                # Rien de conservé : le verrou de la clé ne doit pas s'accumuler
+                with self._lock:
+                    self._key_locks.pop(key, None)
+                raise
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Compteurs pour dimensionner le budget (taux de succès, évictions, occupation)"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+_query_cache = QueryResultCache()
+
+
+def get_query_cache() -> QueryResultCache:
+    """Cache de résultats de requêtes du processus"""
+    return _query_cache
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+🗄️ PhytoAI - Stockage Colonnaire MEGA (Parquet/Arrow)
+Conversion unique du CSV MEGA 1.4M en Parquet typé et compressé,
+puis lectures memory-mappées avec projection de colonnes
+"""
+
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Chemin vers la base MEGA complète (CSV source)
+MEGA_CSV_PATH = "../phytotherapy-ai-discovery/data/MEGA_COMPOSÉS_20250602_142023.csv"
+
+# Répertoire local des artefacts dérivés (Parquet, index...)
+MEGA_CACHE_DIR = Path(".mega_cache")
+
+# Stores de mega_descriptors (chemins ici : les lire ne demande pas RDKit)
+DESCRIPTORS_PATH = MEGA_CACHE_DIR / "descriptors_canonical.parquet"
+SMILES_MAP_PATH = MEGA_CACHE_DIR / "smiles_canonical.parquet"
+
+# Clés de métadonnées pour détecter un CSV source modifié
+_SOURCE_SIZE_KEY = b"phytoai.source_size"
+_SOURCE_MTIME_KEY = b"phytoai.source_mtime_ns"
+
+
+def clean_mega_names(df: pd.DataFrame) -> pd.DataFrame:
+    """Nettoyage standard des noms MEGA (vides, trop courts)"""
+    df = df.dropna(subset=['Nom'])
+    names = df['Nom'].astype(str)
+    return df[(names.str.strip() != '') & (names.str.len() > 2)]
+
+
+def get_parquet_path(csv_path: str = MEGA_CSV_PATH) -> Path:
+    """Chemin du fichier Parquet associé au CSV MEGA"""
+    return MEGA_CACHE_DIR / f"{Path(csv_path).stem}.parquet"
+
+
+def _source_signature(csv_path: str) -> dict:
+    stat = os.stat(csv_path)
+    return {
+        _SOURCE_SIZE_KEY: str(stat.st_size).encode(),
+        _SOURCE_MTIME_KEY: str(stat.st_mtime_ns).encode(),
+    }
+
+
+def is_parquet_fresh(csv_path: str = MEGA_CSV_PATH) -> bool:
+    """Vérifie que le Parquet existe et correspond au CSV source actuel"""
+    parquet_path = get_parquet_path(csv_path)
+    if not PYARROW_AVAILABLE or not parquet_path.exists():
+        return False
+    if not os.path.exists(csv_path):
+        # Source absente : le Parquet existant reste la meilleure copie
+        return True
+
+    metadata = pq.read_schema(parquet_path).metadata or {}
+    signature = _source_signature(csv_path)
+    return all(metadata.get(key) == value for key, value in signature.items())
+
+
+def convert_mega_csv_to_parquet(csv_path: str = MEGA_CSV_PATH,
+                                compression: str = "zstd",
+                                row_group_size: int = 128_000) -> Path:
+    """
+    Conversion unique du CSV MEGA en Parquet typé et compressé
+
+    Les colonnes texte à faible cardinalité sont encodées en dictionnaire,
+    les lignes sans nom valide sont éliminées une fois pour toutes.
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow requis pour le stockage colonnaire MEGA")
+
+    parquet_path = get_parquet_path(csv_path)
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+
+    print(f"🗄️ Conversion Parquet: {csv_path}")
+    table = pa_csv.read_csv(
+        csv_path,
+        convert_options=pa_csv.ConvertOptions(
+            auto_dict_encode=True,
+            auto_dict_max_cardinality=1024,
+        ),
+    )
+
+    # Même nettoyage que les chargeurs historiques
+    if 'Nom' in table.column_names:
+        names = table['Nom']
+        if pa.types.is_dictionary(names.type):
+            names = names.cast(pa.string())
+        stripped = pc.utf8_trim_whitespace(names)
+        valid = pc.and_(
+            pc.is_valid(names),
+            pc.and_(pc.not_equal(stripped, ''), pc.greater(pc.utf8_length(names), 2)),
+        )
+        table = table.filter(pc.fill_null(valid, False))
+
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        **_source_signature(csv_path),
+    })
+
+    # Écriture atomique pour ne jamais exposer un fichier partiel
+    tmp_path = parquet_path.with_suffix(".parquet.tmp")
+    pq.write_table(table, tmp_path, compression=compression,
+                   row_group_size=row_group_size)
+    os.replace(tmp_path, parquet_path)
+
+    size_mb = parquet_path.stat().st_size / 1024 / 1024
+    print(f"✅ Parquet MEGA prêt: {table.num_rows:,} lignes ({size_mb:.1f} MB)")
+    return parquet_path
+
+
+def ensure_mega_parquet(csv_path: str = MEGA_CSV_PATH) -> Optional[Path]:
+    """Retourne le Parquet MEGA à jour, en le (re)construisant si nécessaire"""
+    if not PYARROW_AVAILABLE:
+        return None
+    if is_parquet_fresh(csv_path):
+        return get_parquet_path(csv_path)
+    if not os.path.exists(csv_path):
+        return None
+    return convert_mega_csv_to_parquet(csv_path)
+
+
+def count_mega_rows(csv_path: str = MEGA_CSV_PATH) -> Optional[int]:
+    """Nombre de lignes du store colonnaire (lu dans les métadonnées)"""
+    parquet_path = ensure_mega_parquet(csv_path)
+    if parquet_path is None:
+        return None
+    return pq.ParquetFile(parquet_path, memory_map=True).metadata.num_rows
+
+
+def read_mega_columns(csv_path: str = MEGA_CSV_PATH) -> List[str]:
+    """Colonnes disponibles dans le store (ou l'en-tête du CSV), sans lire de données"""
+    parquet_path = ensure_mega_parquet(csv_path)
+    if parquet_path is not None:
+        return list(pq.read_schema(parquet_path).names)
+    if os.path.exists(csv_path):
+        return list(pd.read_csv(csv_path, nrows=0).columns)
+    return []
+
+
+def load_mega_columnar(columns: Optional[List[str]] = None,
+                       max_rows: Optional[int] = None,
+                       csv_path: str = MEGA_CSV_PATH) -> pd.DataFrame:
+    """
+    Lecture memory-mappée du store MEGA avec projection de colonnes
+
+    Args:
+        columns: Colonnes à lire (toutes si None)
+        max_rows: Nombre max de lignes (depuis le début du fichier)
+        csv_path: CSV source du store
+
+    Returns:
+        DataFrame nettoyé (colonnes dictionnaire → category)
+    """
+    parquet_path = ensure_mega_parquet(csv_path)
+
+    if parquet_path is None:
+        # Sans pyarrow : lecture CSV directe, limitée au strict nécessaire
+        df = pd.read_csv(csv_path, usecols=columns, nrows=max_rows)
+        return clean_mega_names(df).reset_index(drop=True) if 'Nom' in df.columns else df
+
+    parquet_file = pq.ParquetFile(parquet_path, memory_map=True)
+
+    if max_rows is None:
+        table = parquet_file.read(columns=columns)
+    else:
+        # Seuls les row groups nécessaires sont décompressés
+        row_groups = []
+        covered = 0
+        for i in range(parquet_file.num_row_groups):
+            if covered >= max_rows:
+                break
+            row_groups.append(i)
+            covered += parquet_file.metadata.row_group(i).num_rows
+        table = parquet_file.read_row_groups(row_groups, columns=columns).slice(0, max_rows)
+
+    return table.to_pandas()
+
+
+if __name__ == "__main__":
+    path = ensure_mega_parquet()
+    if path is None:
+        print("❌ Base MEGA introuvable ou pyarrow indisponible")
+    else:
+        print(f"🗄️ Store colonnaire MEGA: {path} ({count_mega_rows():,} lignes)")
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+🏛️ PhytoAI - Dépôt de Données MEGA Unique
+Une seule instance par processus serveur possède les tables canoniques
+(composés, bioactivités) ; toutes les pages et tous les connecteurs
+l'interrogent au lieu de charger leur propre copie
+"""
+
+import itertools
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Hashable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from mega_cache import fingerprint_cache
+from mega_columnar_store import (DESCRIPTORS_PATH, MEGA_CSV_PATH, clean_mega_names, count_mega_rows,
+                                 is_parquet_fresh, load_mega_columnar, read_mega_columns)
+from mega_json_stream import load_json_tables
+from mega_schema import BIOACTIVITY_SCHEMA, COMPOUND_SCHEMA, RAW_MEGA_SCHEMA, apply_schema, memory_report
+from mega_text_normalization import add_normalized_names
+
+# Sources candidates, par ordre de priorité
+MEGA_JSON_PATH = "./phytotherapy-ai-discovery/phytoai/data/processed/MEGA_DATASET_20250602_142023.json"
+LOCAL_DATASET_PATH = "../mega_1400k_dataset_local"
+HF_DATASET_NAME = "phytoai/mega-phytotherapy-complete-1400k"
+HF_SAMPLE_SIZE = 100000
+FALLBACK_CSV_PATHS = ("mega_streamlit_50k.csv", "real_compounds_dataset.csv")
+
+# Fichiers dont l'empreinte déclenche le rechargement du dépôt (dont les descripteurs calculés)
+# Le map des SMILES canoniques n'en fait pas partie : les builds d'empreintes l'étendent sans
+# recharger le dépôt (une nouvelle écriture d'une structure connue attend le prochain rechargement)
+MEGA_SOURCE_PATHS = (MEGA_CSV_PATH, MEGA_JSON_PATH, str(DESCRIPTORS_PATH)) + FALLBACK_CSV_PATHS
+
+# Processus d'échantillonnage depuis le serveur (1 : pas de fork d'un processus à threads
+# concurrent des requêtes) ; les scripts hors ligne passent workers=None (nb de CPU)
+SERVER_SAMPLER_WORKERS = int(os.getenv('PHYTOAI_SAMPLER_WORKERS', '1'))
+
+# Colonnes MEGA brutes lues pour produire le format application (voir format_mega_for_streamlit)
+FORMAT_SOURCE_COLUMNS = ('Nom', 'Poids_Moléculaire', 'SMILES')
+
+_generations = itertools.count(1)
+
+
+def to_compound_table(source_df: pd.DataFrame, keep_smiles: bool = True) -> pd.DataFrame:
+    """Composés d'une source au format application, schéma compact et noms normalisés appliqués"""
+    from mega_streamlit_connector import normalize_compounds
+    return apply_schema(add_normalized_names(normalize_compounds(source_df, keep_smiles)), COMPOUND_SCHEMA)
+
+
+def _format_file_batch(batch: pd.DataFrame) -> pd.DataFrame:
+    """Lot lu dans le fichier MEGA → format application avec SMILES (picklable pour mega_sampler)"""
+    from mega_streamlit_connector import normalize_compounds
+    return normalize_compounds(batch, keep_smiles=True)
+
+
+class MegaDataRepository:
+    """
+    Dépôt des tables MEGA partagé par toutes les sessions
+
+    - raw_compounds : table MEGA brute (Nom, Catégorie...) si la source est le CSV MEGA
+    - compounds : table canonique au format application (name, bioactivity_score...)
+    - bioactivities : bioactivités (vide si la source n'en fournit pas)
+
+    Le chargement est paresseux, unique et protégé par un verrou ; les vues
+    dérivées (échantillons, têtes...) sont calculées une fois et partagées.
+    Avec le CSV MEGA, load() ne fait que détecter la source : head,
+    evenly_spaced et stratified_sample lisent le fichier (projection de
+    colonnes, coût ∝ échantillon) et la table complète n'est lue et
+    formatée qu'au premier accès à compounds / raw_compounds.
+    """
+
+    def __init__(self, csv_path: str = MEGA_CSV_PATH, json_path: str = MEGA_JSON_PATH):
+        self.csv_path = csv_path
+        self.json_path = json_path
+
+        self._lock = threading.RLock()
+        self._table_lock = threading.Lock()
+        self._loaded = False
+        # Lecture différée de la table complète (source CSV MEGA)
+        self._pending_table: Optional[Callable[[], bool]] = None
+        self._file_columns: Optional[list] = None
+        self._raw_compounds = None
+        self._compounds = pd.DataFrame()
+        self._bioactivities = pd.DataFrame()
+        self._views = {}
+
+        self.source = None
+        self.status = "❌ Aucun dataset disponible"
+        # Identifie ce chargement : change à chaque nouveau dépôt
+        self.generation = next(_generations)
+
+    # ------------------------------------------------------------------
+    # Chargement
+    # ------------------------------------------------------------------
+
+    def load(self) -> 'MegaDataRepository':
+        """Charge les tables une seule fois (appels concurrents sérialisés)"""
+        if self._loaded:
+            return self
+        with self._lock:
+            if not self._loaded:
+                for loader in (self._load_mega_csv, self._load_mega_json, self._load_local_dataset,
+                               self._load_huggingface_dataset, self._load_fallback_csv):
+                    try:
+                        if loader():
+                            break
+                    except Exception as e:
+                        print(f"⚠️ Source MEGA ignorée ({loader.__name__}): {e}")
+                else:
+                    self._load_simulated()
+                print(f"🏛️ Dépôt MEGA prêt: {self._row_count():,} molécules ({self.source})")
+                self._loaded = True
+        return self
+
+    def _materialize(self) -> 'MegaDataRepository':
+        """Table complète d'une source différée, lue une seule fois au premier accès"""
+        self.load()
+        if self._pending_table is not None:
+            # Verrou distinct : les vues échantillonnées restent servies pendant la lecture
+            with self._table_lock:
+                if self._pending_table is not None:
+                    self._pending_table()
+                    self._pending_table = None
+        return self
+
+    def _row_count(self) -> int:
+        if self._pending_table is None:
+            return len(self._compounds)
+        count = count_mega_rows(self.csv_path)
+        if count is None:
+            from mega_row_index import get_row_index
+            row_index = get_row_index(self.csv_path)
+            count = row_index.num_rows if row_index is not None else 0
+        return count
+
+    def _set_tables(self, compounds: pd.DataFrame, source: str, status: str,
+                    bioactivities: Optional[pd.DataFrame] = None,
+                    raw_compounds: Optional[pd.DataFrame] = None) -> bool:
+        """Installe les tables d'une source : composés au format application quelle que soit la source"""
+        if len(compounds) == 0:
+            return False
+        # SMILES gardés dans compounds seulement sans table brute (qui les porte déjà)
+        self._compounds = to_compound_table(compounds, keep_smiles=raw_compounds is None)
+        self._bioactivities = (apply_schema(bioactivities, BIOACTIVITY_SCHEMA)
+                               if bioactivities is not None else pd.DataFrame())
+        self._raw_compounds = apply_schema(raw_compounds, RAW_MEGA_SCHEMA) if raw_compounds is not None else None
+        self.source = source
+        self.status = status
+        return True
+
+    def _load_mega_csv(self) -> bool:
+        """Base MEGA complète via le store colonnaire (table lue au premier accès)"""
+        if not os.path.exists(self.csv_path) and not is_parquet_fresh(self.csv_path):
+            return False
+        self._pending_table = self._read_mega_csv
+        self.source = 'mega_csv'
+        self.status = f"🟢 CONNECTÉ MEGA 1.4M - {self._row_count():,} molécules"
+        return True
+
+    def _read_mega_csv(self) -> bool:
+        raw = load_mega_columnar(csv_path=self.csv_path)
+        return self._set_tables(raw, 'mega_csv',
+                                f"🟢 CONNECTÉ MEGA 1.4M - {len(raw):,} molécules",
+                                raw_compounds=raw)
+
+    def _load_mega_json(self) -> bool:
+        """Export JSON MEGA (composés + bioactivités), lu en streaming"""
+        if not Path(self.json_path).exists():
+            return False
+        tables = load_json_tables(self.json_path, keys=('compounds', 'bioactivities'))
+        if 'compounds' not in tables:
+            return False
+        return self._set_tables(tables['compounds'], 'mega_json',
+                                "🟢 CONNECTÉ aux 1.4M molécules MEGA",
+                                bioactivities=tables.get('bioactivities'))
+
+    def _load_local_dataset(self) -> bool:
+        """Dataset Hugging Face sauvegardé localement (tous les splits)"""
+        if not Path(LOCAL_DATASET_PATH).exists():
+            return False
+        try:
+            from datasets import load_from_disk
+        except ImportError:
+            print("⚠️ Module 'datasets' non installé pour le dataset local")
+            return False
+
+        from mega_hf_stream import load_hf_dataframe
+
+        dataset_dict = load_from_disk(LOCAL_DATASET_PATH)
+        splits = []
+        for split_name in ['train', 'validation', 'test']:
+            if split_name in dataset_dict:
+                split_df = load_hf_dataframe(LOCAL_DATASET_PATH, split=split_name)
+                split_df['dataset_split'] = split_name
+                splits.append(split_df)
+        if not splits:
+            return False
+        return self._set_tables(pd.concat(splits, ignore_index=True), 'local_complete',
+                                "🟢 MEGA COMPLET LOCAL (1.4M molécules)")
+
+    def _load_huggingface_dataset(self) -> bool:
+        """
+        Échantillon streaming depuis le Hub Hugging Face
+
+        Les lots Arrow arrivent en arrière-plan : le dépôt est servi dès le
+        premier lot, puis remplacé par la table complète (nouvelle génération).
+        """
+        from mega_hf_stream import StreamingTable, datasets_available, stream_hf_batches
+
+        if not datasets_available():
+            print("⚠️ Module 'datasets' non installé pour Hugging Face")
+            return False
+
+        stream = StreamingTable(stream_hf_batches(HF_DATASET_NAME, max_rows=HF_SAMPLE_SIZE),
+                                on_complete=self._on_stream_complete).start()
+        if not stream.wait(min_rows=1):
+            if stream.error is not None:
+                raise stream.error
+            return False
+        first = stream.frame()
+        return self._set_tables(first, 'huggingface_streaming',
+                                f"🟡 HUGGING FACE EN COURS ({len(first):,} molécules reçues)")
+
+    def _on_stream_complete(self, compounds: pd.DataFrame):
+        """Fin du flux Hugging Face : installe la table complète"""
+        with self._lock:
+            if self._set_tables(compounds, 'huggingface_streaming',
+                                "🟢 MEGA COMPLET HUGGING FACE (1.4M molécules)"):
+                self._views.clear()
+                # Les caches dérivés (repository_version) se recalculent
+                self.generation = next(_generations)
+                print(f"🤗 Flux Hugging Face terminé: {len(compounds):,} molécules")
+
+    def _load_fallback_csv(self) -> bool:
+        """Échantillons CSV embarqués avec l'application"""
+        for path in FALLBACK_CSV_PATHS:
+            if os.path.exists(path):
+                df = pd.read_csv(path)
+                if self._set_tables(df, 'fallback_csv', f"🟡 MEGA ÉCHANTILLON ({len(df):,} molécules)"):
+                    return True
+        return False
+
+    def _load_simulated(self):
+        from mega_streamlit_connector import create_fallback_mega_dataset
+        self._set_tables(create_fallback_mega_dataset(), 'simulated', "🟡 Mode fallback MEGA")
+
+    # ------------------------------------------------------------------
+    # Accès aux tables
+    # ------------------------------------------------------------------
+
+    @property
+    def compounds(self) -> pd.DataFrame:
+        """Table canonique des composés (ne pas modifier en place)"""
+        return self._materialize()._compounds
+
+    @property
+    def bioactivities(self) -> pd.DataFrame:
+        return self._materialize()._bioactivities
+
+    @property
+    def raw_compounds(self) -> Optional[pd.DataFrame]:
+        """Table MEGA brute (colonnes d'origine), None hors source CSV MEGA"""
+        return self._materialize()._raw_compounds
+
+    @property
+    def file_backed(self) -> bool:
+        """Source CSV MEGA : échantillons lus dans le fichier, table brute disponible"""
+        return self.load().source == 'mega_csv'
+
+    @property
+    def total_rows(self) -> int:
+        """Nombre de composés (métadonnées du store si la table n'est pas encore lue)"""
+        return self.load()._row_count()
+
+    def memory_report(self) -> dict:
+        """Octets par colonne de chaque table chargée (voir mega_schema.memory_report)"""
+        tables = {'compounds': self.compounds, 'bioactivities': self.bioactivities,
+                  'raw_compounds': self.raw_compounds}
+        return {name: memory_report(table) for name, table in tables.items()
+                if table is not None and len(table.columns)}
+
+    def view(self, key: Hashable, builder: Callable[['MegaDataRepository'], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Vue dérivée mémorisée (construite une fois, partagée par les sessions)
+
+        builder reçoit le dépôt et retourne un DataFrame ; la clé doit
+        identifier entièrement la vue (mode, taille, graine...).
+        """
+        self.load()
+        if key not in self._views:
+            with self._lock:
+                if key not in self._views:
+                    self._views[key] = builder(self)
+        return self._views[key]
+
+    def discard_view(self, key: Hashable):
+        """Oublie une vue dérivée : reconstruite au prochain accès"""
+        with self._lock:
+            self._views.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # Échantillons (lus dans le fichier pour la source CSV MEGA)
+    # ------------------------------------------------------------------
+
+    def _projection(self, columns: Optional[Iterable[str]], raw: bool) -> Optional[list]:
+        """Colonnes du fichier à lire : demandées (brut) ou requises par le format application"""
+        if self._file_columns is None:
+            self._file_columns = read_mega_columns(self.csv_path)
+        wanted = (columns if raw else FORMAT_SOURCE_COLUMNS)
+        if wanted is None:
+            return None
+        return [column for column in self._file_columns if column in set(wanted)]
+
+    def _from_file(self, df: pd.DataFrame, raw: bool) -> pd.DataFrame:
+        """Lignes lues dans le fichier → table brute ou format application (index source conservé)"""
+        if raw:
+            return apply_schema(df, RAW_MEGA_SCHEMA)
+        return to_compound_table(df, keep_smiles=True).set_axis(df.index)
+
+    def head(self, n: int, raw: bool = False, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """n premières lignes (columns : colonnes brutes à lire, toutes si None)"""
+        if self.file_backed:
+            df = load_mega_columnar(columns=self._projection(columns, raw), max_rows=n, csv_path=self.csv_path)
+            return self._from_file(df, raw)
+        table = self.raw_compounds if raw else self.compounds
+        return table.iloc[:n] if table is not None else pd.DataFrame()
+
+    def evenly_spaced(self, n: int, skip_head: int = 0, raw: bool = False,
+                      columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Lignes régulièrement espacées sur toute la table (après skip_head)"""
+        if self.file_backed:
+            from mega_row_index import get_row_index
+
+            projection = self._projection(columns, raw)
+            row_index = get_row_index(self.csv_path)
+            if row_index is not None:
+                # Lecture directe des lignes via l'index d'offsets (coût ∝ échantillon)
+                df = row_index.stratified_rows(n, skip_head=skip_head, columns=projection)
+                df = clean_mega_names(df) if 'Nom' in df.columns else df
+            else:
+                # CSV source absent : colonnes projetées du store colonnaire
+                df = load_mega_columnar(columns=projection, csv_path=self.csv_path)
+                if len(df) <= skip_head or n <= 0:
+                    return pd.DataFrame()
+                df = df.iloc[np.unique(np.linspace(skip_head, len(df) - 1, num=n).astype(np.int64))]
+            return self._from_file(df, raw) if len(df) else df
+
+        table = self.raw_compounds if raw else self.compounds
+        if table is None or len(table) <= skip_head or n <= 0:
+            return pd.DataFrame()
+        return table.iloc[np.unique(np.linspace(skip_head, len(table) - 1, num=n).astype(np.int64))]
+
+    def stratified_sample(self, total_size: int, raw: bool = False, columns: Optional[Iterable[str]] = None,
+                          **sampler_kwargs) -> pd.DataFrame:
+        """
+        Échantillon stratifié reproductible sur toute la base
+
+        Source CSV MEGA : une passe de mega_sampler.sample_mega_stratified
+        sur les seules colonnes utiles du fichier ; sinon sur la table en
+        mémoire. Mêmes clés dans les deux cas : à graine égale,
+        l'échantillon ne dépend pas de l'ordre ni du découpage des lignes.
+        La passe sur le fichier utilise SERVER_SAMPLER_WORKERS processus,
+        sauf workers explicite.
+        """
+        from mega_sampler import StratifiedReservoirSampler, sample_mega_stratified
+
+        if self.file_backed:
+            sampler_kwargs.setdefault('workers', SERVER_SAMPLER_WORKERS)
+            sample, _ = sample_mega_stratified(total_size, transform=None if raw else _format_file_batch,
+                                               csv_path=self.csv_path, columns=self._projection(columns, raw),
+                                               **sampler_kwargs)
+            if raw or len(sample) == 0:
+                return apply_schema(sample, RAW_MEGA_SCHEMA) if len(sample) else sample
+            return apply_schema(add_normalized_names(sample), COMPOUND_SCHEMA)
+
+        table = self.raw_compounds if raw else self.compounds
+        if table is None or len(table) == 0:
+            return pd.DataFrame()
+        sampler = StratifiedReservoirSampler(total_size, **sampler_kwargs)
+        sampler.update(table)
+        return sampler.result()
+
+
+@fingerprint_cache(MEGA_SOURCE_PATHS, maxsize=1, copy=False)
+def get_mega_repository() -> MegaDataRepository:
+    """
+    Instance unique du dépôt MEGA pour tout le processus serveur
+
+    Rechargée en arrière-plan uniquement quand le contenu des fichiers
+    sources change ; l'ancien dépôt reste servi pendant le rechargement.
+    """
+    return MegaDataRepository().load()
+
+
+def repository_version() -> int:
+    """Jeton de version du dépôt courant, pour les caches qui en dérivent"""
+    return get_mega_repository().generation
+
+
+if __name__ == "__main__":
+    repository = get_mega_repository().load()
+    print(f"{repository.status} - source: {repository.source}")
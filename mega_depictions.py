@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+🖼️ PhytoAI - Cache des Dessins 2D de Molécules
+Chaque dessin PNG est adressé par son contenu (SMILES canonique + taille
+de rendu) et stocké sur disque, derrière un LRU mémoire borné en octets :
+un réaffichage sert les octets en cache sans aucun travail RDKit. Un job
+de pré-rendu par lots prépare les champions et les molécules les plus
+consultées
+"""
+
+import base64
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mega_cache import QueryResultCache
+from mega_columnar_store import MEGA_CACHE_DIR
+from mega_descriptors import canonical_smiles
+from mega_structure_dedup import CANONICAL_SMILES_COLUMN, structure_keys
+
+try:
+    from rdkit import Chem, RDLogger
+    from rdkit.Chem import Draw
+    RDLogger.DisableLog('rdApp.*')
+    RDKIT_AVAILABLE = True
+except ImportError:
+    RDKIT_AVAILABLE = False
+
+DEPICTIONS_DIR = MEGA_CACHE_DIR / "depictions"
+DEPICTION_SIZE = (400, 300)
+DEPICTION_CACHE_MAX_BYTES = int(os.getenv('PHYTOAI_DEPICTION_CACHE_MB', '32')) << 20
+
+# Molécules pré-rendues par défaut : champions, puis meilleures bioactivités
+PRERENDER_CHAMPIONS = 5000
+PRERENDER_POPULAR = 2000
+
+# SMILES saisi + taille → PNG (b'' si le SMILES est invalide)
+_depiction_cache = QueryResultCache(max_bytes=DEPICTION_CACHE_MAX_BYTES)
+
+
+def depiction_path(canonical: str, size: Tuple[int, int] = DEPICTION_SIZE) -> Path:
+    """Fichier du dessin : hash du SMILES canonique et de la taille, répertoires à 256 entrées"""
+    width, height = size
+    digest = hashlib.blake2b(f"{canonical}\n{width}x{height}".encode('utf-8'), digest_size=16).hexdigest()
+    return DEPICTIONS_DIR / digest[:2] / f"{digest}.png"
+
+
+def render_depiction(canonical: str, size: Tuple[int, int] = DEPICTION_SIZE) -> Optional[bytes]:
+    """PNG du dessin 2D (rendu RDKit), None si invalide"""
+    if not RDKIT_AVAILABLE:
+        return None
+    mol = Chem.MolFromSmiles(canonical)
+    if mol is None:
+        return None
+    buffered = io.BytesIO()
+    Draw.MolToImage(mol, size=tuple(size), kekulize=True).save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def _write_depiction(path: Path, png: bytes):
+    """Écriture atomique : un lecteur ne voit jamais de PNG partiel"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(png)
+    os.replace(tmp_path, path)
+
+
+def get_depiction(smiles: str, size: Tuple[int, int] = DEPICTION_SIZE) -> Optional[bytes]:
+    """
+    PNG du dessin 2D d'un SMILES, None si invalide
+
+    LRU mémoire, puis fichier sur disque, puis rendu RDKit persisté pour
+    les prochains appels (tous processus confondus).
+    """
+    size = tuple(size)
+
+    def compute() -> bytes:
+        canonical = canonical_smiles(smiles)
+        if canonical is None:
+            return b''
+        path = depiction_path(canonical, size)
+        if path.exists():
+            return path.read_bytes()
+        png = render_depiction(canonical, size)
+        if png is None:
+            return b''
+        _write_depiction(path, png)
+        return png
+
+    return _depiction_cache.get_or_compute(('depiction', smiles, size), compute) or None
+
+
+def depiction_data_uri(smiles: str, size: Tuple[int, int] = DEPICTION_SIZE) -> Optional[str]:
+    """Dessin 2D en data URI base64 (balise <img>), None si invalide"""
+    png = get_depiction(smiles, size)
+    if png is None:
+        return None
+    return f"data:image/png;base64,{base64.b64encode(png).decode()}"
+
+
+def _render_chunk(canonical: list, size: Tuple[int, int]) -> int:
+    """Rendu et écriture d'un bloc de dessins (exécuté dans un processus de travail)"""
+    rendered = 0
+    for text in canonical:
+        png = render_depiction(text, size)
+        if png is not None:
+            _write_depiction(depiction_path(text, size), png)
+            rendered += 1
+    return rendered
+
+
+def prerender_depictions(smiles: Iterable[str], size: Tuple[int, int] = DEPICTION_SIZE,
+                         workers: Optional[int] = None, chunk_size: int = 500) -> int:
+    """
+    Pré-rendu par lots des dessins absents du disque
+
+    Les SMILES sont canonisés (structures identiques rendues une fois),
+    puis les dessins manquants sont rendus par blocs dans des processus.
+    Retourne le nombre de dessins rendus.
+    """
+    if not RDKIT_AVAILABLE:
+        raise ImportError("RDKit requis pour dessiner les molécules")
+
+    size = tuple(size)
+    smiles = pd.Series(pd.unique(pd.Series(list(smiles), dtype='string').dropna()), dtype='string')
+    canonical = structure_keys(smiles, workers)[CANONICAL_SMILES_COLUMN].dropna().unique().tolist()
+    missing = [text for text in canonical if not depiction_path(text, size).exists()]
+    print(f"🖼️ Dessins: {len(canonical):,} structures, {len(missing):,} à rendre")
+    chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        return sum(_render_chunk(chunk, size) for chunk in chunks)
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        return sum(pool.map(_render_chunk, chunks, [size] * len(chunks)))
+
+
+def prerender_mega_depictions(champions: int = PRERENDER_CHAMPIONS, popular: int = PRERENDER_POPULAR,
+                              size: Tuple[int, int] = DEPICTION_SIZE, repository=None,
+                              workers: Optional[int] = None) -> int:
+    """Pré-rendu des champions et des molécules les mieux classées (bioactivité) du dépôt MEGA"""
+    from mega_fingerprints import compound_smiles
+    from mega_topk import top_k
+
+    if repository is None:
+        from mega_data_repository import get_mega_repository
+        repository = get_mega_repository()
+    smiles = compound_smiles(repository)
+    if smiles is None:
+        print("⚠️ Aucun SMILES dans le dépôt MEGA : rien à pré-rendre")
+        return 0
+
+    compounds = repository.compounds
+    positions = []
+    if 'is_champion' in compounds.columns:
+        positions.append(np.flatnonzero(compounds['is_champion'].fillna(False).to_numpy(dtype=bool))[:champions])
+    if 'bioactivity_score' in compounds.columns:
+        scores = pd.to_numeric(compounds['bioactivity_score'], errors='coerce')
+        positions.append(top_k(scores.to_numpy(dtype=np.float64, na_value=np.nan), popular))
+    if not positions:
+        return 0
+    rows = np.unique(np.concatenate(positions))
+    return prerender_depictions(smiles.iloc[rows], size=size, workers=workers)
+
+
+if __name__ == "__main__":
+    import time
+
+    started = time.time()
+    rendered = prerender_mega_depictions()
+    print(f"🖼️ {rendered:,} dessins rendus en {time.time() - started:.1f}s ({DEPICTIONS_DIR})")
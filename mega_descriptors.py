@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+⚗️ PhytoAI - Descripteurs Moléculaires Calculés par Lots
+Chaque SMILES distinct est canonisé une seule fois, chaque structure
+décrite une seule fois, par blocs répartis sur des processus ; les descripteurs (poids, logP, HBD, HBA, TPSA...) sont
+persistés en colonnes typées, une ligne par SMILES canonique (un map
+persistant relie chaque SMILES saisi à sa forme canonique) : les pages
+lisent le store au lieu de recalculer sur le thread Streamlit
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from mega_cache import fingerprint_cache
+from mega_columnar_store import (DESCRIPTORS_PATH, MEGA_CSV_PATH, PYARROW_AVAILABLE, SMILES_MAP_PATH,
+                                 load_mega_columnar)
+
+try:
+    from rdkit import Chem, RDLogger
+    from rdkit.Chem import Descriptors
+    RDLogger.DisableLog('rdApp.*')
+    RDKIT_AVAILABLE = True
+except ImportError:
+    RDKIT_AVAILABLE = False
+
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+# Descripteur → type de colonne (entiers nullables : SMILES invalide = valeur manquante)
+DESCRIPTOR_COLUMNS: Dict[str, str] = {
+    'molecular_weight': 'float32',
+    'logp': 'float32',
+    'hbd': 'Int16',
+    'hba': 'Int16',
+    'tpsa': 'float32',
+    'rotatable_bonds': 'Int16',
+    'aromatic_rings': 'Int16',
+}
+
+if RDKIT_AVAILABLE:
+    _DESCRIPTOR_FUNCTIONS = {
+        'molecular_weight': Descriptors.MolWt,
+        'logp': Descriptors.MolLogP,
+        'hbd': Descriptors.NumHDonors,
+        'hba': Descriptors.NumHAcceptors,
+        'tpsa': Descriptors.TPSA,
+        'rotatable_bonds': Descriptors.NumRotatableBonds,
+        'aromatic_rings': Descriptors.NumAromaticRings,
+    }
+
+# Décimales affichées (comme l'ancien calcul à la volée)
+_ROUNDING = {'molecular_weight': 2, 'logp': 2, 'tpsa': 2}
+
+
+def _typed(table: pd.DataFrame) -> pd.DataFrame:
+    return table.astype({'canonical_smiles': 'string', **DESCRIPTOR_COLUMNS})
+
+
+def _write_atomic(table: pd.DataFrame, path) -> None:
+    """Écriture atomique : les lecteurs ne voient jamais de fichier partiel"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".parquet.tmp")
+    pq.write_table(pa.Table.from_pandas(table, preserve_index=False), tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def _map_in_chunks(function, items: list, workers: Optional[int], chunk_size: int) -> list:
+    """function appliquée par blocs, répartis sur des processus (1 = séquentiel, None = nb de CPU)"""
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        return [function(chunk) for chunk in chunks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        return list(pool.map(function, chunks))
+
+
+def _canonical_chunk(smiles: list) -> list:
+    """SMILES canoniques d'un bloc (None si invalide ; exécuté dans un processus de travail)"""
+    canonical = []
+    for text in smiles:
+        mol = Chem.MolFromSmiles(text) if text else None
+        canonical.append(Chem.MolToSmiles(mol) if mol is not None else None)
+    return canonical
+
+
+def _compute_chunk(canonical: list) -> pd.DataFrame:
+    """Descripteurs d'un bloc de SMILES canoniques distincts (exécuté dans un processus de travail)"""
+    values = {name: np.full(len(canonical), np.nan) for name in DESCRIPTOR_COLUMNS}
+    for i, text in enumerate(canonical):
+        mol = Chem.MolFromSmiles(text) if text else None
+        if mol is None:
+            continue
+        for name, function in _DESCRIPTOR_FUNCTIONS.items():
+            values[name][i] = function(mol)
+    return _typed(pd.DataFrame({'canonical_smiles': canonical, **values}))
+
+
+def _distinct(smiles: Iterable[str]) -> pd.Series:
+    return pd.Series(pd.unique(pd.Series(smiles, dtype='string').dropna()), dtype='string')
+
+
+def compute_descriptor_table(canonical: Iterable[str], workers: Optional[int] = None,
+                             chunk_size: int = 20_000) -> pd.DataFrame:
+    """
+    Table des descripteurs des structures distinctes (une ligne par SMILES canonique)
+
+    Args:
+        canonical: SMILES canoniques (doublons et valeurs manquantes ignorés)
+        workers: Processus parallèles (1 = séquentiel, None = nb de CPU)
+        chunk_size: SMILES par bloc envoyé à un processus
+    """
+    if not RDKIT_AVAILABLE:
+        raise ImportError("RDKit requis pour calculer les descripteurs moléculaires")
+
+    tables = _map_in_chunks(_compute_chunk, _distinct(canonical).tolist(), workers, chunk_size)
+    if not tables:
+        return _typed(pd.DataFrame(columns=['canonical_smiles', *DESCRIPTOR_COLUMNS]))
+    return pd.concat(tables, ignore_index=True)
+
+
+@fingerprint_cache(paths=(str(SMILES_MAP_PATH),), maxsize=1, copy=False)
+def load_smiles_map() -> pd.Series:
+    """SMILES saisi → SMILES canonique (<NA> si invalide), indexé par SMILES saisi"""
+    if not PYARROW_AVAILABLE or not SMILES_MAP_PATH.exists():
+        table = pd.DataFrame({'smiles': [], 'canonical_smiles': []})
+    else:
+        table = pq.read_table(SMILES_MAP_PATH).to_pandas()
+    table = table.astype({'smiles': 'string', 'canonical_smiles': 'string'})
+    return table.set_index('smiles')['canonical_smiles']
+
+
+def update_smiles_map(smiles: Iterable[str], workers: Optional[int] = None,
+                      chunk_size: int = 20_000) -> pd.Series:
+    """Ajoute au map les SMILES saisis qui n'y sont pas encore (canonisés une fois chacun)"""
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow requis pour persister les SMILES canoniques")
+    if not RDKIT_AVAILABLE:
+        raise ImportError("RDKit requis pour canoniser les SMILES")
+
+    smiles_map = load_smiles_map()
+    distinct = _distinct(smiles)
+    missing = distinct[~distinct.isin(smiles_map.index)].tolist()
+    if not missing:
+        return smiles_map
+
+    canonical = [text for chunk in _map_in_chunks(_canonical_chunk, missing, workers, chunk_size) for text in chunk]
+    table = pd.concat([smiles_map.reset_index(),
+                       pd.DataFrame({'smiles': missing, 'canonical_smiles': canonical})], ignore_index=True)
+    _write_atomic(table.astype({'smiles': 'string', 'canonical_smiles': 'string'}), SMILES_MAP_PATH)
+    load_smiles_map.clear()
+    print(f"🧪 SMILES canoniques: {len(missing):,} nouveaux, {len(table):,} au total ({SMILES_MAP_PATH})")
+    return load_smiles_map()
+
+
+def canonicalize_smiles(smiles: pd.Series) -> pd.Series:
+    """
+    SMILES canonique de chaque SMILES, aligné sur la série (vectorisé)
+
+    Une recherche par SMILES distinct dans le map ; <NA> pour les SMILES
+    invalides ou absents du map. Ne calcule rien : voir update_smiles_map.
+    """
+    smiles_map = load_smiles_map()
+    codes, uniques = pd.factorize(pd.Series(smiles).reset_index(drop=True))
+    positions = smiles_map.index.get_indexer(pd.Index(uniques, dtype='string'))
+    # Position -1 (SMILES inconnu ou manquant) → valeur manquante
+    result = smiles_map.reset_index(drop=True).reindex(np.append(positions, -1)[codes])
+    result.index = smiles.index if isinstance(smiles, pd.Series) else pd.RangeIndex(len(result))
+    return result
+
+
+def canonical_smiles(smiles: str) -> Optional[str]:
+    """SMILES canonique d'un SMILES : lu dans le map, sinon calculé (RDKit) ; None si invalide"""
+    if not smiles:
+        return None
+    smiles_map = load_smiles_map()
+    if smiles in smiles_map.index:
+        value = smiles_map.at[smiles]
+        return None if pd.isna(value) else str(value)
+    if not RDKIT_AVAILABLE:
+        return None
+    return _canonical_chunk([smiles])[0]
+
+
+@fingerprint_cache(paths=(str(DESCRIPTORS_PATH),), maxsize=1, copy=False)
+def load_descriptor_store() -> pd.DataFrame:
+    """Store des descripteurs indexé par SMILES canonique (vide s'il n'existe pas encore)"""
+    if not PYARROW_AVAILABLE or not DESCRIPTORS_PATH.exists():
+        table = _typed(pd.DataFrame(columns=['canonical_smiles', *DESCRIPTOR_COLUMNS]))
+    else:
+        table = _typed(pq.read_table(DESCRIPTORS_PATH).to_pandas())
+    return table.set_index('canonical_smiles')
+
+
+def update_descriptor_store(smiles: Iterable[str], workers: Optional[int] = None,
+                            chunk_size: int = 20_000) -> pd.DataFrame:
+    """
+    Ajoute au store les descripteurs des structures qui n'y sont pas encore
+
+    Les SMILES saisis sont d'abord canonisés (update_smiles_map) ; seules
+    les nouvelles structures distinctes sont calculées, une fois quelle que
+    soit leur écriture. L'écriture est atomique.
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow requis pour persister les descripteurs")
+
+    update_smiles_map(smiles, workers=workers, chunk_size=chunk_size)
+    store = load_descriptor_store()
+    distinct = _distinct(canonicalize_smiles(pd.Series(smiles, dtype='string')))
+    missing = distinct[~distinct.isin(store.index)]
+    print(f"⚗️ Descripteurs: {len(distinct):,} structures distinctes, {len(missing):,} à calculer")
+    if len(missing) == 0:
+        return store
+
+    computed = compute_descriptor_table(missing, workers=workers, chunk_size=chunk_size)
+    table = pd.concat([store.reset_index(), computed], ignore_index=True)
+    _write_atomic(table, DESCRIPTORS_PATH)
+    load_descriptor_store.clear()
+    print(f"✅ Store de descripteurs: {len(table):,} structures ({DESCRIPTORS_PATH})")
+    return load_descriptor_store()
+
+
+def lookup_descriptors(smiles: pd.Series, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Descripteurs persistés de chaque SMILES, alignés sur la série (vectorisé)
+
+    SMILES saisi → SMILES canonique (map) → ligne du store, une recherche
+    par valeur distincte ; valeurs manquantes pour les SMILES inconnus.
+    Ne calcule rien : voir update_descriptor_store.
+    """
+    columns = list(DESCRIPTOR_COLUMNS if columns is None else columns)
+    store = load_descriptor_store()
+    codes, uniques = pd.factorize(canonicalize_smiles(smiles).reset_index(drop=True))
+    positions = store.index.get_indexer(pd.Index(uniques, dtype='string'))
+    # Position -1 (structure inconnue ou manquante) → ligne de valeurs manquantes, types conservés
+    found = np.append(positions, -1)[codes]
+    result = store[columns].reset_index(drop=True).reindex(found)
+    result.index = smiles.index if isinstance(smiles, pd.Series) else pd.RangeIndex(len(result))
+    return result
+
+
+def get_molecular_properties(smiles: str) -> Dict:
+    """
+    Propriétés d'un SMILES pour l'affichage : lues dans le store, calculées
+    à la volée (RDKit) seulement pour une structure inconnue ; {} si invalide
+    """
+    canonical = canonical_smiles(smiles)
+    if canonical is None:
+        return {}
+    store = load_descriptor_store()
+    if canonical in store.index:
+        row = store.loc[canonical]
+    elif RDKIT_AVAILABLE:
+        row = _compute_chunk([canonical]).iloc[0]
+    else:
+        return {}
+    if pd.isna(row['molecular_weight']):
+        return {}
+    return {name: (round(float(row[name]), _ROUNDING[name]) if name in _ROUNDING else int(row[name]))
+            for name in DESCRIPTOR_COLUMNS}
+
+
+if __name__ == "__main__":
+    import time
+
+    started = time.time()
+    raw = load_mega_columnar(columns=['SMILES'], csv_path=MEGA_CSV_PATH)
+    store = update_descriptor_store(raw['SMILES'])
+    print(f"⚗️ {len(store):,} structures décrites en {time.time() - started:.1f}s")
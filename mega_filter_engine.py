@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+🎛️ PhytoAI - Moteur de Filtres sur la Base MEGA Complète
+Intervalles évalués par recherche dichotomique sur des colonnes pré-triées,
+catégories par codes entiers ; le prédicat le plus sélectif fournit les
+candidats, les autres ne sont vérifiés que sur ceux-ci. Un seul appel
+retourne le total filtré et les meilleurs composés
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mega_topk import top_k
+
+DEFAULT_RANGE_COLUMNS = ('bioactivity_score', 'molecular_weight', 'logp')
+DEFAULT_CATEGORY_COLUMNS = ('toxicity', 'solubility', 'molecular_family')
+
+
+class _SortedColumn:
+    """Valeurs triées d'une colonne numérique et positions correspondantes"""
+
+    def __init__(self, values: pd.Series):
+        values = pd.to_numeric(values, errors='coerce')
+        # Précision d'origine conservée : mêmes comparaisons qu'un filtre pandas (float32...)
+        dtype = values.dtype if pd.api.types.is_float_dtype(values.dtype) else np.float64
+        self.values = values.to_numpy(dtype=dtype, na_value=np.nan)
+        self.order = np.argsort(self.values, kind='stable')
+        self.sorted_values = self.values[self.order]
+        # Les NaN sont triés en fin de tableau : jamais retenus par un intervalle
+        self.valid = len(self.values) - int(np.isnan(self.values).sum())
+
+    def span(self, low: float, high: float) -> Tuple[int, int]:
+        dtype = self.sorted_values.dtype
+        start = np.searchsorted(self.sorted_values[:self.valid], dtype.type(low), side='left')
+        end = np.searchsorted(self.sorted_values[:self.valid], dtype.type(high), side='right')
+        return int(start), int(end)
+
+    def bounds(self) -> Tuple[float, float]:
+        if self.valid == 0:
+            return 0.0, 0.0
+        return float(self.sorted_values[0]), float(self.sorted_values[self.valid - 1])
+
+
+class _CategoryColumn:
+    """Codes entiers d'une colonne catégorielle et lignes de chaque code (CSR)"""
+
+    def __init__(self, values: pd.Series):
+        codes, categories = pd.factorize(values.reset_index(drop=True))
+        self.codes = codes.astype(np.int32)
+        self.categories = pd.Index(categories)
+        self.rows = np.argsort(codes, kind='stable').astype(np.int32)
+        sizes = np.bincount(codes[codes >= 0], minlength=len(categories))
+        # Les valeurs manquantes (code -1) sont triées en tête : décalage des offsets
+        self.offsets = np.r_[0, np.cumsum(sizes)] + int((codes < 0).sum())
+
+    def code_set(self, selected: Iterable) -> np.ndarray:
+        codes = self.categories.get_indexer(list(selected))
+        return np.unique(codes[codes >= 0])
+
+    def rows_of(self, codes: np.ndarray) -> np.ndarray:
+        if len(codes) == 0:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate([self.rows[self.offsets[code]:self.offsets[code + 1]] for code in codes])
+
+
+class FilterEngine:
+    """
+    Filtres intervalles + catégories sur toutes les lignes d'une table
+
+    Chaque prédicat estime son nombre de lignes (largeur de l'intervalle
+    trié, taille des catégories) ; seul le plus sélectif est matérialisé,
+    les autres sont vérifiés de façon vectorisée sur ses candidats.
+    """
+
+    def __init__(self, df: pd.DataFrame, range_columns: Iterable[str] = DEFAULT_RANGE_COLUMNS,
+                 category_columns: Iterable[str] = DEFAULT_CATEGORY_COLUMNS,
+                 rank_column: str = 'bioactivity_score'):
+        self._size = len(df)
+        self._ranges = {column: _SortedColumn(df[column]) for column in range_columns if column in df.columns}
+        self._categories = {column: _CategoryColumn(df[column])
+                            for column in category_columns if column in df.columns}
+        self._rank = (pd.to_numeric(df[rank_column], errors='coerce').to_numpy(dtype=np.float64, na_value=-np.inf)
+                      if rank_column in df.columns else np.zeros(len(df)))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def bounds(self, column: str) -> Tuple[float, float]:
+        """Min et max d'une colonne numérique sur toute la table"""
+        return self._ranges[column].bounds()
+
+    def categories(self, column: str) -> list:
+        """Valeurs possibles d'une colonne catégorielle"""
+        return self._categories[column].categories.tolist()
+
+    def query(self, ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+              categories: Optional[Dict[str, Iterable]] = None,
+              within: Optional[np.ndarray] = None,
+              limit: Optional[int] = 100,
+              after: Optional[Tuple[float, int]] = None) -> Tuple[np.ndarray, int]:
+        """
+        (positions des meilleures lignes par rang décroissant, total filtré)
+
+        Args:
+            ranges: colonne → (min, max) inclus
+            categories: colonne → valeurs acceptées
+            within: Restreint la population à ces positions (ex: résultats d'une recherche)
+            limit: Nombre de positions retournées (toutes si None)
+            after: Clé (voir key) de la dernière ligne déjà vue : pagination par curseur
+        """
+        ranges = {column: bounds for column, bounds in (ranges or {}).items() if column in self._ranges}
+        categories = {column: self._categories[column].code_set(values)
+                      for column, values in (categories or {}).items() if column in self._categories}
+
+        # Estimation de la sélectivité de chaque prédicat
+        spans = {column: self._ranges[column].span(*bounds) for column, bounds in ranges.items()}
+        estimates = {('range', column): end - start for column, (start, end) in spans.items()}
+        for column, codes in categories.items():
+            offsets = self._categories[column].offsets
+            estimates[('category', column)] = int(sum(offsets[code + 1] - offsets[code] for code in codes))
+        if within is not None:
+            estimates[('within', None)] = len(within)
+
+        if not estimates:
+            candidates = np.arange(self._size)
+        else:
+            kind, column = min(estimates, key=estimates.get)
+            if kind == 'range':
+                start, end = spans.pop(column)
+                candidates = self._ranges[column].order[start:end]
+                del ranges[column]
+            elif kind == 'category':
+                candidates = self._categories[column].rows_of(categories.pop(column))
+            else:
+                candidates = np.asarray(within)
+                within = None
+
+        # Vérification des autres prédicats sur les seuls candidats
+        keep = np.ones(len(candidates), dtype=bool)
+        for column, (low, high) in ranges.items():
+            values = self._ranges[column].values[candidates]
+            keep &= (values >= values.dtype.type(low)) & (values <= values.dtype.type(high))
+        for column, codes in categories.items():
+            keep &= np.isin(self._categories[column].codes[candidates], codes)
+        if within is not None:
+            member = np.zeros(self._size, dtype=bool)
+            member[within] = True
+            keep &= member[candidates]
+        matches = candidates[keep]
+
+        total = len(matches)
+        if after is not None:
+            # Ordre (rang décroissant, position croissante) : reprise après la clé
+            rank, row = after
+            ranks = self._rank[matches]
+            matches = matches[(ranks < rank) | ((ranks == rank) & (matches > row))]
+        # Sélection partielle ; à égalité de rang, les premières lignes de la table
+        return top_k(self._rank[matches], limit, positions=matches).astype(np.int64), total
+
+    def key(self, row: int) -> Tuple[float, int]:
+        """Clé de tri d'une ligne (rang, position), point de reprise d'une page"""
+        return float(self._rank[row]), int(row)
+
+
+def get_filter_engine(repository=None) -> FilterEngine:
+    """Moteur de filtres des composés du dépôt MEGA (une fois par version des données)"""
+    if repository is None:
+        from mega_data_repository import get_mega_repository
+        repository = get_mega_repository()
+    return repository.view(('filter_engine',), lambda repo: FilterEngine(repo.compounds))
+
+
+if __name__ == "__main__":
+    import time
+
+    from mega_data_repository import get_mega_repository
+
+    repository = get_mega_repository()
+    started = time.time()
+    engine = get_filter_engine(repository)
+    print(f"🎛️ Moteur de filtres: {len(engine):,} lignes, {time.time() - started:.1f}s")
+    started = time.time()
+    rows, total = engine.query(ranges={'bioactivity_score': (0.7, 1.0), 'molecular_weight': (200, 800)},
+                               categories={'toxicity': ['Faible']})
+    print(f"   {total:,} composés filtrés, top {len(rows)} en {(time.time() - started) * 1000:.1f} ms")
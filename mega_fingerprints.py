@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+🔗 PhytoAI - Empreintes Moléculaires et Recherche par Similarité
+Empreintes Morgan (ECFP4, 1024 bits) calculées une fois par structure
+distincte (SMILES canonique) et rangées dans une matrice uint64 compacte,
+memory-mappée depuis le disque ; la similarité de Tanimoto contre toute la
+base est un ET bit à bit suivi d'un comptage de bits, par blocs répartis
+sur les cœurs
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mega_bitmap_index import popcount
+from mega_cache import fingerprint_cache, get_query_cache
+from mega_columnar_store import MEGA_CACHE_DIR, MEGA_CSV_PATH, PYARROW_AVAILABLE, load_mega_columnar
+from mega_descriptors import canonical_smiles, canonicalize_smiles, update_smiles_map
+from mega_topk import top_k
+
+try:
+    from rdkit import Chem, RDLogger
+    from rdkit.Chem import rdFingerprintGenerator
+    RDLogger.DisableLog('rdApp.*')
+    RDKIT_AVAILABLE = True
+except ImportError:
+    RDKIT_AVAILABLE = False
+
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+FINGERPRINT_RADIUS = 2  # ECFP4
+FINGERPRINT_BITS = 1024
+FINGERPRINT_WORDS = FINGERPRINT_BITS // 64
+
+# Matrice (une ligne de mots uint64 par structure distincte) et SMILES canoniques dans le même ordre
+FINGERPRINTS_PATH = MEGA_CACHE_DIR / f"fingerprints_ecfp{2 * FINGERPRINT_RADIUS}_{FINGERPRINT_BITS}.npy"
+FINGERPRINT_KEYS_PATH = FINGERPRINTS_PATH.with_suffix(".canonical.parquet")
+
+# Lignes de la matrice comparées par bloc (16 mots × 8192 lignes = 1 MB, reste en cache)
+BLOCK_ROWS = 8192
+
+_generator = None
+
+
+def _morgan_generator():
+    """Générateur RDKit, créé une fois par processus (non picklable)"""
+    global _generator
+    if _generator is None:
+        _generator = rdFingerprintGenerator.GetMorganGenerator(radius=FINGERPRINT_RADIUS,
+                                                               fpSize=FINGERPRINT_BITS)
+    return _generator
+
+
+def _compute_chunk(smiles: list) -> np.ndarray:
+    """Empreintes empaquetées d'un bloc de SMILES (ligne nulle si invalide)"""
+    generator = _morgan_generator()
+    bits = np.zeros((len(smiles), FINGERPRINT_BITS), dtype=np.uint8)
+    for i, text in enumerate(smiles):
+        mol = Chem.MolFromSmiles(text) if text else None
+        if mol is not None:
+            bits[i] = generator.GetFingerprintAsNumPy(mol)
+    return pack_fingerprints(bits)
+
+
+def pack_fingerprints(bits: np.ndarray) -> np.ndarray:
+    """Matrice de bits (n, FINGERPRINT_BITS) → matrice de mots uint64 (n, FINGERPRINT_WORDS)"""
+    packed = np.packbits(np.asarray(bits, dtype=bool), axis=1, bitorder='little')
+    return np.ascontiguousarray(packed).view('<u8')
+
+
+def compute_fingerprints(smiles: list, workers: Optional[int] = None, chunk_size: int = 20_000,
+                         compute_chunk: Callable[[list], np.ndarray] = _compute_chunk) -> np.ndarray:
+    """
+    Empreintes empaquetées de chaque SMILES, dans l'ordre donné
+
+    Args:
+        smiles: SMILES à décrire
+        workers: Processus parallèles (1 = séquentiel, None = nb de CPU)
+        chunk_size: SMILES par bloc envoyé à un processus
+        compute_chunk: Empreintes d'un bloc (Morgan par défaut) ; fonction de module, picklable
+    """
+    if not RDKIT_AVAILABLE:
+        raise ImportError("RDKit requis pour calculer les empreintes moléculaires")
+
+    chunks = [smiles[i:i + chunk_size] for i in range(0, len(smiles), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        blocks = [compute_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            blocks = list(pool.map(compute_chunk, chunks))
+    return np.concatenate(blocks)
+
+
+class FingerprintStore:
+    """
+    Empreintes persistées : matrice (n, mots) memory-mappée et index
+    SMILES canonique → ligne ; compute_chunk calcule l'empreinte d'une
+    structure absente du store (recherche sur une structure saisie)
+    """
+
+    def __init__(self, smiles: pd.Index, words: np.ndarray,
+                 compute_chunk: Optional[Callable[[list], np.ndarray]] = None):
+        self.smiles = smiles
+        self.words = words
+        self._compute_chunk = compute_chunk
+        self._bit_counts = None
+
+    def __len__(self) -> int:
+        return len(self.smiles)
+
+    @property
+    def bit_counts(self) -> np.ndarray:
+        """Bits à 1 de chaque ligne (dénominateur de Tanimoto), calculés au premier usage"""
+        if self._bit_counts is None:
+            self._bit_counts = row_bit_counts(self.words)
+        return self._bit_counts
+
+    def fingerprint(self, smiles: str) -> Optional[np.ndarray]:
+        """Empreinte d'un SMILES (toute écriture) : lue dans le store, sinon calculée (RDKit) ; None si invalide"""
+        canonical = canonical_smiles(smiles)
+        if canonical is None:
+            return None
+        position = self.smiles.get_indexer([canonical])[0]
+        if position >= 0:
+            words = np.asarray(self.words[position])
+        elif RDKIT_AVAILABLE and self._compute_chunk is not None:
+            words = self._compute_chunk([canonical])[0]
+        else:
+            return None
+        return words if words.any() else None
+
+
+def _row_popcounts(block: np.ndarray) -> np.ndarray:
+    """Bits à 1 de chaque ligne d'un bloc de mots"""
+    counts = popcount(block).reshape(len(block), -1)
+    # Addition colonne par colonne : plus rapide qu'une réduction sur un axe de 16 éléments
+    total = counts[:, 0].astype(np.int32)
+    for column in range(1, counts.shape[1]):
+        total += counts[:, column]
+    return total
+
+
+def row_bit_counts(words: np.ndarray) -> np.ndarray:
+    """Nombre de bits à 1 de chaque ligne d'une matrice de mots"""
+    counts = np.empty(len(words), dtype=np.int32)
+    for start in range(0, len(words), BLOCK_ROWS):
+        block = np.asarray(words[start:start + BLOCK_ROWS])
+        counts[start:start + len(block)] = _row_popcounts(block)
+    return counts
+
+
+def read_fingerprint_store(words_path: Path, keys_path: Path, n_words: int,
+                           compute_chunk: Optional[Callable[[list], np.ndarray]] = None) -> FingerprintStore:
+    """Store d'empreintes (matrice memory-mappée, non chargée en RAM) ; vide s'il n'existe pas"""
+    empty = FingerprintStore(pd.Index([], dtype='string'), np.zeros((0, n_words), dtype='<u8'), compute_chunk)
+    if not PYARROW_AVAILABLE or not words_path.exists() or not keys_path.exists():
+        return empty
+    smiles = pd.Index(pq.read_table(keys_path).column('canonical_smiles').to_pandas(), dtype='string')
+    words = np.load(words_path, mmap_mode='r')
+    if words.shape != (len(smiles), n_words):
+        print(f"⚠️ Store d'empreintes incohérent ignoré ({words_path}: {words.shape} / {len(smiles)} clés)")
+        return empty
+    return FingerprintStore(smiles, words, compute_chunk)
+
+
+def extend_fingerprint_store(store: FingerprintStore, smiles: Iterable[str], words_path: Path, keys_path: Path,
+                             compute_chunk: Callable[[list], np.ndarray], workers: Optional[int] = None,
+                             chunk_size: int = 20_000) -> bool:
+    """
+    Calcule et persiste les empreintes des structures distinctes absentes du store
+
+    Les SMILES sont canonisés (update_smiles_map) : deux écritures d'une
+    même molécule partagent une seule ligne. La matrice puis les clés sont
+    remplacées atomiquement ; un lecteur qui les trouverait désaccordées
+    ignore le store jusqu'à la fin de l'écriture.
+
+    Returns:
+        True si le fichier a été réécrit
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow requis pour persister les empreintes")
+
+    smiles = pd.Series(smiles, dtype='string')
+    update_smiles_map(smiles, workers=workers, chunk_size=chunk_size)
+    canonical = canonicalize_smiles(smiles).dropna()
+    distinct = pd.Series(pd.unique(canonical), dtype='string')
+    missing = distinct[~distinct.isin(store.smiles)].tolist()
+    print(f"🔗 Empreintes {words_path.stem}: {len(distinct):,} structures distinctes, {len(missing):,} à calculer")
+    if not missing:
+        return False
+
+    computed = compute_fingerprints(missing, workers, chunk_size, compute_chunk)
+    words = np.concatenate([np.asarray(store.words), computed])
+    keys = pa.table({'canonical_smiles': pa.array(list(store.smiles) + missing, type=pa.string())})
+
+    words_path.parent.mkdir(parents=True, exist_ok=True)
+    # np.save ajoute .npy aux noms qui n'en ont pas : suffixe temporaire placé avant
+    tmp_words = words_path.with_name(words_path.stem + ".tmp.npy")
+    tmp_keys = keys_path.with_suffix(".parquet.tmp")
+    np.save(tmp_words, words)
+    pq.write_table(keys, tmp_keys)
+    os.replace(tmp_words, words_path)
+    os.replace(tmp_keys, keys_path)
+    print(f"✅ Store d'empreintes: {len(words):,} structures ({words_path})")
+    return True
+
+
+@fingerprint_cache(paths=(str(FINGERPRINTS_PATH), str(FINGERPRINT_KEYS_PATH)), maxsize=1, copy=False)
+def load_fingerprint_store() -> FingerprintStore:
+    """Store des empreintes Morgan (vide s'il n'existe pas encore)"""
+    return read_fingerprint_store(FINGERPRINTS_PATH, FINGERPRINT_KEYS_PATH, FINGERPRINT_WORDS, _compute_chunk)
+
+
+def update_fingerprint_store(smiles: Iterable[str], workers: Optional[int] = None,
+                             chunk_size: int = 20_000) -> FingerprintStore:
+    """Ajoute au store Morgan les empreintes des structures qui n'y sont pas encore"""
+    if extend_fingerprint_store(load_fingerprint_store(), smiles, FINGERPRINTS_PATH, FINGERPRINT_KEYS_PATH,
+                                _compute_chunk, workers, chunk_size):
+        load_fingerprint_store.clear()
+    return load_fingerprint_store()
+
+
+def tanimoto_scores(query: np.ndarray, words: np.ndarray, bit_counts: np.ndarray,
+                    workers: Optional[int] = None) -> np.ndarray:
+    """
+    Similarité de Tanimoto de l'empreinte query à chaque ligne de words
+
+    |A ∩ B| / (|A| + |B| - |A ∩ B|) : un ET et un comptage de bits par mot,
+    par blocs de BLOCK_ROWS lignes. Les blocs sont répartis sur des threads
+    (NumPy libère le GIL sur ces opérations).
+    """
+    query = np.asarray(query, dtype='<u8')
+    query_bits = int(popcount(query).sum())
+    scores = np.empty(len(words), dtype=np.float32)
+
+    def score_block(start: int):
+        block = np.asarray(words[start:start + BLOCK_ROWS])
+        common = _row_popcounts(block & query)
+        union = bit_counts[start:start + len(block)] + query_bits - common
+        # Union vide (deux empreintes nulles) : intersection nulle aussi, score 0
+        np.divide(common, np.maximum(union, 1), out=scores[start:start + len(block)], casting='unsafe')
+
+    starts = range(0, len(words), BLOCK_ROWS)
+    workers = min(workers or os.cpu_count() or 1, len(starts))
+    if workers <= 1:
+        for start in starts:
+            score_block(start)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(score_block, starts))
+    return scores
+
+
+class StoreRows:
+    """
+    Positions des composés du dépôt pour chaque ligne d'un store
+    d'empreintes, regroupées au format CSR comme les noms de ExactNameIndex
+
+    Le SMILES de chaque composé est ramené à sa forme canonique (clé du
+    store) par le map de mega_descriptors.
+    """
+
+    def __init__(self, store_smiles: pd.Index, smiles: Optional[pd.Series]):
+        self._smiles = smiles
+        if smiles is None or len(store_smiles) == 0:
+            codes = np.full(0 if smiles is None else len(smiles), -1, dtype=np.int64)
+        else:
+            row_codes, uniques = pd.factorize(canonicalize_smiles(smiles).reset_index(drop=True))
+            positions = store_smiles.get_indexer(pd.Index(uniques, dtype='string'))
+            codes = np.append(positions, -1)[row_codes]
+        found = np.flatnonzero(codes >= 0)
+        # Composés par ligne du store (0 : empreinte sans composé dans le dépôt)
+        self.sizes = np.bincount(codes[found], minlength=len(store_smiles))
+        self._offsets = np.r_[0, np.cumsum(self.sizes)]
+        self._rows = found[np.argsort(codes[found], kind='stable')]
+        self.covered = len(found)
+
+    def rows_of(self, store_ids: np.ndarray) -> np.ndarray:
+        """Positions des composés des lignes du store demandées, concaténées dans cet ordre"""
+        sizes = self.sizes[store_ids]
+        shifts = self._offsets[store_ids] - (np.cumsum(sizes) - sizes)
+        return self._rows[np.repeat(shifts, sizes) + np.arange(sizes.sum())]
+
+    def smiles_of(self, row: int) -> Optional[str]:
+        if self._smiles is None or pd.isna(self._smiles.iloc[row]):
+            return None
+        return str(self._smiles.iloc[row])
+
+
+class SimilarityIndex:
+    """
+    Recherche des composés les plus proches structurellement
+
+    Le balayage porte sur les empreintes distinctes du store, puis les
+    meilleures sont ramenées aux positions de leurs composés.
+    """
+
+    def __init__(self, store: FingerprintStore, smiles: Optional[pd.Series]):
+        self.store = store
+        self.rows = StoreRows(store.smiles, smiles)
+        store.bit_counts  # calculés dès la construction de l'index, pas à la première recherche
+
+    @property
+    def available(self) -> bool:
+        return self.rows.covered > 0
+
+    def smiles_of(self, row: int) -> Optional[str]:
+        return self.rows.smiles_of(row)
+
+    def search(self, smiles: str, k: int = 10, min_similarity: float = 0.0,
+               exclude_rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (positions, similarités) des k composés les plus proches, similarité décroissante
+
+        Args:
+            smiles: Structure de référence
+            k: Nombre de voisins retournés
+            min_similarity: Similarité de Tanimoto minimale
+            exclude_rows: Positions à écarter (ex: la molécule de référence)
+        """
+        query = self.store.fingerprint(smiles) if smiles else None
+        if query is None or not self.available or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = tanimoto_scores(query, self.store.words, self.store.bit_counts)
+        # Empreintes sans composé dans le dépôt : jamais retenues
+        scores[self.rows.sizes == 0] = np.nan
+        scores[scores < min_similarity] = np.nan
+        excluded = 0 if exclude_rows is None else len(exclude_rows)
+
+        # Toutes les lignes d'une empreinte ont le même score : k empreintes (+ exclusions) suffisent
+        best = top_k(scores, k + excluded)
+        best = best[~np.isnan(scores[best])]
+        rows = self.rows.rows_of(best)
+        row_scores = np.repeat(scores[best], self.rows.sizes[best])
+        if exclude_rows is not None:
+            kept = ~np.isin(rows, exclude_rows)
+            rows, row_scores = rows[kept], row_scores[kept]
+        return rows[:k].astype(np.int64), row_scores[:k]
+
+
+def compound_smiles(repository) -> Optional[pd.Series]:
+    """SMILES de chaque composé du dépôt (table brute MEGA ou colonne smiles), None si absents"""
+    raw = repository.raw_compounds
+    if raw is not None and 'SMILES' in raw.columns and len(raw) == len(repository.compounds):
+        return raw['SMILES']
+    for column in ('smiles', 'SMILES'):
+        if column in repository.compounds.columns:
+            return repository.compounds[column]
+    return None
+
+
+def get_similarity_index(repository=None) -> SimilarityIndex:
+    """
+    Index de similarité du dépôt MEGA sur le store d'empreintes actuel
+
+    Reconstruit une fois par version des données et par taille du store :
+    tant que le store est en cours de calcul, l'index porte sur les
+    structures déjà persistées (aucune si le store n'existe pas encore).
+    """
+    if repository is None:
+        from mega_data_repository import get_mega_repository
+        repository = get_mega_repository()
+    store = load_fingerprint_store()
+    return repository.view(('similarity_index', len(store)),
+                           lambda repo: SimilarityIndex(store, compound_smiles(repo)))
+
+
+def similar_rows(name: str, k: int = 10, min_similarity: float = 0.0,
+                 repository=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (positions, similarités) des composés structurellement proches du composé
+    nommé, lui-même exclu ; partagé entre sessions par le cache de requêtes
+    """
+    if repository is None:
+        from mega_data_repository import get_mega_repository
+        repository = get_mega_repository()
+
+    def compute():
+        from mega_fuzzy_search import get_exact_index
+
+        index = get_similarity_index(repository)
+        own_rows = get_exact_index(repository).lookup(name)
+        if len(own_rows) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return index.search(index.smiles_of(own_rows[0]), k, min_similarity, exclude_rows=own_rows)
+
+    # Taille du store dans la clé : les résultats s'enrichissent à mesure qu'il se complète
+    key = ('similar_rows', name, k, min_similarity, repository.generation, len(load_fingerprint_store()))
+    return get_query_cache().get_or_compute(key, compute)
+
+
+if __name__ == "__main__":
+    import time
+
+    started = time.time()
+    raw = load_mega_columnar(columns=['SMILES'], csv_path=MEGA_CSV_PATH)
+    store = update_fingerprint_store(raw['SMILES'])
+    print(f"🔗 {len(store):,} empreintes en {time.time() - started:.1f}s")
+
+    if len(store):
+        started = time.time()
+        scores = tanimoto_scores(store.words[0], store.words, store.bit_counts)
+        print(f"   Tanimoto contre {len(scores):,} empreintes: {(time.time() - started) * 1000:.1f} ms")
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+🧠 PhytoAI - Moteurs de Recherche par Mode (Exact / Partiel / Intelligent)
+- Exact : table de hachage des noms normalisés
+- Partiel : index trigrammes (sous-chaîne)
+- Intelligent : distance d'édition bornée sur les seuls candidats retenus
+  par le filtre q-grammes, examinés du plus prometteur au moins prometteur
+- Sous-structure : délégué à mega_substructure (motif SMILES/SMARTS)
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mega_cache import get_query_cache
+from mega_search_index import TrigramIndex, get_name_index, normalize_name
+
+try:
+    import Levenshtein
+    LEVENSHTEIN_AVAILABLE = True
+except ImportError:
+    LEVENSHTEIN_AVAILABLE = False
+
+SEARCH_MODES = ("Exact", "Partiel", "Intelligent")
+# Délégué à mega_substructure (RDKit), importé seulement pour ce mode
+SUBSTRUCTURE_MODE = "Sous-structure"
+MAX_EDIT_DISTANCE = 3
+
+
+def _levenshtein_numpy(term: str, names: List[str]) -> np.ndarray:
+    """Distances d'édition de term à chaque nom, calculées en parallèle sur tous les noms"""
+    width = max(map(len, names), default=0)
+    codes = np.frombuffer(''.join(name.ljust(width, '\x00') for name in names).encode('utf-32-le'),
+                          dtype=np.uint32).reshape(len(names), width)
+    lengths = np.fromiter(map(len, names), dtype=np.int64, count=len(names))
+
+    # Programmation dynamique ligne par ligne (caractères du terme), vectorisée sur les noms
+    previous = np.tile(np.arange(width + 1, dtype=np.int32), (len(names), 1))
+    for i, char in enumerate(term, 1):
+        substitution = previous[:, :-1] + (codes != ord(char))
+        current = np.empty_like(previous)
+        current[:, 0] = i
+        current[:, 1:] = np.minimum(previous[:, 1:] + 1, substitution)
+        for j in range(1, width + 1):
+            np.minimum(current[:, j], current[:, j - 1] + 1, out=current[:, j])
+        previous = current
+    return previous[np.arange(len(names)), lengths]
+
+
+def levenshtein_distances(term: str, names: List[str], max_distance: int) -> np.ndarray:
+    """Distances d'édition bornées (max_distance + 1 au-delà) de term à chaque nom"""
+    if not names:
+        return np.empty(0, dtype=np.int32)
+    if LEVENSHTEIN_AVAILABLE:
+        return np.array([Levenshtein.distance(term, name, score_cutoff=max_distance) for name in names],
+                        dtype=np.int32)
+    return np.minimum(_levenshtein_numpy(term, names), max_distance + 1)
+
+
+def default_max_distance(term: str) -> int:
+    """Tolérance selon la longueur : 1 faute jusqu'à 7 caractères, puis 1 par 4 caractères"""
+    return max(1, min(MAX_EDIT_DISTANCE, len(term) // 4))
+
+
+class ExactNameIndex:
+    """
+    Nom normalisé → positions, via la table de hachage des noms distincts
+
+    Les noms sont factorisés (un identifiant par nom distinct) ; les
+    positions de chaque nom sont regroupées au format CSR.
+    """
+
+    def __init__(self, normalized_names: pd.Series):
+        codes, uniques = pd.factorize(normalized_names)
+        self.uniques = pd.Index(uniques)
+        # Table de hachage construite dès maintenant plutôt qu'à la première recherche
+        self.uniques.get_indexer([''])
+        self._sizes = np.bincount(codes, minlength=len(uniques))
+        self._offsets = np.r_[0, np.cumsum(self._sizes)]
+        # Tri stable : positions croissantes pour chaque nom
+        self._rows = np.argsort(codes, kind='stable').astype(np.int32)
+
+    @property
+    def first_rows(self) -> np.ndarray:
+        """Première position de chaque nom distinct"""
+        return self._rows[self._offsets[:-1]]
+
+    def rows_of(self, name_ids: np.ndarray) -> np.ndarray:
+        """Positions de tous les noms demandés, concaténées"""
+        sizes = self._sizes[name_ids]
+        shifts = self._offsets[name_ids] - (np.cumsum(sizes) - sizes)
+        return self._rows[np.repeat(shifts, sizes) + np.arange(sizes.sum())]
+
+    def lookup(self, name: str) -> np.ndarray:
+        name_id = self.uniques.get_indexer([normalize_name(name)])[0]
+        if name_id < 0:
+            return np.empty(0, dtype=np.int32)
+        return self._rows[self._offsets[name_id]:self._offsets[name_id + 1]]
+
+
+class FuzzyNameMatcher:
+    """
+    Recherche approchée sur les noms distincts d'un TrigramIndex
+
+    Filtre q-grammes : une édition détruit au plus 3 trigrammes, donc un nom
+    à distance d du terme partage au moins (trigrammes du terme - 3d)
+    trigrammes distincts. Les candidats sont vérifiés par nombre de
+    trigrammes partagés décroissant ; la recherche s'arrête dès que les
+    candidats restants ne peuvent plus battre les résultats déjà trouvés.
+    Les noms ne partageant aucun trigramme avec le terme sont ignorés.
+    """
+
+    def __init__(self, index: TrigramIndex, exact: ExactNameIndex):
+        self._index = index
+        self._exact = exact
+        self._first_rows = exact.first_rows
+        self._lengths = exact.uniques.str.len().to_numpy(dtype=np.int32)
+
+    def search(self, term: str, limit: Optional[int] = 100,
+               max_distance: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (positions, distances) des noms les plus proches, distance croissante
+
+        Args:
+            term: Terme saisi (fautes de frappe, accents, terminaisons FR...)
+            limit: Nombre max de résultats (tous les noms assez proches si None)
+            max_distance: Distance d'édition max (selon la longueur si None)
+        """
+        needle = normalize_name(term)
+        if not needle or (limit is not None and limit <= 0):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+        if max_distance is None:
+            max_distance = default_max_distance(needle)
+
+        n_codes, shared = self._index.shared_trigrams(needle)
+        # Un nom distinct partage autant de trigrammes sur toutes ses lignes
+        shared = shared[self._first_rows]
+        candidate_mask = np.abs(self._lengths - len(needle)) <= max_distance
+        if n_codes:
+            candidate_mask &= shared >= max(1, n_codes - 3 * max_distance)
+        name_ids = np.flatnonzero(candidate_mask)
+        counts = shared[name_ids]
+        distances = np.full(len(name_ids), max_distance + 1, dtype=np.int32)
+        sizes = self._exact._sizes[name_ids]
+
+        for count in np.unique(counts)[::-1]:
+            # Distance minimale possible des candidats de ce niveau et des suivants
+            bound = math.ceil((n_codes - count) / 3)
+            if limit is not None and sizes[distances < bound].sum() >= limit:
+                break
+            level = np.flatnonzero(counts == count)
+            names = self._exact.uniques.take(name_ids[level]).tolist()
+            distances[level] = levenshtein_distances(needle, names, max_distance)
+
+        matched = distances <= max_distance
+        rows = self._exact.rows_of(name_ids[matched])
+        row_distances = np.repeat(distances[matched], sizes[matched])
+        order = np.lexsort((rows, row_distances))[:limit]
+        return rows[order].astype(np.int64), row_distances[order]
+
+
+def get_exact_index(repository=None) -> ExactNameIndex:
+    """Table de hachage des noms du dépôt MEGA (une fois par version des données)"""
+    if repository is None:
+        from mega_data_repository import get_mega_repository
+        repository = get_mega_repository()
+    return repository.view(('exact_index',), lambda repo: ExactNameIndex(get_name_index(repo).names))
+
+
+def get_fuzzy_matcher(repository=None) -> FuzzyNameMatcher:
+    """Moteur de recherche approchée du dépôt MEGA (une fois par version des données)"""
+    if repository is None:
+        from mega_data_repository import get_mega_repository
+        repository = get_mega_repository()
+    return repository.view(('fuzzy_matcher',),
+                           lambda repo: FuzzyNameMatcher(get_name_index(repo), get_exact_index(repo)))
+
+
+def search_rows(term: str, mode: str = "Partiel", limit: Optional[int] = None, repository=None) -> np.ndarray:
+    """
+    Positions des composés du dépôt MEGA correspondant au terme selon le mode
+
+    - Exact : nom identique (casse ignorée)
+    - Partiel : nom contenant le terme
+    - Intelligent : noms les plus proches, distance croissante
+    - Sous-structure : structures contenant le motif SMILES/SMARTS saisi
+
+    Résultats partagés entre sessions par le cache de requêtes, sur le terme
+    normalisé et la version des données.
+    """
+    if repository is None:
+        from mega_data_repository import get_mega_repository
+        repository = get_mega_repository()
+
+    if mode == SUBSTRUCTURE_MODE:
+        from mega_substructure import substructure_rows
+        return substructure_rows(term, limit, repository)
+    if mode == "Intelligent":
+        return _fuzzy_search(term, limit, repository)[0]
+    key = ('search_rows', normalize_name(term), mode, limit, repository.generation)
+    if mode == "Exact":
+        return get_query_cache().get_or_compute(key, lambda: get_exact_index(repository).lookup(term)[:limit])
+    return get_query_cache().get_or_compute(key, lambda: get_name_index(repository).search(term, limit))
+
+
+def _fuzzy_search(term: str, limit: Optional[int], repository) -> Tuple[np.ndarray, np.ndarray]:
+    key = ('fuzzy_search', normalize_name(term), limit, repository.generation)
+    return get_query_cache().get_or_compute(key, lambda: get_fuzzy_matcher(repository).search(term, limit))
+
+
+def search_by_mode(term: str, mode: str = "Partiel", limit: int = 100, repository=None) -> pd.DataFrame:
+    """Composés du dépôt MEGA correspondant au terme (voir search_rows) ; distance ajoutée en mode Intelligent"""
+    if repository is None:
+        from mega_data_repository import get_mega_repository
+        repository = get_mega_repository()
+    compounds = repository.compounds
+
+    if mode == "Intelligent":
+        rows, distances = _fuzzy_search(term, limit, repository)
+        return compounds.iloc[rows].assign(edit_distance=distances)
+    return compounds.iloc[search_rows(term, mode, limit, repository)]
+
+
+if __name__ == "__main__":
+    import time
+
+    from mega_data_repository import get_mega_repository
+
+    repository = get_mega_repository()
+    get_fuzzy_matcher(repository)
+    get_exact_index(repository)
+    for term in ('curcumine', 'quercétine', 'resveratrol', 'Curcumin'):
+        for mode in SEARCH_MODES:
+            started = time.time()
+            results = search_by_mode(term, mode, 5, repository)
+            print(f"🧠 {mode:<11} '{term}': {results['name'].tolist()} "
+                  f"({(time.time() - started) * 1000:.1f} ms)")
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+🤗 PhytoAI - Chargeur Hugging Face / Arrow par Lots
+Lots Arrow produits par un thread d'arrière-plan dans une file bornée,
+convertis colonne par colonne (aucun dict par ligne) ; les premiers lots
+sont utilisables pendant que la suite arrive
+"""
+
+import importlib.util
+import threading
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+import pandas as pd
+
+from mega_json_stream import prefetch
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+def _parquet_shards(path: Path, split: str) -> List[Path]:
+    """Shards Parquet d'un split (convention HF : train-00000-of-00003.parquet, data/train/...)"""
+    if path.is_file():
+        return [path]
+    shards = sorted(path.rglob('*.parquet')) if path.is_dir() else sorted(path.parent.glob(path.name))
+    # Split absent → aucun shard (DataFrame vide), jamais les shards des autres splits
+    return [shard for shard in shards if shard.name.startswith(split) or split in shard.parts]
+
+
+def datasets_available() -> bool:
+    """Package 'datasets' installé (un dossier local 'datasets/' n'est qu'un package namespace)"""
+    spec = importlib.util.find_spec('datasets')
+    return spec is not None and spec.origin is not None
+
+
+def _is_parquet_source(path: Path) -> bool:
+    if path.suffix == '.parquet' or any(char in path.name for char in '*?['):
+        return True
+    return path.is_dir() and not (path / 'dataset_dict.json').exists() \
+        and not (path / 'dataset_info.json').exists() and any(path.rglob('*.parquet'))
+
+
+def _iter_parquet_batches(shards: List[Path], batch_size: int,
+                          columns: Optional[List[str]]) -> Iterator['pa.RecordBatch']:
+    for shard in shards:
+        parquet_file = pq.ParquetFile(shard, memory_map=True)
+        yield from parquet_file.iter_batches(batch_size=batch_size, columns=columns)
+
+
+def _iter_dataset_batches(dataset, batch_size: int, columns: Optional[List[str]]) -> Iterator:
+    """Lots d'un Dataset / IterableDataset HF, au format Arrow si possible"""
+    if columns is not None:
+        dataset = dataset.select_columns(columns)
+    # Mode choisi sur le premier lot, avant de rien produire : une erreur en cours
+    # de flux remonte telle quelle au lieu de relire (et dupliquer) les premiers lots
+    try:
+        batches = iter(dataset.with_format('arrow').iter(batch_size=batch_size))
+        first = next(batches, None)
+    except (AttributeError, ValueError, TypeError, NotImplementedError):
+        # Anciennes versions de datasets : lots dict-de-listes (déjà colonnaires)
+        batches = (pa.Table.from_pydict(batch) if PYARROW_AVAILABLE else pd.DataFrame(batch)
+                   for batch in dataset.iter(batch_size=batch_size))
+        first = next(batches, None)
+    if first is None:
+        return
+    yield first
+    yield from batches
+
+
+def iter_arrow_batches(source: str, split: str = 'train', batch_size: int = 50_000,
+                       columns: Optional[List[str]] = None,
+                       max_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lots pandas depuis une source Hugging Face ou Arrow
+
+    Args:
+        source: Nom de dataset sur le Hub (streaming), dossier load_from_disk,
+                fichier/dossier/glob de shards Parquet (test hors ligne)
+        split: Split à lire
+        batch_size: Lignes par lot
+        columns: Projection de colonnes (toutes si None)
+        max_rows: Arrêt après ce nombre de lignes
+
+    Yields:
+        DataFrames convertis depuis Arrow, colonne par colonne
+    """
+    path = Path(source)
+
+    if _is_parquet_source(path):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow requis pour lire des shards Parquet")
+        batches = _iter_parquet_batches(_parquet_shards(path, split), batch_size, columns)
+    elif path.exists():
+        from datasets import load_from_disk
+        dataset = load_from_disk(str(path))
+        if hasattr(dataset, 'keys'):
+            dataset = dataset[split]
+        batches = _iter_dataset_batches(dataset, batch_size, columns)
+    else:
+        from datasets import load_dataset
+        dataset = load_dataset(source, split=split, streaming=True, trust_remote_code=True)
+        batches = _iter_dataset_batches(dataset, batch_size, columns)
+
+    remaining = max_rows
+    for batch in batches:
+        if remaining is not None and remaining <= 0:
+            return
+        if isinstance(batch, pd.DataFrame):
+            df = batch
+        else:
+            # Troncature côté Arrow, avant toute conversion
+            if remaining is not None and batch.num_rows > remaining:
+                batch = batch.slice(0, remaining)
+            df = batch.to_pandas()
+        if remaining is not None:
+            df = df.iloc[:remaining]
+            remaining -= len(df)
+        yield df
+
+
+def stream_hf_batches(source: str, split: str = 'train', batch_size: int = 50_000,
+                      columns: Optional[List[str]] = None, max_rows: Optional[int] = None,
+                      depth: int = 2) -> Iterator[pd.DataFrame]:
+    """iter_arrow_batches avec téléchargement/décodage dans un thread producteur (file bornée)"""
+    return prefetch(iter_arrow_batches(source, split, batch_size, columns, max_rows), depth=depth)
+
+
+def load_hf_dataframe(source: str, split: str = 'train', batch_size: int = 50_000,
+                      columns: Optional[List[str]] = None,
+                      max_rows: Optional[int] = None) -> pd.DataFrame:
+    """Charge un split complet (ou max_rows lignes) en un DataFrame, lot par lot"""
+    parts = list(stream_hf_batches(source, split, batch_size, columns, max_rows))
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+
+class StreamingTable:
+    """
+    Table alimentée en arrière-plan, consultable pendant le chargement
+
+    frame() retourne les lignes déjà reçues ; on_complete est appelé avec
+    la table finale une fois le flux terminé.
+    """
+
+    def __init__(self, batches: Iterator[pd.DataFrame],
+                 on_complete: Optional[Callable[[pd.DataFrame], None]] = None):
+        self._batches = batches
+        self._on_complete = on_complete
+        self._parts = []
+        self._frame = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self.done = False
+        self.error = None
+
+    def start(self) -> 'StreamingTable':
+        self._thread = threading.Thread(target=self._consume, name="phytoai-hf-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def _consume(self):
+        try:
+            for batch in self._batches:
+                with self._cond:
+                    self._parts.append(batch)
+                    self._frame = None
+                    self._cond.notify_all()
+        except Exception as e:
+            self.error = e
+            print(f"⚠️ Flux Hugging Face interrompu: {e}")
+        finally:
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+        if self._on_complete is not None and self.error is None:
+            self._on_complete(self.frame())
+
+    @property
+    def rows_loaded(self) -> int:
+        with self._cond:
+            return sum(len(part) for part in self._parts)
+
+    def frame(self) -> pd.DataFrame:
+        """Lignes reçues jusqu'ici (concaténation mémorisée entre deux lots)"""
+        with self._cond:
+            if self._frame is None:
+                if not self._parts:
+                    self._frame = pd.DataFrame()
+                elif len(self._parts) == 1:
+                    self._frame = self._parts[0]
+                else:
+                    self._frame = pd.concat(self._parts, ignore_index=True)
+            return self._frame
+
+    def wait(self, min_rows: int = 1, timeout: Optional[float] = None) -> bool:
+        """Attend au moins min_rows lignes (ou la fin du flux) ; True si atteint"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self.done or sum(len(part) for part in self._parts) >= min_rows, timeout
+            )
+            return sum(len(part) for part in self._parts) >= min_rows
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+🌊 PhytoAI - Lecteur JSON MEGA en Streaming
+Parcours incrémental des tableaux `compounds` / `bioactivities` des gros
+fichiers JSON MEGA, émis par lots colonnaires de taille fixe
+"""
+
+import json
+import queue
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import pandas as pd
+
+# Clés habituelles des tableaux de composés (ordre de préférence)
+COMPOUND_KEYS = ('compounds', 'data', 'molecules', 'phytochemicals')
+
+# Clé émise pour un fichier dont la racine est directement un tableau
+TOP_LEVEL = None
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _JsonStreamScanner:
+    """Scanner JSON incrémental : ne garde en mémoire qu'une fenêtre du fichier"""
+
+    def __init__(self, f, chunk_size: int = 1 << 20):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Lit un bloc supplémentaire ; retourne False en fin de fichier"""
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # Libère la partie déjà consommée pour garder une fenêtre bornée
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Prochain caractère significatif ('' en fin de fichier)"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON invalide : '{char}' attendu, '{found}' trouvé")
+        self._pos += 1
+
+    def decode_value(self):
+        """Décode la valeur suivante, en relisant tant qu'elle est tronquée"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # Un nombre en fin de fenêtre peut se poursuivre dans le bloc suivant
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def iter_array(self) -> Iterator:
+        """Itère les éléments du tableau courant, un à la fois"""
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.decode_value()
+            separator = self.peek()
+            self._pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"JSON invalide : ',' ou ']' attendu, '{separator}' trouvé")
+
+
+def iter_json_records(path: str, keys: Optional[Iterable[str]] = ('compounds',),
+                      chunk_size: int = 1 << 20) -> Iterator[Tuple[Optional[str], dict]]:
+    """
+    Itère les enregistrements des tableaux de premier niveau d'un fichier JSON
+
+    Args:
+        path: Fichier JSON ({"compounds": [...], ...} ou tableau racine)
+        keys: Clés des tableaux à émettre (None = tous les tableaux)
+        chunk_size: Taille des blocs lus sur disque
+
+    Yields:
+        (clé, enregistrement) — clé = TOP_LEVEL pour un tableau racine.
+        Les tableaux non demandés sont parcourus sans être conservés.
+    """
+    wanted = None if keys is None else set(keys)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        scanner = _JsonStreamScanner(f, chunk_size)
+        first = scanner.peek()
+
+        if first == '[':
+            for record in scanner.iter_array():
+                yield TOP_LEVEL, record
+            return
+
+        scanner.expect('{')
+        if scanner.peek() == '}':
+            return
+        while True:
+            key = scanner.decode_value()
+            scanner.expect(':')
+
+            if scanner.peek() == '[':
+                keep = wanted is None or key in wanted
+                for record in scanner.iter_array():
+                    if keep:
+                        yield key, record
+            else:
+                # Métadonnées et scalaires : petits, décodés puis ignorés
+                scanner.decode_value()
+
+            separator = scanner.peek()
+            scanner.expect(separator)
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"JSON invalide : ',' ou '}}' attendu, '{separator}' trouvé")
+
+
+def iter_json_batches(path: str, keys: Optional[Iterable[str]] = ('compounds',),
+                      batch_size: int = 50_000) -> Iterator[Tuple[Optional[str], pd.DataFrame]]:
+    """
+    Lots colonnaires de taille fixe depuis un fichier JSON MEGA
+
+    Seul le lot en cours existe sous forme d'objets Python : le plafond
+    mémoire est fixé par batch_size, pas par la taille du fichier.
+    """
+    current_key = None
+    batch = []
+
+    for key, record in iter_json_records(path, keys):
+        if batch and key != current_key:
+            yield current_key, pd.DataFrame.from_records(batch)
+            batch = []
+        current_key = key
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield current_key, pd.DataFrame.from_records(batch)
+            batch = []
+
+    if batch:
+        yield current_key, pd.DataFrame.from_records(batch)
+
+
+def prefetch(iterator: Iterable, depth: int = 2) -> Iterator:
+    """
+    Produit les éléments d'un itérateur depuis un thread d'arrière-plan
+
+    La file bornée (depth) limite la mémoire tout en laissant le parsing
+    avancer pendant que l'appelant traite le lot précédent.
+    """
+    items = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+    errors = []
+
+    def producer():
+        try:
+            for item in iterator:
+                while not stop.is_set():
+                    try:
+                        items.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            while not stop.is_set():
+                try:
+                    items.put(done, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    thread = threading.Thread(target=producer, name="phytoai-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
+        thread.join(timeout=1)
+
+    if errors:
+        raise errors[0]
+
+
+def load_json_tables(path: str, keys: Iterable[str] = ('compounds', 'bioactivities'),
+                     batch_size: int = 50_000) -> Dict[Optional[str], pd.DataFrame]:
+    """Charge les tableaux demandés en DataFrames, lot par lot, en une passe"""
+    batches = {}
+    for key, batch in prefetch(iter_json_batches(path, keys, batch_size)):
+        batches.setdefault(key, []).append(batch)
+
+    return {
+        key: pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        for key, parts in batches.items()
+    }
+
+
+def load_compounds_table(path: str, preferred_keys: Iterable[str] = COMPOUND_KEYS,
+                         batch_size: int = 50_000) -> Tuple[Optional[str], pd.DataFrame]:
+    """
+    Charge le tableau de composés d'un fichier JSON MEGA
+
+    Retourne (clé utilisée, DataFrame). Si aucune clé connue n'est trouvée,
+    le premier tableau du fichier est utilisé ; (None, DataFrame vide) sinon.
+    """
+    preferred_keys = tuple(preferred_keys)
+    tables = load_json_tables(path, preferred_keys + (TOP_LEVEL,), batch_size)
+
+    if TOP_LEVEL in tables:
+        return TOP_LEVEL, tables[TOP_LEVEL]
+    for key in preferred_keys:
+        if key in tables:
+            return key, tables[key]
+
+    # Dernier recours : premier tableau rencontré, arrêt dès le suivant
+    first_key = None
+    parts = []
+    for key, batch in iter_json_batches(path, keys=None, batch_size=batch_size):
+        if first_key is not None and key != first_key:
+            break
+        first_key = key
+        parts.append(batch)
+
+    if parts:
+        return first_key, pd.concat(parts, ignore_index=True)
+    return None, pd.DataFrame()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+📄 PhytoAI - Pagination par Curseur des Résultats
+Une page = les seules lignes affichées, le total et un curseur opaque vers
+la page suivante. Les requêtes du moteur de filtres reprennent après la
+dernière clé (bioactivité, position) vue : le coût d'une page ne dépend ni
+de sa profondeur ni du nombre de composés correspondants
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZE = 20
+
+
+class Page:
+    """
+    Page de résultats
+
+    - items : lignes de la page seulement
+    - total : nombre total de résultats de la requête
+    - start : rang (0-based) du premier élément de la page
+    - cursor / next_cursor : curseurs de cette page et de la suivante (None en fin)
+    """
+
+    def __init__(self, items: pd.DataFrame, total: int, page_size: int, start: int = 0,
+                 cursor: Optional[str] = None, next_cursor: Optional[str] = None):
+        self.items = items
+        self.total = total
+        self.page_size = page_size
+        self.start = start
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def number(self) -> int:
+        return self.start // self.page_size + 1 if self.page_size else 1
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-self.total // self.page_size)) if self.page_size else 1
+
+
+def keyset_cursor(generation: int, start: int, rank: float, row: int) -> str:
+    """Curseur après la ligne (rank, row) d'une version donnée du dépôt"""
+    return f"k:{generation}:{start}:{float(rank)!r}:{int(row)}"
+
+
+def offset_cursor(start: int) -> str:
+    """Curseur par décalage, pour les petits résultats déjà en mémoire"""
+    return f"o:{start}"
+
+
+def parse_keyset_cursor(cursor: Optional[str], generation: int) -> Tuple[int, Optional[Tuple[float, int]]]:
+    """
+    (rang de départ, clé après laquelle reprendre) ; première page si le
+    curseur est absent, invalide ou issu d'une autre version des données
+    (les positions de lignes n'y ont plus le même sens)
+    """
+    try:
+        kind, cursor_generation, start, rank, row = cursor.split(':')
+        if kind == 'k' and int(cursor_generation) == generation:
+            return int(start), (float(rank), int(row))
+    except (AttributeError, ValueError):
+        pass
+    return 0, None
+
+
+def paginate_query(engine, generation: int, ranges=None, categories=None, within: Optional[np.ndarray] = None,
+                   cursor: Optional[str] = None, page_size: int = PAGE_SIZE) -> Tuple[np.ndarray, int, int, Optional[str]]:
+    """
+    Une page d'une requête du moteur de filtres (voir mega_filter_engine)
+
+    Returns:
+        (positions de la page, total filtré, rang de départ, curseur suivant)
+    """
+    start, after = parse_keyset_cursor(cursor, generation)
+    rows, total = engine.query(ranges, categories, within=within, limit=page_size, after=after)
+    next_cursor = None
+    if len(rows) > 0 and start + len(rows) < total:
+        next_cursor = keyset_cursor(generation, start + len(rows), *engine.key(rows[-1]))
+    return rows, total, start, next_cursor
+
+
+def paginate_frame(df: pd.DataFrame, cursor: Optional[str] = None, page_size: int = PAGE_SIZE) -> Page:
+    """Page d'un DataFrame déjà en mémoire (curseur par décalage)"""
+    try:
+        kind, start = cursor.split(':')
+        start = int(start) if kind == 'o' else 0
+    except (AttributeError, ValueError):
+        start = 0
+    if start >= len(df):
+        start = 0
+    end = start + page_size
+    return Page(df.iloc[start:end], len(df), page_size, start, cursor,
+                offset_cursor(end) if end < len(df) else None)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+⌨️ PhytoAI - Index de Préfixes pour l'Autocomplétion
+Tableau trié des noms normalisés (et synonymes) interrogé par recherche
+dichotomique ; les meilleures complétions par score de bioactivité des
+préfixes fréquents sont précalculées pour répondre en moins d'une milliseconde
+"""
+
+from bisect import bisect_left
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from mega_search_index import normalize_name
+from mega_topk import top_k
+from mega_text_normalization import NORMALIZED_NAME_COLUMN, normalize_series
+
+# Plus grand point de code : borne supérieure de toutes les clés d'un préfixe
+_PREFIX_END = '\U0010ffff'
+# Au-delà de cette taille de plage, les meilleures complétions sont précalculées
+_SCAN_LIMIT = 2048
+_MAX_PRECOMPUTED_DEPTH = 8
+_TOP_SIZE = 50
+
+
+def _split_synonyms(value) -> List[str]:
+    if isinstance(value, str):
+        return [part.strip() for part in value.split('|') if part.strip()]
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [str(part) for part in value if part]
+    return []
+
+
+class PrefixIndex:
+    """
+    Index de complétion : clés triées (noms et synonymes) → position de ligne
+
+    - _keys : clés normalisées triées (liste Python pour bisect)
+    - _rows : position de la ligne de chaque clé (int32)
+    - _top : préfixe → positions des meilleures lignes, pour les plages
+             trop grandes pour être parcourues à chaque frappe
+    """
+
+    def __init__(self, names: pd.Series, scores: pd.Series, synonyms: Optional[pd.Series] = None,
+                 normalized_names: Optional[pd.Series] = None):
+        self._names = names.reset_index(drop=True)
+        self._scores = pd.to_numeric(scores, errors='coerce').to_numpy(dtype=np.float32, na_value=-np.inf)
+
+        keys = (normalized_names.astype('string').fillna('').reset_index(drop=True)
+                if normalized_names is not None else normalize_series(self._names))
+        entries = pd.DataFrame({'key': keys, 'row': np.arange(len(keys), dtype=np.int32)})
+        if synonyms is not None:
+            aliases = synonyms.reset_index(drop=True).map(_split_synonyms).explode().dropna()
+            entries = pd.concat([entries, pd.DataFrame({
+                'key': normalize_series(aliases).to_numpy(),
+                'row': aliases.index.to_numpy(dtype=np.int32),
+            })], ignore_index=True).drop_duplicates()
+        entries = entries[entries['key'] != ''].sort_values('key', kind='stable', ignore_index=True)
+
+        self._keys = entries['key'].tolist()
+        self._rows = entries['row'].to_numpy(dtype=np.int32)
+        self._top = {}
+        # Préfixes de plus en plus longs tant que certaines plages restent trop grandes
+        for depth in range(1, _MAX_PRECOMPUTED_DEPTH + 1):
+            if not self._precompute(entries['key'].str.slice(0, depth).to_numpy()):
+                break
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _precompute(self, prefixes: np.ndarray) -> bool:
+        """Meilleures lignes de chaque préfixe dont la plage dépasse _SCAN_LIMIT"""
+        if len(prefixes) == 0:
+            return False
+        starts = np.flatnonzero(np.r_[True, prefixes[1:] != prefixes[:-1]])
+        ends = np.r_[starts[1:], len(prefixes)]
+        large = np.flatnonzero(ends - starts > _SCAN_LIMIT)
+        for start, end in zip(starts[large], ends[large]):
+            self._top[prefixes[start]] = self._best_rows(self._rows[start:end], _TOP_SIZE)
+        return len(large) > 0
+
+    def _best_rows(self, rows: np.ndarray, k: int) -> np.ndarray:
+        """k meilleures lignes par score décroissant (sans tri complet de la plage)"""
+        rows = np.unique(rows)
+        # Score décroissant, puis ordre de la table à égalité
+        return top_k(self._scores[rows], k, positions=rows)
+
+    def _range(self, prefix: str):
+        return bisect_left(self._keys, prefix), bisect_left(self._keys, prefix + _PREFIX_END)
+
+    def complete(self, prefix: str, k: int = 10) -> np.ndarray:
+        """Positions des k meilleures lignes dont un nom ou synonyme commence par prefix"""
+        needle = normalize_name(prefix)
+        if not needle or k <= 0:
+            return np.empty(0, dtype=np.int32)
+        if needle in self._top and k <= _TOP_SIZE:
+            return self._top[needle][:k]
+        start, end = self._range(needle)
+        return self._best_rows(self._rows[start:end], k)
+
+    def suggest(self, prefix: str, k: int = 10) -> List[str]:
+        """Noms distincts des k meilleures complétions"""
+        suggestions = []
+        for name in self._names.iloc[self.complete(prefix, 2 * k)]:
+            if name not in suggestions:
+                suggestions.append(name)
+        return suggestions[:k]
+
+    def lookup(self, name: str) -> np.ndarray:
+        """Positions des lignes dont le nom ou un synonyme vaut exactement name"""
+        needle = normalize_name(name)
+        start = bisect_left(self._keys, needle)
+        end = start
+        while end < len(self._keys) and self._keys[end] == needle:
+            end += 1
+        return np.unique(self._rows[start:end])
+
+
+def get_prefix_index(repository=None) -> PrefixIndex:
+    """Index de complétion des composés du dépôt MEGA (une fois par version des données)"""
+    if repository is None:
+        from mega_data_repository import get_mega_repository
+        repository = get_mega_repository()
+
+    def build(repo):
+        compounds = repo.compounds
+        return PrefixIndex(compounds['name'], compounds['bioactivity_score'], compounds.get('synonyms'),
+                           compounds.get(NORMALIZED_NAME_COLUMN))
+
+    return repository.view(('prefix_index',), build)
+
+
+if __name__ == "__main__":
+    import time
+
+    from mega_data_repository import get_mega_repository
+
+    repository = get_mega_repository()
+    started = time.time()
+    index = get_prefix_index(repository)
+    print(f"⌨️ Index de préfixes: {len(index):,} clés, {time.time() - started:.1f}s")
+    for prefix in ('c', 'cu', 'curc', 'quer', 'zzz'):
+        started = time.time()
+        suggestions = index.suggest(prefix, 8)
+        print(f"   '{prefix}': {suggestions} en {(time.time() - started) * 1000:.2f} ms")
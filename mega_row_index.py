@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+📍 PhytoAI - Index d'Offsets de Lignes du CSV MEGA
+Index persistant des débuts de lignes (en octets) pour lire directement
+n'importe quel ensemble de lignes du CSV MEGA, sans le reparcourir
+"""
+
+import io
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from mega_columnar_store import MEGA_CACHE_DIR, MEGA_CSV_PATH
+
+_NEWLINE = ord('\n')
+_QUOTE = ord('"')
+
+
+def _index_paths(csv_path: str):
+    stem = Path(csv_path).stem
+    return MEGA_CACHE_DIR / f"{stem}.rowidx.npy", MEGA_CACHE_DIR / f"{stem}.rowidx.json"
+
+
+def _file_signature(csv_path: str) -> dict:
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def scan_record_offsets(csv_path: str, block_size: int = 16 << 20) -> np.ndarray:
+    """
+    Offsets de début de chaque enregistrement CSV (en-tête compris)
+
+    Balayage vectorisé par blocs : un saut de ligne ne termine un
+    enregistrement que hors d'un champ entre guillemets (parité des '"').
+    Le dernier élément est la taille du fichier (sentinelle de fin).
+    """
+    file_size = os.path.getsize(csv_path)
+    starts = [np.zeros(1, dtype=np.uint64)]
+    quote_parity = 0
+    position = 0
+
+    with open(csv_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            data = np.frombuffer(block, dtype=np.uint8)
+
+            inside_quotes = (np.cumsum(data == _QUOTE, dtype=np.int64) + quote_parity) & 1
+            newlines = np.flatnonzero((data == _NEWLINE) & (inside_quotes == 0))
+            starts.append((newlines + position + 1).astype(np.uint64))
+
+            quote_parity = int(inside_quotes[-1])
+            position += len(block)
+
+    offsets = np.concatenate(starts)
+    # Pas d'enregistrement vide après le saut de ligne final
+    if len(offsets) > 1 and offsets[-1] == file_size:
+        offsets = offsets[:-1]
+    return np.append(offsets, np.uint64(file_size))
+
+
+class MegaRowIndex:
+    """Accès direct aux lignes du CSV MEGA via l'index d'offsets"""
+
+    def __init__(self, csv_path: str, offsets: np.ndarray):
+        self.csv_path = csv_path
+        # offsets[0] = en-tête ; la ligne de données i couvre offsets[i+1]:offsets[i+2]
+        self._offsets = offsets
+
+    @property
+    def num_rows(self) -> int:
+        """Nombre de lignes de données (en-tête exclu)"""
+        return max(0, len(self._offsets) - 2)
+
+    def read_rows(self, row_ids, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Lit un ensemble arbitraire de lignes de données
+
+        Le coût est proportionnel au nombre de lignes demandées, pas à la
+        taille du fichier. Le DataFrame est indexé par numéro de ligne
+        (0 = première ligne de données), dans l'ordre croissant ; columns
+        limite l'analyse aux colonnes utiles.
+        """
+        row_ids = np.unique(np.asarray(row_ids, dtype=np.int64))
+        row_ids = row_ids[(row_ids >= 0) & (row_ids < self.num_rows)]
+
+        with open(self.csv_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return pd.DataFrame()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                parts = [mm[int(self._offsets[0]):int(self._offsets[1])]]
+                starts = self._offsets[row_ids + 1]
+                ends = self._offsets[row_ids + 2]
+                for start, end in zip(starts.tolist(), ends.tolist()):
+                    record = mm[start:end]
+                    parts.append(record if record.endswith(b'\n') else record + b'\n')
+
+        df = pd.read_csv(io.BytesIO(b''.join(parts)), usecols=columns)
+        df.index = row_ids[:len(df)]
+        return df
+
+    def read_range(self, start: int, stop: int, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Lit les lignes [start, stop) en un seul bloc contigu"""
+        start, stop = max(0, start), min(stop, self.num_rows)
+        if start >= stop:
+            return pd.DataFrame()
+
+        with open(self.csv_path, 'rb') as f:
+            header = f.read(int(self._offsets[1]))
+            f.seek(int(self._offsets[start + 1]))
+            body = f.read(int(self._offsets[stop + 1] - self._offsets[start + 1]))
+
+        df = pd.read_csv(io.BytesIO(header + body), usecols=columns)
+        df.index = np.arange(start, start + len(df))
+        return df
+
+    def sample_rows(self, n: int, seed: Optional[int] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Échantillon aléatoire uniforme de n lignes sur tout le fichier"""
+        rng = np.random.default_rng(seed)
+        n = min(n, self.num_rows)
+        return self.read_rows(rng.choice(self.num_rows, size=n, replace=False), columns)
+
+    def stratified_rows(self, n: int, skip_head: int = 0, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Lignes régulièrement espacées sur tout le fichier (après skip_head)"""
+        if self.num_rows <= skip_head or n <= 0:
+            return pd.DataFrame()
+        return self.read_rows(np.linspace(skip_head, self.num_rows - 1, num=n).astype(np.int64), columns)
+
+
+def build_row_index(csv_path: str = MEGA_CSV_PATH) -> MegaRowIndex:
+    """Construit et persiste l'index d'offsets du CSV"""
+    offsets_path, meta_path = _index_paths(csv_path)
+    offsets_path.parent.mkdir(parents=True, exist_ok=True)
+
+    signature = _file_signature(csv_path)
+    offsets = scan_record_offsets(csv_path)
+
+    tmp_path = offsets_path.with_suffix('.tmp.npy')
+    np.save(tmp_path, offsets)
+    os.replace(tmp_path, offsets_path)
+    meta_path.write_text(json.dumps({**signature, 'num_records': int(len(offsets) - 1)}))
+
+    print(f"📍 Index de lignes MEGA construit: {len(offsets) - 2:,} lignes")
+    return MegaRowIndex(csv_path, np.load(offsets_path, mmap_mode='r'))
+
+
+def get_row_index(csv_path: str = MEGA_CSV_PATH) -> Optional[MegaRowIndex]:
+    """Index d'offsets synchronisé avec le CSV (reconstruit si taille/mtime changent)"""
+    if not os.path.exists(csv_path):
+        return None
+
+    offsets_path, meta_path = _index_paths(csv_path)
+    if offsets_path.exists() and meta_path.exists():
+        try:
+            meta = json.loads(meta_path.read_text())
+            signature = _file_signature(csv_path)
+            if meta.get('size') == signature['size'] and meta.get('mtime_ns') == signature['mtime_ns']:
+                return MegaRowIndex(csv_path, np.load(offsets_path, mmap_mode='r'))
+        except (ValueError, OSError):
+            pass
+
+    return build_row_index(csv_path)
+
+
+if __name__ == "__main__":
+    index = get_row_index()
+    if index is None:
+        print("❌ Base MEGA introuvable")
+    else:
+        print(f"📍 {index.num_rows:,} lignes indexées dans {index.csv_path}")
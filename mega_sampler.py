@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+🎯 PhytoAI - Échantillonneur Stratifié MEGA en Une Passe
+Réservoirs par strate (champions, >670 Da, familles...) remplis en un seul
+parcours du fichier complet, parallélisable par blocs et reproductible
+"""
+
+import operator
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from mega_columnar_store import MEGA_CSV_PATH, PYARROW_AVAILABLE, ensure_mega_parquet
+from mega_row_index import get_row_index
+
+if PYARROW_AVAILABLE:
+    import pyarrow.parquet as pq
+
+# Strates à quota garanti sur le format streamlit (colonnes dérivées)
+DEFAULT_STRATA = [
+    {'name': 'champions', 'column': 'is_champion', 'op': 'eq', 'value': True, 'quota': 1500},
+    {'name': 'poids_670', 'column': 'molecular_weight', 'op': 'gt', 'value': 670, 'quota': 2000},
+]
+
+# Quota garanti pour chaque valeur de ces colonnes
+DEFAULT_GROUP_QUOTAS = {'molecular_family': 300}
+
+_OPERATORS = {
+    'eq': operator.eq, 'ne': operator.ne,
+    'gt': operator.gt, 'ge': operator.ge,
+    'lt': operator.lt, 'le': operator.le,
+}
+
+_KEY_COLUMN = '_sample_key'
+_GENERAL = '__general__'
+
+
+def _sample_keys(values: pd.Series, seed: int) -> np.ndarray:
+    """Clé aléatoire reproductible par ligne, dérivée de la valeur et de la graine"""
+    from mega_streamlit_connector import stable_name_hash, stable_uniform
+    return stable_uniform(stable_name_hash(values.astype(str)), stream=0x5EED0000 + seed)
+
+
+class StratifiedReservoirSampler:
+    """
+    Réservoirs « bottom-k » par strate
+
+    Chaque ligne reçoit une clé pseudo-aléatoire fixée par (clé, graine) ;
+    chaque réservoir garde les k plus petites clés vues. Le résultat ne
+    dépend donc ni de l'ordre de lecture ni du découpage en blocs, et deux
+    échantillonneurs partiels se fusionnent exactement (merge).
+    """
+
+    def __init__(self, total_size: int, strata: Optional[List[dict]] = None,
+                 group_quotas: Optional[Dict[str, int]] = None,
+                 key_column: str = 'name', seed: int = 42):
+        self.total_size = total_size
+        self.strata = DEFAULT_STRATA if strata is None else strata
+        self.group_quotas = DEFAULT_GROUP_QUOTAS if group_quotas is None else group_quotas
+        self.key_column = key_column
+        self.seed = seed
+        self.rows_seen = 0
+        self._reservoirs = {}
+        self._population = {}
+
+    def _offer(self, name: str, candidates: pd.DataFrame, quota: int):
+        self._population[name] = self._population.get(name, 0) + len(candidates)
+        if quota <= 0 or len(candidates) == 0:
+            return
+        if len(candidates) > quota:
+            candidates = candidates.nsmallest(quota, _KEY_COLUMN)
+        current = self._reservoirs.get(name)
+        if current is not None:
+            candidates = pd.concat([current, candidates]).nsmallest(quota, _KEY_COLUMN)
+        self._reservoirs[name] = candidates
+
+    def update(self, chunk: pd.DataFrame):
+        """Intègre un bloc de lignes aux réservoirs"""
+        if len(chunk) == 0:
+            return
+        chunk = chunk.assign(**{_KEY_COLUMN: _sample_keys(chunk[self.key_column], self.seed)})
+        self.rows_seen += len(chunk)
+
+        self._offer(_GENERAL, chunk, self.total_size)
+
+        for stratum in self.strata:
+            if stratum['column'] not in chunk.columns:
+                continue
+            values = chunk[stratum['column']]
+            if stratum['op'] not in ('eq', 'ne'):
+                values = pd.to_numeric(values, errors='coerce')
+            mask = _OPERATORS[stratum['op']](values, stratum['value'])
+            self._offer(stratum['name'], chunk[mask.fillna(False).to_numpy(dtype=bool)], stratum['quota'])
+
+        for column, quota in self.group_quotas.items():
+            if column not in chunk.columns:
+                continue
+            for value, group in chunk.groupby(column, observed=True, sort=False):
+                self._offer(f"{column}={value}", group, quota)
+
+    def merge(self, other: 'StratifiedReservoirSampler') -> 'StratifiedReservoirSampler':
+        """Fusionne les réservoirs d'un autre échantillonneur (même configuration)"""
+        quotas = {s['name']: s['quota'] for s in self.strata}
+        quotas[_GENERAL] = self.total_size
+        for name, reservoir in other._reservoirs.items():
+            group_column = name.split('=', 1)[0]
+            quota = quotas.get(name, self.group_quotas.get(group_column, 0))
+            self._offer(name, reservoir, quota)
+            # _offer a déjà compté ces lignes : la population vient de l'autre
+            self._population[name] -= len(reservoir)
+        for name, count in other._population.items():
+            self._population[name] = self._population.get(name, 0) + count
+        self.rows_seen += other.rows_seen
+        return self
+
+    def result(self) -> pd.DataFrame:
+        """
+        Échantillon final : toutes les strates à quota, complétées par le
+        réservoir général jusqu'à total_size (les quotas priment si leur
+        somme dépasse total_size)
+        """
+        stratum_parts = [r for name, r in self._reservoirs.items() if name != _GENERAL]
+        selected = pd.concat(stratum_parts) if stratum_parts else pd.DataFrame()
+        selected = selected[~selected.index.duplicated()] if len(selected) else selected
+
+        general = self._reservoirs.get(_GENERAL)
+        if general is not None:
+            remaining = self.total_size - len(selected)
+            if remaining > 0:
+                general = general[~general.index.isin(selected.index)]
+                selected = pd.concat([selected, general.nsmallest(remaining, _KEY_COLUMN)])
+
+        if len(selected) == 0:
+            return selected
+        return selected.sort_values(_KEY_COLUMN).drop(columns=[_KEY_COLUMN])
+
+    def report(self) -> Dict[str, dict]:
+        """Population vue et lignes retenues par strate"""
+        return {
+            name: {'population': self._population.get(name, 0), 'kept': len(reservoir)}
+            for name, reservoir in self._reservoirs.items()
+        }
+
+
+def _chunk_specs(csv_path: str, n_chunks: int) -> List[tuple]:
+    """Découpe le fichier en blocs indépendants (row groups Parquet ou plages CSV)"""
+    parquet_path = ensure_mega_parquet(csv_path)
+    if parquet_path is not None:
+        n_groups = pq.ParquetFile(parquet_path, memory_map=True).num_row_groups
+        groups = np.array_split(np.arange(n_groups), max(1, min(n_chunks, n_groups)))
+        return [('parquet', str(parquet_path), g.tolist()) for g in groups if len(g)]
+
+    row_index = get_row_index(csv_path)
+    if row_index is None:
+        return []
+    bounds = np.linspace(0, row_index.num_rows, num=max(1, n_chunks) + 1).astype(np.int64)
+    return [('csv', csv_path, int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def _iter_spec_batches(spec: tuple, batch_size: int, columns: Optional[List[str]] = None):
+    """Lots d'un bloc (colonnes projetées), indexés par numéro de ligne global (unique sur le fichier)"""
+    if spec[0] == 'parquet':
+        parquet_file = pq.ParquetFile(spec[1], memory_map=True)
+        # Les row groups d'un bloc sont contigus : offset = lignes des groupes précédents
+        start = sum(parquet_file.metadata.row_group(i).num_rows for i in range(spec[2][0]))
+        for batch in parquet_file.iter_batches(batch_size=batch_size, row_groups=spec[2], columns=columns):
+            df = batch.to_pandas()
+            df.index = np.arange(start, start + len(df))
+            start += len(df)
+            yield df
+    else:
+        from mega_columnar_store import clean_mega_names
+        row_index = get_row_index(spec[1])
+        for start in range(spec[2], spec[3], batch_size):
+            batch = row_index.read_range(start, min(start + batch_size, spec[3]), columns)
+            yield clean_mega_names(batch) if 'Nom' in batch.columns else batch
+
+
+def _sample_spec(spec: tuple, sampler_kwargs: dict, transform: Optional[Callable],
+                 batch_size: int, columns: Optional[List[str]] = None) -> StratifiedReservoirSampler:
+    """Travail d'un worker : parcours d'un bloc et remplissage de ses réservoirs"""
+    sampler = StratifiedReservoirSampler(**sampler_kwargs)
+    for batch in _iter_spec_batches(spec, batch_size, columns):
+        if transform is not None:
+            # L'index source est conservé pour dédupliquer entre strates
+            batch = transform(batch).set_axis(batch.index)
+        sampler.update(batch)
+    return sampler
+
+
+def sample_mega_stratified(total_size: int = 10000,
+                           strata: Optional[List[dict]] = None,
+                           group_quotas: Optional[Dict[str, int]] = None,
+                           transform: Optional[Callable] = None,
+                           key_column: str = 'name',
+                           seed: int = 42,
+                           workers: Optional[int] = None,
+                           csv_path: str = MEGA_CSV_PATH,
+                           batch_size: int = 100_000,
+                           columns: Optional[List[str]] = None):
+    """
+    Échantillon stratifié reproductible sur la totalité du fichier MEGA
+
+    Args:
+        total_size: Taille cible de l'échantillon
+        strata: Strates à quota garanti (colonne, opérateur, valeur, quota)
+        group_quotas: Quota garanti par valeur de colonne (ex: famille)
+        transform: Fonction appliquée à chaque bloc avant stratification
+                   (ex: format_mega_for_streamlit) ; doit être picklable
+        key_column: Colonne servant à dériver la clé aléatoire
+        seed: Graine — même graine, même échantillon
+        workers: Processus parallèles (1 = séquentiel, None = nb de CPU)
+        columns: Colonnes lues dans le fichier (toutes si None) ; doivent
+                 couvrir celles du transform, des strates et de key_column
+
+    Returns:
+        (échantillon, rapport par strate)
+    """
+    workers = workers or os.cpu_count() or 1
+    specs = _chunk_specs(csv_path, workers)
+    sampler_kwargs = {
+        'total_size': total_size, 'strata': strata, 'group_quotas': group_quotas,
+        'key_column': key_column, 'seed': seed,
+    }
+
+    sampler = StratifiedReservoirSampler(**sampler_kwargs)
+    if workers == 1 or len(specs) <= 1:
+        for spec in specs:
+            sampler.merge(_sample_spec(spec, sampler_kwargs, transform, batch_size, columns))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(specs))) as pool:
+            futures = [pool.submit(_sample_spec, spec, sampler_kwargs, transform, batch_size, columns)
+                       for spec in specs]
+            for future in futures:
+                sampler.merge(future.result())
+
+    return sampler.result(), sampler.report()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+📐 PhytoAI - Schéma Mémoire Compact des Tables MEGA
+Types déclarés appliqués au chargement : catégories pour le texte à faible
+cardinalité, plus petits entiers possibles, float32 pour scores et poids
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Types logiques : 'category', 'int' (plus petit entier), 'float32', 'bool',
+# 'text' (chaînes Arrow contiguës au lieu d'objets Python quand disponible)
+COMPOUND_SCHEMA = {
+    'name': 'text',
+    'name_normalized': 'text',  # forme canonique (mega_text_normalization)
+    'mega_id': 'text',
+    'molecular_weight': 'float32',
+    'bioactivity_score': 'float32',
+    'logp': 'float32',
+    'complexity_score': 'float32',
+    'targets': 'int',
+    'toxicity': 'category',
+    'solubility': 'category',
+    'molecular_family': 'category',
+    'discovery_date': 'category',
+    'dataset_split': 'category',
+    'is_champion': 'bool',
+}
+
+RAW_MEGA_SCHEMA = {
+    'Nom': 'text',
+    'Catégorie': 'category',
+    'Sous-catégorie': 'category',
+    'Tier_Qualité': 'category',
+    'Poids_Moléculaire': 'float32',
+    'Score_Puissance': 'float32',
+    'Index_Sécurité': 'float32',
+    'Drug_Likeness': 'float32',
+}
+
+BIOACTIVITY_SCHEMA = {
+    'target': 'category',
+    'activity_type': 'category',
+    'units': 'category',
+    'value': 'float32',
+}
+
+# Colonnes texte non déclarées converties en catégorie sous ce ratio de cardinalité
+AUTO_CATEGORY_MAX_RATIO = 0.05
+
+
+def _compact_text_dtype():
+    """Chaînes Arrow à sémantique NaN (défaut pandas 3, opt-in pandas 2.1+)"""
+    try:
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    except (TypeError, ImportError):
+        pass
+    try:
+        return pd.StringDtype('pyarrow_numpy')
+    except (TypeError, ValueError, ImportError):
+        return None
+
+
+_TEXT_DTYPE = _compact_text_dtype()
+
+
+def _is_text(series: pd.Series) -> bool:
+    return series.dtype == object or isinstance(series.dtype, pd.StringDtype)
+
+
+def _to_smallest_int(series: pd.Series) -> pd.Series:
+    if series.isna().any():
+        return series
+    return pd.to_numeric(series, downcast='integer')
+
+
+def _convert(series: pd.Series, logical_type: str) -> pd.Series:
+    if logical_type == 'category':
+        return series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+    if logical_type == 'int':
+        return _to_smallest_int(pd.to_numeric(series, errors='coerce'))
+    if logical_type == 'float32':
+        return pd.to_numeric(series, errors='coerce').astype(np.float32)
+    if logical_type == 'text':
+        if _TEXT_DTYPE is None or series.dtype == _TEXT_DTYPE or not _is_text(series):
+            return series
+        return series.astype(_TEXT_DTYPE)
+    if logical_type == 'bool':
+        return series.astype(bool) if not series.isna().any() else series
+    return series
+
+
+def apply_schema(df: pd.DataFrame, schema: Optional[Dict[str, str]] = None,
+                 auto: bool = True) -> pd.DataFrame:
+    """
+    Applique un schéma compact à un DataFrame (nouvel objet, colonnes converties)
+
+    Args:
+        df: Table à compacter
+        schema: Types logiques par colonne (COMPOUND_SCHEMA si None)
+        auto: Compacte aussi les colonnes non déclarées
+              (float64 → float32, entiers réduits, texte répétitif → catégorie)
+    """
+    schema = COMPOUND_SCHEMA if schema is None else schema
+    columns = {}
+
+    for column in df.columns:
+        series = df[column]
+        if column in schema:
+            columns[column] = _convert(series, schema[column])
+        elif auto and series.dtype == np.float64:
+            columns[column] = series.astype(np.float32)
+        elif auto and pd.api.types.is_integer_dtype(series.dtype) and series.dtype != np.bool_:
+            columns[column] = _to_smallest_int(series)
+        elif auto and _is_text(series) and len(series) > 0:
+            is_text = pd.api.types.infer_dtype(series, skipna=True) == 'string'
+            if is_text and series.nunique(dropna=True) <= AUTO_CATEGORY_MAX_RATIO * len(series):
+                columns[column] = series.astype('category')
+            else:
+                columns[column] = series
+        else:
+            columns[column] = series
+
+    return pd.DataFrame(columns, index=df.index)
+
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """Octets par colonne (mesure profonde, chaînes Python comprises)"""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'bytes': usage,
+        'bytes_per_row': usage / max(len(df), 1),
+    })
+    report.loc['TOTAL'] = ['', usage.sum(), usage.sum() / max(len(df), 1)]
+    return report
+
+
+def format_memory_report(df: pd.DataFrame, title: str = "Table") -> str:
+    """Rapport mémoire lisible (console)"""
+    report = memory_report(df)
+    lines = [f"📐 {title}: {len(df):,} lignes"]
+    for column, row in report.iterrows():
+        lines.append(f"  {str(column):<22} {row['dtype']:<10} {row['bytes'] / 1024 / 1024:>9.2f} MB"
+                     f"  ({row['bytes_per_row']:.1f} o/ligne)")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from mega_data_repository import get_mega_repository
+
+    repository = get_mega_repository().load()
+    print(format_memory_report(repository.compounds, "Composés (format application)"))
+    if repository.raw_compounds is not None:
+        print(format_memory_report(repository.raw_compounds, "Composés MEGA bruts"))
+    if len(repository.bioactivities):
+        print(format_memory_report(repository.bioactivities, "Bioactivités"))
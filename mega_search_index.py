@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+🔎 PhytoAI - Index Trigrammes des Noms de Composés
+Listes de postings par trigramme sur les noms normalisés, construites une
+fois par version du dépôt ; une recherche par sous-chaîne intersecte les
+listes puis ne vérifie que les candidats au lieu de parcourir 1.4M noms
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mega_text_normalization import NORMALIZED_NAME_COLUMN, normalize_series, normalize_text
+
+# Séparateur entre noms dans le tampon de points de code (absent des noms)
+_SEPARATOR = 0
+_CHUNK_SIZE = 200_000
+_CODE_BITS = 21  # points de code Unicode ≤ 0x10FFFF
+
+
+def normalize_name(text) -> str:
+    """Forme normalisée d'un nom pour la recherche (casse, accents, ponctuation, synonymes)"""
+    return normalize_text(text)
+
+
+def _codepoints(names) -> np.ndarray:
+    """Points de code de tous les noms, séparés par _SEPARATOR"""
+    joined = '\x00'.join(names) + '\x00'
+    return np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32)
+
+
+def _trigram_codes(codepoints: np.ndarray):
+    """(codes uint64, positions de départ) des trigrammes ne chevauchant pas deux noms"""
+    if len(codepoints) < 3:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    c0, c1, c2 = (codepoints[i:len(codepoints) - 2 + i].astype(np.uint64) for i in range(3))
+    valid = (c0 != _SEPARATOR) & (c1 != _SEPARATOR) & (c2 != _SEPARATOR)
+    codes = (c0 << np.uint64(2 * _CODE_BITS)) | (c1 << np.uint64(_CODE_BITS)) | c2
+    return codes[valid], np.flatnonzero(valid)
+
+
+def _term_codes(term: str) -> np.ndarray:
+    codes, _ = _trigram_codes(_codepoints([normalize_name(term)])[:-1])
+    return codes
+
+
+class TrigramIndex:
+    """
+    Index inversé trigramme → positions de lignes (format CSR compact)
+
+    - _codes : trigrammes distincts triés
+    - _offsets : début de la liste de postings de chaque trigramme dans _rows
+    - _rows : positions de lignes (int32), triées dans chaque liste
+
+    Les termes de moins de 3 caractères sont vérifiés par un parcours
+    vectorisé des noms déjà normalisés.
+    """
+
+    def __init__(self, names: pd.Series, normalized: bool = False):
+        names = names.astype('string').fillna('') if normalized else normalize_series(names)
+        self._names = names.reset_index(drop=True)
+
+        all_codes, all_rows = [], []
+        for start in range(0, len(self._names), _CHUNK_SIZE):
+            chunk = self._names.iloc[start:start + _CHUNK_SIZE].tolist()
+            codepoints = _codepoints(chunk)
+            codes, positions = _trigram_codes(codepoints)
+            # Numéro de ligne de chaque position = nombre de séparateurs qui précèdent
+            row_of_char = np.cumsum(codepoints == _SEPARATOR) - (codepoints == _SEPARATOR)
+            all_codes.append(codes)
+            all_rows.append((row_of_char[positions] + start).astype(np.int32))
+
+        codes = np.concatenate(all_codes) if all_codes else np.empty(0, dtype=np.uint64)
+        rows = np.concatenate(all_rows) if all_rows else np.empty(0, dtype=np.int32)
+
+        # Tri stable : les lignes restent croissantes dans chaque liste
+        order = np.argsort(codes, kind='stable')
+        codes, rows = codes[order], rows[order]
+        # Un trigramme répété dans un même nom n'est posté qu'une fois
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+        codes, rows = codes[keep], rows[keep]
+
+        self._codes, starts = np.unique(codes, return_index=True)
+        self._offsets = np.append(starts, len(rows)).astype(np.int64)
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def nbytes(self) -> int:
+        return self._codes.nbytes + self._offsets.nbytes + self._rows.nbytes
+
+    def _postings(self, code: np.uint64) -> np.ndarray:
+        slot = np.searchsorted(self._codes, code)
+        if slot == len(self._codes) or self._codes[slot] != code:
+            return self._rows[:0]
+        return self._rows[self._offsets[slot]:self._offsets[slot + 1]]
+
+    @property
+    def names(self) -> pd.Series:
+        """Noms normalisés, alignés sur les positions de la table"""
+        return self._names
+
+    def shared_trigrams(self, term: str) -> Tuple[int, np.ndarray]:
+        """
+        (nombre de trigrammes distincts du terme, trigrammes partagés par ligne)
+
+        Base du filtre q-grammes de la recherche approchée : une édition
+        détruit au plus 3 trigrammes du terme.
+        """
+        codes = np.unique(_term_codes(term))
+        if len(codes) == 0:
+            return 0, np.zeros(len(self._names), dtype=np.int64)
+        postings = np.concatenate([self._postings(code) for code in codes])
+        return len(codes), np.bincount(postings, minlength=len(self._names))
+
+    def candidates(self, term: str) -> Optional[np.ndarray]:
+        """Positions contenant tous les trigrammes du terme (None si terme < 3 caractères)"""
+        codes = _term_codes(term)
+        if len(codes) == 0:
+            return None
+        postings = sorted((self._postings(code) for code in np.unique(codes)), key=len)
+        result = postings[0]
+        # Intersection en partant de la liste la plus courte
+        for posting in postings[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, posting, assume_unique=True)
+        return result
+
+    def search(self, term: str, limit: Optional[int] = None) -> np.ndarray:
+        """
+        Positions des lignes dont le nom contient term (ordre de la table)
+
+        Args:
+            term: Sous-chaîne recherchée (casse ignorée)
+            limit: Nombre max de positions retournées
+        """
+        needle = normalize_name(term)
+        if not needle:
+            return np.empty(0, dtype=np.int64)
+
+        candidates = self.candidates(needle)
+        if candidates is None:
+            matches = np.flatnonzero(self._names.str.contains(needle, regex=False).to_numpy())
+        elif len(candidates) == 0:
+            return np.empty(0, dtype=np.int64)
+        else:
+            # Vérification des seuls candidats (les trigrammes peuvent être dispersés),
+            # par blocs croissants pour s'arrêter dès que limit est atteint
+            found, start, block = [], 0, max(4 * (limit or 0), 1024) if limit else len(candidates)
+            while start < len(candidates) and (limit is None or sum(map(len, found)) < limit):
+                chunk = candidates[start:start + block]
+                found.append(chunk[self._names.iloc[chunk].str.contains(needle, regex=False).to_numpy()])
+                start, block = start + block, block * 2
+            matches = np.concatenate(found).astype(np.int64) if found else np.empty(0, dtype=np.int64)
+        return matches[:limit] if limit is not None else matches
+
+    def filter(self, df: pd.DataFrame, term: str, limit: Optional[int] = None) -> pd.DataFrame:
+        """Lignes de df (la table indexée) dont le nom contient term"""
+        return df.iloc[self.search(term, limit)]
+
+
+def get_name_index(repository=None, raw: bool = False) -> TrigramIndex:
+    """
+    Index trigrammes des noms du dépôt MEGA
+
+    Mémorisé comme vue du dépôt : construit une fois par version des
+    données, reconstruit automatiquement quand le dépôt est rechargé.
+    """
+    if repository is None:
+        from mega_data_repository import get_mega_repository
+        repository = get_mega_repository()
+    column = 'Nom' if raw else 'name'
+
+    def build(repo):
+        table = repo.raw_compounds if raw else repo.compounds
+        if table is None or column not in table:
+            return TrigramIndex(pd.Series([], dtype=str))
+        # Forme canonique calculée à l'ingestion quand elle existe
+        if not raw and NORMALIZED_NAME_COLUMN in table:
+            return TrigramIndex(table[NORMALIZED_NAME_COLUMN], normalized=True)
+        return TrigramIndex(table[column])
+
+    return repository.view(('trigram_index', raw), build)
+
+
+if __name__ == "__main__":
+    import time
+
+    from mega_data_repository import get_mega_repository
+
+    repository = get_mega_repository()
+    started = time.time()
+    index = get_name_index(repository)
+    print(f"🔎 Index trigrammes: {len(index):,} noms, {index.nbytes / 1e6:.1f} Mo, "
+          f"{time.time() - started:.1f}s")
+    for term in ('curcumin', 'quercetin', 'acid', 'ol'):
+        started = time.time()
+        matches = index.search(term)
+        print(f"   '{term}': {len(matches):,} résultats en {(time.time() - started) * 1000:.1f} ms")
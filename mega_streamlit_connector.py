@@ -8,145 +8,264 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import os
 
-@st.cache_data(ttl=3600)
-def load_mega_streamlit_dataset(mode="balanced", max_molecules=10000):
-    """Chargement intelligent du dataset MEGA complet 1.4M+ molécules"""
-    
-    # Chemin vers la base MEGA complète
-    mega_path = "../phytotherapy-ai-discovery/data/MEGA_COMPOSÉS_20250602_142023.csv"
-    
+from mega_bitmap_index import discovery_rows, get_bitmap_index
+from mega_cache import get_query_cache
+from mega_columnar_store import DESCRIPTORS_PATH
+from mega_data_repository import get_mega_repository
+from mega_filter_engine import get_filter_engine
+from mega_fuzzy_search import SUBSTRUCTURE_MODE, search_by_mode, search_rows
+from mega_search_index import normalize_name
+from mega_pagination import PAGE_SIZE, Page, paginate_query
+from mega_prefix_index import get_prefix_index
+
+# Modules adossés à RDKit (descripteurs, empreintes, sous-structures, déduplication) :
+# importés à l'usage, l'import du connecteur ne charge pas RDKit
+
+def _balanced_view(repository):
+    """Top molécules (tête du fichier) + échantillon stratifié sur toute la base"""
+    top_df = repository.head(5000)
+    # Champions, >670 Da et familles garantis (mêmes quotas que mega_sampler)
+    sample_df = repository.stratified_sample(5000)
+    combined_df = pd.concat([top_df, sample_df], ignore_index=True)
+    if 'smiles' in combined_df.columns:
+        from mega_structure_dedup import deduplicate_structures
+        # Une même molécule sous plusieurs noms (ou écritures SMILES) n'apparaît qu'une fois
+        combined_df = deduplicate_structures(combined_df, smiles=combined_df['smiles'], workers=1, verbose=False)
+    # Noms uniques conservés : ils servent de clé aux sélections de l'interface
+    return combined_df.drop_duplicates(subset=['name'], ignore_index=True)
+
+def build_mega_streamlit_dataset(mode="balanced", max_molecules=10000):
+    """
+    Chargement du dataset MEGA sans appel d'interface (exécutable hors du thread de script)
+
+    Returns:
+        (composés, statut, messages) : messages = liste de (type st.sidebar, texte)
+        que le thread de script affiche
+    """
     try:
-        if not os.path.exists(mega_path):
-            st.sidebar.error("❌ Base MEGA 1.4M non trouvée - Fallback activé")
-            return create_fallback_mega_dataset(), "🟡 Mode fallback MEGA"
+        # Dépôt partagé : une seule copie des 1.4M pour toutes les sessions
+        repository = get_mega_repository().load()
+        if repository.source == 'simulated':
+            return repository.compounds, repository.status, [('error', "❌ Base MEGA 1.4M non trouvée - Fallback activé")]
         
         # Mode exploration complète
         if mode == "full_exploration":
-            st.sidebar.info("🔓 Chargement base MEGA complète...")
-            chunks = []
-            total_loaded = 0
-            
-            for chunk in pd.read_csv(mega_path, chunksize=50000):
-                chunk = chunk.dropna(subset=['Nom'])
-                chunk = chunk[chunk['Nom'].str.strip() != '']
-                chunk = chunk[chunk['Nom'].str.len() > 2]
-                chunks.append(chunk)
-                total_loaded += len(chunk)
-                
-                if total_loaded >= max_molecules:
-                    break
+            df_formatted = repository.head(max_molecules)
+            notices = [('info', "🔓 Chargement base MEGA complète...")]
             
-            if chunks:
-                df = pd.concat(chunks, ignore_index=True)
-                # Conversion au format streamlit connector
-                df_formatted = format_mega_for_streamlit(df)
-                st.sidebar.success(f"🟢 MEGA 1.4M CONNECTÉ - {len(df_formatted):,} molécules chargées")
-                return df_formatted, f"🟢 CONNECTÉ MEGA 1.4M - {len(df_formatted):,} molécules"
+            if len(df_formatted) > 0:
+                notices.append(('success', f"🟢 MEGA 1.4M CONNECTÉ - {len(df_formatted):,} molécules chargées"))
+                return df_formatted, f"🟢 CONNECTÉ MEGA 1.4M - {len(df_formatted):,} molécules", notices
+            return df_formatted, repository.status, notices
         
         # Mode équilibré (défaut)
-        else:
-            st.sidebar.info("⚖️ Chargement échantillon MEGA optimisé...")
-            
-            # Top molécules + échantillon diversifié
-            top_df = pd.read_csv(mega_path, nrows=5000)
-            top_df = top_df.dropna(subset=['Nom'])
-            
-            # Échantillon stratifié du reste
-            skip_rows = list(range(5001, 20000, 3))
-            sample_df = pd.read_csv(mega_path, skiprows=skip_rows, nrows=5000)
-            sample_df = sample_df.dropna(subset=['Nom'])
-            
-            combined_df = pd.concat([top_df, sample_df], ignore_index=True)
-            combined_df = combined_df.drop_duplicates(subset=['Nom'])
-            
-            # Conversion format streamlit
-            df_formatted = format_mega_for_streamlit(combined_df)
-            st.sidebar.success(f"🟢 MEGA 1.4M CONNECTÉ - {len(df_formatted):,} molécules échantillonnées")
-            return df_formatted, f"🟢 CONNECTÉ MEGA 1.4M - {len(df_formatted):,} molécules (échantillon intelligent)"
+        df_formatted = repository.view(('streamlit_balanced',), _balanced_view)
+        notices = [
+            ('info', "⚖️ Chargement échantillon MEGA optimisé..."),
+            ('success', f"🟢 MEGA 1.4M CONNECTÉ - {len(df_formatted):,} molécules échantillonnées"),
+        ]
+        return df_formatted, f"🟢 CONNECTÉ MEGA 1.4M - {len(df_formatted):,} molécules (échantillon intelligent)", notices
             
     except Exception as e:
-        st.sidebar.warning(f"⚠️ Erreur MEGA: {str(e)[:50]} - Fallback activé")
-        return create_fallback_mega_dataset(), "🟡 Mode fallback MEGA"
+        return create_fallback_mega_dataset(), "🟡 Mode fallback MEGA", [('warning', f"⚠️ Erreur MEGA: {str(e)[:50]} - Fallback activé")]
+
+def load_mega_streamlit_dataset(mode="balanced", max_molecules=10000):
+    """Chargement intelligent du dataset MEGA complet 1.4M+ molécules (messages dans la barre latérale)"""
+    df, status, notices = build_mega_streamlit_dataset(mode, max_molecules)
+    for kind, message in notices:
+        getattr(st.sidebar, kind)(message)
+    return df, status
+
+# Tirages pseudo-aléatoires indépendants dérivés du nom (un flux par colonne)
+_NOISE_STREAMS = {
+    'bioactivity': 1, 'molecular_weight': 2, 'logp': 3, 'targets': 4,
+    'toxicity': 5, 'solubility': 6, 'family': 7, 'discovery_date': 8,
+}
+
+TOXICITY_LEVELS = ['Faible', 'Modérée', 'Élevée']
+SOLUBILITY_LEVELS = ['Bonne', 'Modérée', 'Faible']
+MOLECULAR_FAMILIES = ['Flavonoïdes', 'Polyphénols', 'Terpènes', 'Alcaloïdes', 'Saponines', 'Autres']
+
+def _splitmix64(x):
+    """Mélange 64 bits vectorisé (SplitMix64)"""
+    with np.errstate(over='ignore'):
+        z = x + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+def stable_name_hash(names):
+    """Hash 64 bits stable d'une série de noms (identique d'un chargement à l'autre)"""
+    return pd.util.hash_pandas_object(pd.Series(names).astype(object), index=False).to_numpy()
+
+def stable_uniform(name_hash, stream):
+    """Uniformes [0, 1) reproductibles par molécule pour un flux donné"""
+    mixed = _splitmix64(name_hash ^ _splitmix64(np.full_like(name_hash, stream)))
+    return (mixed >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+_HEX_BYTES = np.array([f'{i:02x}' for i in range(256)], dtype='S2')
+
+def source_row_numbers(mega_df):
+    """Numéros de ligne source : index entier de la table (position dans le store colonnaire), sinon position"""
+    index = mega_df.index
+    if pd.api.types.is_integer_dtype(index.dtype):
+        return index.to_numpy().astype(np.uint64)
+    return np.arange(len(mega_df), dtype=np.uint64)
+
+def stable_mega_ids(name_hash, row_numbers, prefix='MEGA_REAL_'):
+    """
+    Identifiants stables : hash du nom mêlé au numéro de ligne source
+
+    Deux homonymes (lignes différentes) reçoivent deux identifiants
+    distincts ; hexadécimal, sans boucle Python.
+    """
+    id_hash = _splitmix64(name_hash ^ _splitmix64(row_numbers))
+    hex_digits = _HEX_BYTES[id_hash.astype('>u8').view(np.uint8).reshape(-1, 8)]
+    return np.char.add(prefix.encode(), hex_digits.view('S16').ravel()).astype(str)
+
+def _choice(levels, probabilities, u):
+    """Équivalent vectorisé de np.random.choice à partir d'uniformes"""
+    thresholds = np.cumsum(probabilities)[:-1]
+    return pd.Categorical.from_codes(np.searchsorted(thresholds, u, side='right'), categories=levels)
 
 def format_mega_for_streamlit(mega_df):
-    """Conversion du format MEGA vers le format streamlit connector"""
+    """
+    Conversion vectorisée du format MEGA vers le format streamlit connector
     
-    formatted_data = []
+    Toutes les colonnes sont dérivées en une passe colonne par colonne.
+    Les valeurs estimées dépendent uniquement du nom, le mega_id du nom et
+    du numéro de ligne source (index de mega_df) : une même molécule garde
+    les mêmes valeurs et le même identifiant à chaque chargement.
+    """
+    if len(mega_df) == 0:
+        return pd.DataFrame(columns=[
+            'name', 'molecular_weight', 'bioactivity_score', 'targets', 'toxicity', 'logp',
+            'solubility', 'molecular_family', 'discovery_date', 'is_champion', 'mega_id'
+        ])
     
-    for _, row in mega_df.iterrows():
-        try:
-            # Calcul bioactivité basé sur les propriétés MEGA
-            bioactivity = calculate_bioactivity_score(row)
-            
-            # Détermination statut champion
-            is_champion = (
-                bioactivity > 0.8 and 
-                pd.notna(row.get('Nom', '')) and
-                len(str(row.get('Nom', ''))) > 5
-            )
-            
-            formatted_data.append({
-                'name': str(row.get('Nom', f'MEGA_{len(formatted_data):05d}')),
-                'molecular_weight': extract_molecular_weight(row),
-                'bioactivity_score': bioactivity,
-                'targets': estimate_targets(row),
-                'toxicity': estimate_toxicity(row),
-                'logp': extract_logp(row),
-                'solubility': estimate_solubility(row),
-                'molecular_family': classify_molecular_family(row),
-                'discovery_date': (datetime.now() - pd.Timedelta(days=np.random.randint(1, 365))).strftime('%Y-%m-%d'),
-                'is_champion': is_champion,
-                'mega_id': f"MEGA_REAL_{len(formatted_data):06d}"
-            })
-            
-        except Exception as e:
-            continue  # Skip problematic entries
+    raw_names = mega_df['Nom'] if 'Nom' in mega_df.columns else pd.Series([None] * len(mega_df))
+    raw_names = raw_names.reset_index(drop=True)
+    has_name = raw_names.notna().to_numpy()
+    
+    names = raw_names.astype(str)
+    if not has_name.all():
+        placeholders = pd.Series([f'MEGA_{i:05d}' for i in range(len(names))])
+        names = names.where(has_name, placeholders)
+    
+    name_hash = stable_name_hash(names)
+    noise = {column: stable_uniform(name_hash, stream) for column, stream in _NOISE_STREAMS.items()}
     
-    return pd.DataFrame(formatted_data)
+    bioactivity = calculate_bioactivity_score(names, noise['bioactivity'])
+    is_champion = (bioactivity > 0.8) & has_name & (names.str.len().to_numpy() > 5)
+    
+    today = np.datetime64(datetime.now().date(), 'D')
+    days_ago = (1 + noise['discovery_date'] * 364).astype('timedelta64[D]')
+    
+    return pd.DataFrame({
+        'name': names.to_numpy(),
+        'molecular_weight': extract_molecular_weight(mega_df, noise['molecular_weight']),
+        'bioactivity_score': bioactivity,
+        'targets': estimate_targets(noise['targets']),
+        'toxicity': estimate_toxicity(noise['toxicity']),
+        'logp': extract_logp(mega_df, noise['logp']),
+        'solubility': estimate_solubility(noise['solubility']),
+        'molecular_family': classify_molecular_family(noise['family']),
+        'discovery_date': (today - days_ago).astype(str),
+        'is_champion': is_champion,
+        'mega_id': stable_mega_ids(name_hash, source_row_numbers(mega_df))
+    })
+
+# Colonnes des autres sources (JSON, Hugging Face, CSV embarqués) → colonnes MEGA brutes
+_MEGA_COLUMN_ALIASES = {
+    'Nom': ('name', 'compound_name', 'molecule_name', 'title'),
+    'Poids_Moléculaire': ('molecular_weight', 'mol_weight', 'mw'),
+    'SMILES': ('smiles', 'canonical_smiles'),
+}
+
+# Colonnes du format application qu'une source peut déjà fournir (valeurs conservées)
+_SOURCE_APP_COLUMNS = (
+    'bioactivity_score', 'targets', 'toxicity', 'logp', 'solubility', 'molecular_family',
+    'discovery_date', 'is_champion', 'mega_id', 'dataset_split',
+)
+
+def normalize_compounds(source_df, keep_smiles=True):
+    """
+    Table de composés d'une source quelconque au format application
+    
+    Les colonnes sont ramenées aux noms MEGA bruts puis converties par
+    format_mega_for_streamlit ; les valeurs que la source fournit déjà au
+    format application (score, cibles, champion...) remplacent les
+    estimations. keep_smiles ajoute la colonne smiles (si la source en a).
+    """
+    renames = {}
+    for target, aliases in _MEGA_COLUMN_ALIASES.items():
+        if target not in source_df.columns:
+            alias = next((column for column in aliases if column in source_df.columns), None)
+            if alias is not None:
+                renames[alias] = target
+    mega_df = source_df.rename(columns=renames)
+    formatted = format_mega_for_streamlit(mega_df)
+    
+    for column in _SOURCE_APP_COLUMNS:
+        if column in source_df.columns:
+            values = source_df[column].reset_index(drop=True)
+            formatted[column] = values.where(values.notna(), formatted.get(column)) if column in formatted else values
+    if keep_smiles and 'SMILES' in mega_df.columns:
+        formatted['smiles'] = mega_df['SMILES'].to_numpy()
+    return formatted
 
-def calculate_bioactivity_score(row):
+def calculate_bioactivity_score(names, u):
     """Calcul score bioactivité basé sur propriétés MEGA"""
-    base_score = 0.5
+    base_score = np.full(len(names), 0.5)
     
     # Bonus basé sur le nom (heuristique qualité)
-    name = str(row.get('Nom', ''))
-    if len(name) > 8:
-        base_score += 0.1
-    if any(char.isdigit() for char in name):
-        base_score += 0.05
+    base_score += np.where(names.str.len().to_numpy() > 8, 0.1, 0.0)
+    base_score += np.where(names.str.contains(r'\d', regex=True).to_numpy(), 0.05, 0.0)
     
-    # Ajustements aléatoires réalistes
-    base_score += np.random.uniform(-0.1, 0.4)
+    # Ajustements pseudo-aléatoires réalistes dans [-0.1, 0.4)
+    base_score += u * 0.5 - 0.1
     
-    return max(0.2, min(0.95, base_score))
+    return np.clip(base_score, 0.2, 0.95)
 
-def extract_molecular_weight(row):
-    """Extraction poids moléculaire (simulated from MEGA structure)"""
+def _persisted_descriptor(mega_df, name):
+    """Descripteur RDKit persisté de chaque ligne (NaN si SMILES absent du store)"""
+    if 'SMILES' not in mega_df.columns or not DESCRIPTORS_PATH.exists():
+        return np.full(len(mega_df), np.nan)
+    from mega_descriptors import load_descriptor_store, lookup_descriptors
+    if len(load_descriptor_store()) == 0:
+        return np.full(len(mega_df), np.nan)
+    return lookup_descriptors(mega_df['SMILES'], [name])[name].to_numpy(dtype=np.float64, na_value=np.nan)
+
+def extract_molecular_weight(mega_df, u):
+    """Extraction poids moléculaire : descripteurs calculés, sinon poids MEGA, sinon simulé"""
+    weight = _persisted_descriptor(mega_df, 'molecular_weight')
+    if 'Poids_Moléculaire' in mega_df.columns:
+        mega_weight = pd.to_numeric(mega_df['Poids_Moléculaire'], errors='coerce')
+        weight = np.where(np.isnan(weight), mega_weight.to_numpy(dtype=np.float64, na_value=np.nan), weight)
     # Distribution réaliste basée sur analyse MEGA
-    return round(np.random.uniform(200, 800), 1)
+    return np.round(np.where(np.isnan(weight), 200 + u * 600, weight), 1)
 
-def extract_logp(row):
-    """Extraction logP (simulated)"""
-    return round(np.random.uniform(-1, 5), 2)
+def extract_logp(mega_df, u):
+    """Extraction logP : descripteurs calculés, sinon simulé"""
+    logp = _persisted_descriptor(mega_df, 'logp')
+    return np.round(np.where(np.isnan(logp), -1 + u * 6, logp), 2)
 
-def estimate_targets(row):
-    """Estimation nombre de cibles"""
-    return np.random.randint(1, 6)
+def estimate_targets(u):
+    """Estimation nombre de cibles (1 à 5)"""
+    return (1 + np.floor(u * 5)).astype(np.int64)
 
-def estimate_toxicity(row):
+def estimate_toxicity(u):
     """Estimation toxicité"""
-    return np.random.choice(['Faible', 'Modérée', 'Élevée'], p=[0.6, 0.3, 0.1])
+    return _choice(TOXICITY_LEVELS, [0.6, 0.3, 0.1], u)
 
-def estimate_solubility(row):
+def estimate_solubility(u):
     """Estimation solubilité"""
-    return np.random.choice(['Bonne', 'Modérée', 'Faible'], p=[0.4, 0.4, 0.2])
+    return _choice(SOLUBILITY_LEVELS, [0.4, 0.4, 0.2], u)
 
-def classify_molecular_family(row):
+def classify_molecular_family(u):
     """Classification famille moléculaire"""
-    return np.random.choice(['Flavonoïdes', 'Polyphénols', 'Terpènes', 'Alcaloïdes', 'Saponines', 'Autres'], 
-                           p=[0.25, 0.20, 0.15, 0.15, 0.10, 0.15])
+    return _choice(MOLECULAR_FAMILIES, [0.25, 0.20, 0.15, 0.15, 0.10, 0.15], u)
 
 def create_fallback_mega_dataset():
     """Dataset de fallback si MEGA indisponible"""
@@ -178,27 +297,78 @@ def get_mega_connector(mode="balanced"):
     """Récupération du connecteur MEGA 1.4M"""
     global mega_streamlit_connector
     if mega_streamlit_connector is None:
-        df, status = load_mega_streamlit_dataset(mode=mode)
+        # Chemin données seul : aussi appelé depuis le thread de préchargement
+        df, status, _ = build_mega_streamlit_dataset(mode=mode)
         mega_streamlit_connector = {
             'data': df,
             'status': status,
             'loaded_at': datetime.now(),
-            'total_mega_size': 1414328  # Taille réelle base MEGA
+            'total_mega_size': get_mega_repository().total_rows  # Taille réelle base MEGA
         }
     return mega_streamlit_connector
 
-def search_mega_molecules(search_term, max_results=100):
-    """Recherche dans le dataset MEGA 1.4M"""
-    connector = get_mega_connector()
-    df = connector['data']
-    
+def search_mega_molecules(search_term, max_results=100, mode="Partiel"):
+    """Recherche dans le dataset MEGA 1.4M (mode Exact, Partiel, Intelligent ou Sous-structure)"""
     if search_term and len(search_term) >= 2:
-        mask = df['name'].str.contains(search_term, case=False, na=False)
-        results = df[mask].head(max_results)
-        return results, f"🔍 {len(results)} résultats pour '{search_term}' (Base MEGA 1.4M)"
+        results = search_by_mode(search_term, mode, max_results)
+        return results, f"🔍 {len(results)} résultats pour '{search_term}' ({mode}, Base MEGA 1.4M)"
     
     return pd.DataFrame(), "❌ Terme de recherche trop court"
 
+def filter_mega_molecules(search_term=None, search_mode="Partiel", bioactivity_range=None,
+                          weight_range=None, toxicity=None, page_size=PAGE_SIZE, cursor=None):
+    """
+    Filtres avancés évalués sur toute la base MEGA (pas seulement sur les résultats affichés)
+
+    Returns:
+        Page : composés de la page par bioactivité décroissante, nombre total
+        de composés filtrés et curseur de la page suivante
+    """
+    repository = get_mega_repository()
+    ranges = {}
+    if bioactivity_range is not None:
+        ranges['bioactivity_score'] = tuple(float(bound) for bound in bioactivity_range)
+    if weight_range is not None:
+        ranges['molecular_weight'] = tuple(float(bound) for bound in weight_range)
+    toxicity = tuple(sorted(toxicity)) if toxicity is not None else None
+    categories = {'toxicity': toxicity} if toxicity is not None else None
+
+    def run_query():
+        within = search_rows(search_term, search_mode, repository=repository) if search_term else None
+        return paginate_query(get_filter_engine(repository), repository.generation,
+                              ranges, categories, within, cursor, page_size)
+
+    # Clé canonique : mêmes filtres saisis différemment → même entrée de cache
+    # (sauf un motif de sous-structure, dont la casse a un sens)
+    term_key = search_term if search_mode == SUBSTRUCTURE_MODE else normalize_name(search_term)
+    key = ('filter_page', term_key if search_term else None, search_mode,
+           tuple(sorted(ranges.items())), toxicity, cursor, page_size, repository.generation)
+    rows, total, start, next_cursor = get_query_cache().get_or_compute(key, run_query)
+    return Page(repository.compounds.iloc[rows], total, page_size, start, cursor, next_cursor)
+
+def get_mega_filter_bounds():
+    """Bornes des filtres sur toute la base : (min, max) du poids moléculaire, toxicités possibles"""
+    engine = get_filter_engine()
+    return engine.bounds('molecular_weight'), engine.categories('toxicity')
+
+def suggest_mega_molecules(prefix, max_suggestions=8):
+    """Complétions d'un début de nom, meilleurs scores de bioactivité d'abord"""
+    if not prefix:
+        return []
+    return get_prefix_index().suggest(prefix, max_suggestions)
+
+def lookup_mega_molecule(name):
+    """Composé(s) portant exactement ce nom (choix dans les suggestions)"""
+    repository = get_mega_repository()
+    return repository.compounds.iloc[get_prefix_index(repository).lookup(name)]
+
+def find_similar_mega_molecules(name, count=5, min_similarity=0.0):
+    """Composés structurellement les plus proches (Tanimoto sur empreintes ECFP4), colonne similarity ajoutée"""
+    from mega_fingerprints import similar_rows
+    repository = get_mega_repository()
+    rows, similarities = similar_rows(name, count, min_similarity, repository)
+    return repository.compounds.iloc[rows].assign(similarity=similarities)
+
 def get_random_mega_molecules(count=10):
     """Sélection aléatoire dans le dataset MEGA 1.4M"""
     connector = get_mega_connector()
@@ -210,21 +380,37 @@ def get_random_mega_molecules(count=10):
     
     return pd.DataFrame(), "❌ Aucune donnée disponible"
 
+def get_mega_discoveries(seed, count=12):
+    """Découverte aléatoire sur toute la base : champions, haute bioactivité, >670 Da et diversité"""
+    repository = get_mega_repository()
+    compounds = repository.compounds
+    
+    if len(compounds) > 0:
+        rows = discovery_rows(get_bitmap_index(repository), seed)
+        discoveries = compounds.iloc[rows].drop_duplicates(subset=['name']).head(count)
+        return discoveries, f"🎲 {len(discoveries)} molécules découvertes (MEGA 1.4M)"
+    
+    return pd.DataFrame(), "❌ Aucune donnée disponible"
+
+def _mega_stats(repository):
+    """Comptages et moyennes de la table complète du dépôt (bitmaps construits sur cette même table)"""
+    compounds = repository.compounds
+    bitmaps = get_bitmap_index(repository)
+    return {
+        'total_molecules': len(compounds),  # Vraie taille MEGA
+        'loaded_molecules': len(compounds),
+        'champion_molecules': bitmaps.count('champion'),
+        'high_bioactivity': bitmaps.count('high_bioactivity'),
+        'avg_molecular_weight': float(compounds['molecular_weight'].mean()),
+        'families': len(bitmaps.values('molecular_family'))
+    }
+
 def get_mega_stats():
-    """Statistiques du dataset MEGA 1.4M"""
-    connector = get_mega_connector()
-    df = connector['data']
+    """Statistiques du dataset MEGA 1.4M, toutes calculées sur la table complète du dépôt"""
+    repository = get_mega_repository()
     
-    if len(df) > 0:
-        stats = {
-            'total_molecules': connector['total_mega_size'],  # Vraie taille MEGA
-            'loaded_molecules': len(df),
-            'champion_molecules': len(df[df['is_champion'] == True]),
-            'high_bioactivity': len(df[df['bioactivity_score'] > 0.8]),
-            'avg_molecular_weight': df['molecular_weight'].mean(),
-            'families': df['molecular_family'].nunique()
-        }
-        return stats, connector['status']
+    if len(repository.compounds) > 0:
+        return dict(repository.view(('mega_stats',), _mega_stats)), repository.status
     
     return {}, "❌ Données non disponibles"
 
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+🧬 PhytoAI - Déduplication par Structure (SMILES canonique / InChIKey)
+Chaque SMILES distinct est canonisé une fois, par blocs répartis sur des
+processus, et reçoit une clé de structure (InChIKey, ou empreinte au même
+format du SMILES canonique) ; les doublons sont regroupés par table de
+hachage sur cette clé : une même molécule sous plusieurs noms ou plusieurs
+écritures SMILES n'est gardée qu'une fois
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mega_text_normalization import normalize_series
+
+try:
+    from rdkit import Chem, RDLogger
+    from rdkit.Chem import inchi
+    RDLogger.DisableLog('rdApp.*')
+    RDKIT_AVAILABLE = True
+    INCHI_AVAILABLE = inchi.INCHI_AVAILABLE
+except ImportError:
+    RDKIT_AVAILABLE = False
+    INCHI_AVAILABLE = False
+
+CANONICAL_SMILES_COLUMN = 'canonical_smiles'
+STRUCTURE_KEY_COLUMN = 'structure_key'
+
+# Colonnes SMILES reconnues, par ordre de priorité
+SMILES_COLUMNS = ('SMILES', 'smiles', 'Smiles', 'canonical_smiles')
+
+
+def hash_structure(canonical: str) -> str:
+    """Empreinte du SMILES canonique au format InChIKey (14-10-1 caractères)"""
+    digest = hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest().upper()
+    return f"{digest[:14]}-{digest[14:24]}-N"
+
+
+def _key_chunk(smiles: list) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+    """(SMILES canoniques, clés de structure) d'un bloc ; None si le SMILES est invalide"""
+    canonical, keys = [], []
+    for text in smiles:
+        if not RDKIT_AVAILABLE:
+            # Sans RDKit : seules les écritures identiques sont reconnues
+            text = str(text).strip()
+            canonical.append(None)
+            keys.append(hash_structure(text) if text else None)
+            continue
+        mol = Chem.MolFromSmiles(text) if text else None
+        if mol is None:
+            canonical.append(None)
+            keys.append(None)
+            continue
+        canonical_smiles = Chem.MolToSmiles(mol)
+        canonical.append(canonical_smiles)
+        keys.append((inchi.MolToInchiKey(mol) if INCHI_AVAILABLE else None) or hash_structure(canonical_smiles))
+    return canonical, keys
+
+
+def structure_keys(smiles: pd.Series, workers: Optional[int] = None, chunk_size: int = 20_000) -> pd.DataFrame:
+    """
+    SMILES canonique et clé de structure de chaque ligne
+
+    Calculés une fois par SMILES distinct ; les blocs sont répartis sur des
+    processus (1 = séquentiel, None = nb de CPU) dès qu'il y en a plusieurs.
+    """
+    smiles = pd.Series(smiles)
+    codes, uniques = pd.factorize(smiles.reset_index(drop=True))
+    distinct = [str(value) for value in uniques]
+    chunks = [distinct[i:i + chunk_size] for i in range(0, len(distinct), chunk_size)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        results = [_key_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            results = list(pool.map(_key_chunk, chunks))
+
+    # Code -1 (SMILES manquant) → dernière valeur, manquante
+    canonical = np.array([value for chunk, _ in results for value in chunk] + [None], dtype=object)
+    keys = np.array([value for _, chunk in results for value in chunk] + [None], dtype=object)
+    return pd.DataFrame({
+        CANONICAL_SMILES_COLUMN: pd.array(canonical[codes], dtype='string'),
+        STRUCTURE_KEY_COLUMN: pd.array(keys[codes], dtype='string'),
+    }, index=smiles.index)
+
+
+def find_smiles_column(df: pd.DataFrame) -> Optional[str]:
+    return next((column for column in SMILES_COLUMNS if column in df.columns), None)
+
+
+def deduplicate_structures(df: pd.DataFrame, smiles: Optional[pd.Series] = None, name_column: str = 'name',
+                           workers: Optional[int] = None, chunk_size: int = 20_000,
+                           verbose: bool = True) -> pd.DataFrame:
+    """
+    Une ligne par structure : première occurrence gardée, ordre conservé
+
+    Args:
+        df: Composés à dédupliquer
+        smiles: SMILES alignés sur df (colonne SMILES de df si None)
+        name_column: Clé de repli (nom normalisé) des lignes sans SMILES valide ;
+                     les lignes sans SMILES ni nom sont toutes gardées
+        workers: Processus de canonisation (voir structure_keys)
+    """
+    if len(df) == 0:
+        return df
+    if smiles is None:
+        column = find_smiles_column(df)
+        smiles = df[column] if column is not None else pd.Series(pd.NA, index=df.index, dtype='string')
+
+    keys = structure_keys(smiles, workers, chunk_size)[STRUCTURE_KEY_COLUMN]
+    if name_column in df.columns:
+        names = normalize_series(df[name_column])
+        keys = keys.where(keys.notna(), ('nom:' + names).where(names != ''))
+
+    codes, uniques = pd.factorize(keys)
+    keep = (codes < 0) | ~pd.Series(codes).duplicated().to_numpy()
+    if verbose:
+        print(f"🧬 Déduplication structurale: {len(df):,} → {int(keep.sum()):,} composés "
+              f"({len(df) - int(keep.sum()):,} doublons)")
+    return df[keep]
+
+
+if __name__ == "__main__":
+    examples = pd.DataFrame({
+        'name': ['Éthanol', 'Ethyl alcohol', 'Phénol', 'Phenol', 'Aspirine', 'Inconnu'],
+        'SMILES': ['CCO', 'OCC', 'c1ccccc1O', 'Oc1ccccc1', 'CC(=O)Oc1ccccc1C(=O)O', None],
+    })
+    print(structure_keys(examples['SMILES']))
+    print(deduplicate_structures(examples))
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+🧩 PhytoAI - Recherche par Sous-Structure (SMILES / SMARTS)
+Présélection par empreintes de motifs : une molécule ne peut contenir la
+requête que si elle possède tous les bits de l'empreinte de la requête
+(ET vectorisé sur la matrice uint64 memory-mappée) ; seules les molécules
+restantes passent l'appariement exact RDKit, par blocs dans un pool de
+threads partagé, les correspondances étant remontées au fil des blocs
+"""
+
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from mega_cache import fingerprint_cache, get_query_cache
+from mega_columnar_store import MEGA_CACHE_DIR, MEGA_CSV_PATH, load_mega_columnar
+from mega_fingerprints import (BLOCK_ROWS, RDKIT_AVAILABLE, FingerprintStore, StoreRows, compound_smiles,
+                               extend_fingerprint_store, pack_fingerprints, read_fingerprint_store)
+
+if RDKIT_AVAILABLE:
+    from rdkit import Chem, DataStructs
+
+PATTERN_BITS = 2048
+PATTERN_WORDS = PATTERN_BITS // 64
+PATTERNS_PATH = MEGA_CACHE_DIR / f"pattern_fingerprints_{PATTERN_BITS}.npy"
+PATTERN_KEYS_PATH = PATTERNS_PATH.with_suffix(".canonical.parquet")
+
+# Molécules candidates par bloc d'appariement exact
+MATCH_CHUNK_SIZE = 2000
+# Threads d'appariement du processus (RDKit relâche le GIL pendant l'appariement)
+MATCH_WORKERS = min(4, os.cpu_count() or 1)
+
+_match_pool: Optional[ThreadPoolExecutor] = None
+_match_pool_lock = threading.Lock()
+
+# Primitives propres aux SMARTS : numéro atomique ou logique entre crochets, liaison quelconque, récursion
+_SMARTS_ONLY = re.compile(r'\[[^\]]*[#;,&!$]|~|\$\(')
+
+
+def parse_query(text: str):
+    """Requête SMILES, sinon SMARTS (groupes fonctionnels, atomes génériques...) ; None si invalide"""
+    if not RDKIT_AVAILABLE or not text:
+        return None
+    if _SMARTS_ONLY.search(text):
+        # [#7] serait aussi un SMILES valide, mais un azote radicalaire sans hydrogène
+        return Chem.MolFromSmarts(text)
+    return Chem.MolFromSmiles(text) or Chem.MolFromSmarts(text)
+
+
+def _pattern_bits(mol) -> np.ndarray:
+    bits = np.zeros(PATTERN_BITS, dtype=np.uint8)
+    DataStructs.ConvertToNumpyArray(Chem.PatternFingerprint(mol, fpSize=PATTERN_BITS), bits)
+    return bits
+
+
+def _get_match_pool() -> ThreadPoolExecutor:
+    """Pool d'appariement créé au premier besoin, puis réutilisé par toutes les requêtes"""
+    global _match_pool
+    with _match_pool_lock:
+        if _match_pool is None:
+            _match_pool = ThreadPoolExecutor(max_workers=MATCH_WORKERS, thread_name_prefix="phytoai-substructure")
+        return _match_pool
+
+
+def _pattern_chunk(smiles: list) -> np.ndarray:
+    """Empreintes de motifs d'un bloc de SMILES (ligne nulle si invalide)"""
+    bits = np.zeros((len(smiles), PATTERN_BITS), dtype=np.uint8)
+    for i, text in enumerate(smiles):
+        mol = Chem.MolFromSmiles(text) if text else None
+        if mol is not None:
+            bits[i] = _pattern_bits(mol)
+    return pack_fingerprints(bits)
+
+
+def _match_chunk(query, smiles: list) -> np.ndarray:
+    """Appariement exact d'un bloc de candidats (requête déjà analysée, partagée entre threads)"""
+    matched = np.zeros(len(smiles), dtype=bool)
+    for i, text in enumerate(smiles):
+        mol = Chem.MolFromSmiles(text)
+        matched[i] = mol is not None and mol.HasSubstructMatch(query)
+    return matched
+
+
+@fingerprint_cache(paths=(str(PATTERNS_PATH), str(PATTERN_KEYS_PATH)), maxsize=1, copy=False)
+def load_pattern_store() -> FingerprintStore:
+    """Store des empreintes de motifs (vide s'il n'existe pas encore)"""
+    return read_fingerprint_store(PATTERNS_PATH, PATTERN_KEYS_PATH, PATTERN_WORDS, _pattern_chunk)
+
+
+def update_pattern_store(smiles: Iterable[str], workers: Optional[int] = None,
+                         chunk_size: int = 20_000) -> FingerprintStore:
+    """Ajoute au store les empreintes de motifs des structures qui n'y sont pas encore"""
+    if extend_fingerprint_store(load_pattern_store(), smiles, PATTERNS_PATH, PATTERN_KEYS_PATH,
+                                _pattern_chunk, workers, chunk_size):
+        load_pattern_store.clear()
+    return load_pattern_store()
+
+
+def screen(query: np.ndarray, words: np.ndarray) -> np.ndarray:
+    """
+    Lignes de words possédant tous les bits de query (candidates à l'appariement)
+
+    Seuls les mots non nuls de la requête sont comparés, colonne par
+    colonne, par blocs de BLOCK_ROWS lignes.
+    """
+    columns = np.flatnonzero(query)
+    survivors = []
+    for start in range(0, len(words), BLOCK_ROWS):
+        block = np.asarray(words[start:start + BLOCK_ROWS])
+        keep = np.ones(len(block), dtype=bool)
+        for column in columns:
+            keep &= (block[:, column] & query[column]) == query[column]
+        survivors.append(start + np.flatnonzero(keep))
+    return np.concatenate(survivors) if survivors else np.empty(0, dtype=np.int64)
+
+
+class SubstructureIndex:
+    """
+    Recherche des composés contenant une sous-structure
+
+    Présélection sur les empreintes de motifs distinctes du store, puis
+    appariement exact des seuls SMILES canoniques candidats ; chaque
+    correspondance vaut pour tous les composés de cette structure.
+    """
+
+    def __init__(self, store: FingerprintStore, smiles: Optional[pd.Series]):
+        self.store = store
+        self.rows = StoreRows(store.smiles, smiles)
+
+    @property
+    def available(self) -> bool:
+        return RDKIT_AVAILABLE and self.rows.covered > 0
+
+    def _screen(self, query) -> np.ndarray:
+        if query is None or not self.available:
+            return np.empty(0, dtype=np.int64)
+        survivors = screen(pack_fingerprints(_pattern_bits(query)[None, :])[0], self.store.words)
+        return survivors[self.rows.sizes[survivors] > 0]
+
+    def candidates(self, query_text: str) -> np.ndarray:
+        """Lignes du store passant la présélection (et portées par au moins un composé)"""
+        return self._screen(parse_query(query_text))
+
+    def iter_matches(self, query_text: str, workers: Optional[int] = None,
+                     chunk_size: int = MATCH_CHUNK_SIZE) -> Iterator[np.ndarray]:
+        """
+        Positions des composés correspondants, bloc de candidats par bloc
+
+        La requête est analysée une fois ; au plus workers blocs (plafonné à
+        MATCH_WORKERS) sont en cours dans le pool partagé, remontés dans
+        l'ordre. Interrompre l'itération annule les blocs non commencés.
+        """
+        query = parse_query(query_text)
+        candidates = self._screen(query)
+        smiles = self.store.smiles.take(candidates).tolist()
+        chunks = [slice(i, i + chunk_size) for i in range(0, len(candidates), chunk_size)]
+        workers = min(workers or MATCH_WORKERS, MATCH_WORKERS, len(chunks))
+
+        if workers <= 1:
+            for chunk in chunks:
+                yield self.rows.rows_of(candidates[chunk][_match_chunk(query, smiles[chunk])])
+            return
+
+        pool = _get_match_pool()
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(_match_chunk, query, smiles[chunk])))
+                if len(pending) >= workers:
+                    done, future = pending.popleft()
+                    yield self.rows.rows_of(candidates[done][future.result()])
+            while pending:
+                done, future = pending.popleft()
+                yield self.rows.rows_of(candidates[done][future.result()])
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def get_substructure_index(repository=None) -> SubstructureIndex:
+    """
+    Index de sous-structures du dépôt MEGA sur le store de motifs actuel
+
+    Reconstruit une fois par version des données et par taille du store
+    (structures déjà persistées seulement tant qu'il est en cours de calcul).
+    """
+    if repository is None:
+        from mega_data_repository import get_mega_repository
+        repository = get_mega_repository()
+    store = load_pattern_store()
+    return repository.view(('substructure_index', len(store)),
+                           lambda repo: SubstructureIndex(store, compound_smiles(repo)))
+
+
+def substructure_rows(query_text: str, limit: Optional[int] = None, repository=None) -> np.ndarray:
+    """
+    Positions (croissantes) des composés contenant la sous-structure
+
+    Avec limit, l'appariement s'arrête dès que limit composés sont trouvés.
+    Résultats partagés entre sessions par le cache de requêtes, sur la
+    requête telle que saisie (la casse d'un SMILES a un sens).
+    """
+    if repository is None:
+        from mega_data_repository import get_mega_repository
+        repository = get_mega_repository()
+
+    def compute():
+        found, total = [], 0
+        for rows in get_substructure_index(repository).iter_matches(query_text.strip()):
+            found.append(rows)
+            total += len(rows)
+            if limit is not None and total >= limit:
+                break
+        rows = np.sort(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+        return rows[:limit].astype(np.int64)
+
+    key = ('substructure_rows', query_text.strip(), limit, repository.generation, len(load_pattern_store()))
+    return get_query_cache().get_or_compute(key, compute)
+
+
+if __name__ == "__main__":
+    import time
+
+    started = time.time()
+    raw = load_mega_columnar(columns=['SMILES'], csv_path=MEGA_CSV_PATH)
+    store = update_pattern_store(raw['SMILES'])
+    print(f"🧩 {len(store):,} empreintes de motifs en {time.time() - started:.1f}s")
+
+    from mega_data_repository import get_mega_repository
+
+    repository = get_mega_repository()
+    index = get_substructure_index(repository)
+    for query in ('c1ccccc1O', 'C(=O)O', '[NX3;H0](C)(C)C'):
+        started = time.time()
+        candidates = index.candidates(query)
+        rows = substructure_rows(query, repository=repository)
+        print(f"🧩 {query}: {len(candidates):,} candidats, {len(rows):,} composés "
+              f"({(time.time() - started) * 1000:.0f} ms)")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+🔤 PhytoAI - Normalisation des Noms et Synonymes FR ↔ EN
+Accents, casse, ponctuation et synonymes ramenés à une forme canonique
+unique : appliquée une fois au chargement (colonne name_normalized), elle
+est partagée par tous les index de recherche ; côté requête, un terme déjà
+vu se normalise par une seule lecture de dictionnaire
+"""
+
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+NORMALIZED_NAME_COLUMN = 'name_normalized'
+
+# Forme repliée (sans accents) → nom canonique anglais
+SYNONYMS: Dict[str, str] = {
+    'curcumine': 'curcumin', 'curcuma': 'curcumin', 'turmeric': 'curcumin',
+    'quercetine': 'quercetin',
+    'resveratrol': 'resveratrol',
+    'egcg': 'epigallocatechin', 'epigallocatechine': 'epigallocatechin',
+    'catechine': 'catechin',
+    'baicaline': 'baicalin', 'baicaleine': 'baicalein',
+    'luteoline': 'luteolin',
+    'apigenine': 'apigenin',
+    'kaempferol': 'kaempferol',
+    'anthocyane': 'anthocyanin', 'anthocyanine': 'anthocyanin',
+    'flavonoide': 'flavonoid', 'flavonoides': 'flavonoid', 'flavonoids': 'flavonoid',
+    'polyphenol': 'polyphenol', 'polyphenols': 'polyphenol',
+    'ginkgolide': 'ginkgolide', 'ginkgo': 'ginkgo', 'ginseng': 'ginseng',
+    'silymarine': 'silymarin',
+    'ginsenoside': 'ginsenoside',
+    'berberine': 'berberine',
+    'genisteine': 'genistein',
+    'naringenine': 'naringenin',
+    'hesperidine': 'hesperidin',
+    'rutine': 'rutin',
+    'cafeine': 'caffeine',
+    'capsaicine': 'capsaicin',
+    'piperine': 'piperine',
+}
+
+# Marques diacritiques supprimées, ponctuation et symboles remplacés par un espace
+_FOLD_TABLE = {}
+for _code in range(0x10000):  # plan multilingue de base
+    _category = unicodedata.category(chr(_code))
+    if _category == 'Mn':
+        _FOLD_TABLE[_code] = None
+    elif _category[0] in 'PSZ' or _category == 'Cc':
+        _FOLD_TABLE[_code] = ' '
+del _code, _category
+
+
+def fold_text(text) -> str:
+    """Accents, casse et ponctuation repliés (sans synonymes)"""
+    if text is None or text != text:  # None ou NaN
+        return ''
+    text = str(text)
+    if text.isascii() and text.isalnum():
+        return text.lower()
+    folded = unicodedata.normalize('NFKD', text).translate(_FOLD_TABLE).casefold()
+    return ' '.join(folded.split())
+
+
+def _canonical(folded: str) -> str:
+    if folded in SYNONYMS:
+        return SYNONYMS[folded]
+    if ' ' not in folded:
+        return folded
+    return ' '.join(SYNONYMS.get(token, token) for token in folded.split(' '))
+
+
+@lru_cache(maxsize=65536)
+def normalize_text(text) -> str:
+    """Forme canonique d'un nom ou d'un terme de recherche (mémorisée)"""
+    return _canonical(fold_text(text))
+
+
+def normalize_series(names: pd.Series) -> pd.Series:
+    """Forme canonique de chaque nom : calculée une fois par valeur distincte"""
+    codes, uniques = pd.factorize(names.reset_index(drop=True))
+    uniques = pd.Series(uniques, dtype='string')
+    # Noms ASCII alphanumériques hors synonymes (la grande majorité) : casse seule, vectorisée
+    canonical = uniques.str.lower()
+    slow = ~uniques.str.fullmatch(r'[A-Za-z0-9]+').fillna(False).to_numpy(dtype=bool)
+    slow |= canonical.isin(list(SYNONYMS)).to_numpy()
+    # Tableau (pas une liste) : accepté même quand toutes les valeurs sont lentes
+    canonical[slow] = np.array([_canonical(fold_text(name)) for name in uniques[slow]], dtype=object)
+    # code -1 (valeur manquante) → chaîne vide
+    values = pd.concat([canonical, pd.Series([''], dtype='string')], ignore_index=True).array
+    return pd.Series(values.take(codes), index=names.index, dtype='string')
+
+
+def add_normalized_names(compounds: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute la colonne name_normalized à l'ingestion (si absente)"""
+    if 'name' not in compounds.columns or NORMALIZED_NAME_COLUMN in compounds.columns:
+        return compounds
+    return compounds.assign(**{NORMALIZED_NAME_COLUMN: normalize_series(compounds['name'])})
+
+
+def known_compounds() -> List[str]:
+    """Noms canoniques connus de la table de synonymes"""
+    return sorted(set(SYNONYMS.values()))
+
+
+def find_known_compounds(text: str) -> List[str]:
+    """Composés connus cités dans un texte libre (noms canoniques, ordre d'apparition)"""
+    folded = fold_text(text)
+    found = []
+    for token in folded.split():
+        canonical = SYNONYMS.get(token)
+        if canonical is None and token.endswith('s'):
+            canonical = SYNONYMS.get(token[:-1])
+        if canonical is not None and canonical not in found:
+            found.append(canonical)
+    return found
+
+
+if __name__ == "__main__":
+    for sample in ('Curcumine', 'Quercétine-3-O-glucoside', 'RESVÉRATROL', 'Flavonoïdes', 'β-carotène'):
+        print(f"🔤 {sample!r} → {normalize_text(sample)!r}")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+🏅 PhytoAI - Sélection des k Meilleurs sans Tri Complet
+Sélection partielle (np.partition, O(n)) puis tri des seuls k retenus
+(O(k log k)) ; à score égal, l'ordre de la table départage, de sorte que
+le résultat est identique à un tri stable suivi de head(k)
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+def top_k(scores: np.ndarray, k: Optional[int], positions: Optional[np.ndarray] = None,
+          ascending: bool = False) -> np.ndarray:
+    """
+    Positions des k meilleurs scores, du meilleur au moins bon
+
+    Args:
+        scores: Score de chaque candidat (NaN classés en dernier)
+        k: Nombre de positions retournées (toutes, triées, si None)
+        positions: Positions associées aux scores (0..n-1 si None), départagent les égalités
+        ascending: Plus petit score d'abord (ex: distances)
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    positions = np.arange(len(scores)) if positions is None else np.asarray(positions)
+    # Clé à maximiser, NaN relégués en fin
+    keys = -scores if ascending else scores.copy()
+    keys[np.isnan(keys)] = -np.inf
+
+    n = len(keys)
+    if k is not None and k <= 0:
+        return positions[:0]
+    if k is not None and n > k:
+        kth = np.partition(keys, n - k)[n - k]
+        better = np.flatnonzero(keys > kth)
+        ties = np.flatnonzero(keys == kth)
+        # Égalités au seuil : les premières positions seulement
+        ties = ties[np.argsort(positions[ties], kind='stable')[:k - len(better)]]
+        selected = np.concatenate([better, ties])
+    else:
+        selected = np.arange(n)
+    order = np.lexsort((positions[selected], -keys[selected]))
+    return positions[selected[order]]
+
+
+def top_k_frame(df: pd.DataFrame, column: str, k: Optional[int], ascending: bool = False) -> pd.DataFrame:
+    """Équivalent de df.sort_values(column, ascending, kind='stable').head(k) sans trier toute la table"""
+    scores = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    return df.iloc[top_k(scores, k, ascending=ascending)]
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    scores = rng.random(1_400_000).astype(np.float32)
+    started = time.time()
+    best = top_k(scores, 100)
+    print(f"🏅 top-100 sur {len(scores):,} scores en {(time.time() - started) * 1000:.1f} ms")
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+🔥 PhytoAI - Préchargement MEGA en Arrière-Plan
+Chargement du dépôt, construction des index et précalcul des statistiques
+dans un thread dédié dès le démarrage ; les pages consultent l'état de
+préparation et affichent une vue dégradée rapide en attendant. Les calculs
+longs (stores d'empreintes) suivent en tâches de fond, l'application étant
+déjà prête
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+
+_ready = threading.Event()
+
+# Étapes ordonnées : nom → (libellé, fonction sans argument)
+_steps = OrderedDict()
+# Tâches de fond, exécutées après les étapes sans retarder l'état prêt
+_jobs = OrderedDict()
+
+_state = {
+    'status': 'pending',      # pending | running | ready | failed
+    'current_step': None,
+    'completed': [],
+    'errors': {},
+    'started_at': None,
+    'finished_at': None,
+    'background': {},         # tâche → pending | running | done | failed
+}
+
+
+def register_warmup_step(name: str, label: str, func: Callable[[], object]):
+    """
+    Ajoute (ou remplace) une étape de préchargement
+
+    Idempotent : Streamlit réexécute le script à chaque interaction, une
+    même étape peut donc être enregistrée plusieurs fois sans doublon.
+    Une étape ajoutée après le démarrage est exécutée en fin de file.
+    """
+    with _lock:
+        _steps[name] = (label, func)
+
+
+def register_background_job(name: str, label: str, func: Callable[[], object]):
+    """
+    Ajoute (ou remplace) une tâche de fond
+
+    Exécutée dans le thread de préchargement une fois toutes les étapes
+    terminées : is_warming_up() est déjà faux, les pages servent les
+    données MEGA pendant qu'elle tourne. Sans effet après la fin du thread.
+    """
+    with _lock:
+        _jobs[name] = (label, func)
+        _state['background'].setdefault(name, 'pending')
+
+
+def _run_steps():
+    index = 0
+    while True:
+        with _lock:
+            pending = list(_steps.items())[index:]
+            if not pending:
+                _state['current_step'] = None
+                _state['finished_at'] = time.time()
+                # Prêt dès que le dépôt est chargé ; les autres échecs restent visibles
+                _state['status'] = 'failed' if 'repository' in _state['errors'] else 'ready'
+                _ready.set()
+                return
+        name, (label, func) = pending[0]
+        index += 1
+
+        with _lock:
+            _state['current_step'] = label
+        started = time.time()
+        try:
+            func()
+            with _lock:
+                _state['completed'].append(name)
+            print(f"🔥 Préchargement {label}: {time.time() - started:.1f}s")
+        except Exception as e:
+            with _lock:
+                _state['errors'][name] = str(e)
+            print(f"⚠️ Préchargement {label} échoué: {e}")
+
+
+def _run_jobs():
+    index = 0
+    while True:
+        with _lock:
+            pending = list(_jobs.items())[index:]
+            if not pending:
+                return
+            name, (label, func) = pending[0]
+            _state['background'][name] = 'running'
+        index += 1
+
+        started = time.time()
+        try:
+            func()
+            with _lock:
+                _state['background'][name] = 'done'
+            print(f"🔥 Tâche de fond {label}: {time.time() - started:.1f}s")
+        except Exception as e:
+            with _lock:
+                _state['background'][name] = 'failed'
+                _state['errors'][name] = str(e)
+            print(f"⚠️ Tâche de fond {label} échouée: {e}")
+
+
+def _run():
+    _run_steps()
+    # Pas de tâche de fond si le dépôt n'a pas pu être chargé
+    if is_warm():
+        _run_jobs()
+
+
+def start_warmup() -> bool:
+    """Démarre le préchargement une seule fois par processus ; True si lancé par cet appel"""
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return False
+        _state['status'] = 'running'
+        _state['started_at'] = time.time()
+        _thread = threading.Thread(target=_run, name="phytoai-warmup", daemon=True)
+        _thread.start()
+    return True
+
+
+def get_warmup_state() -> dict:
+    """Instantané de l'état de préchargement (avec progression 0..1 des étapes)"""
+    with _lock:
+        state = dict(_state, completed=list(_state['completed']), errors=dict(_state['errors']),
+                     background=dict(_state['background']))
+        total = len(_steps)
+        failed_steps = sum(1 for name in state['errors'] if name in _steps)
+    state['progress'] = (len(state['completed']) + failed_steps) / total if total else 1.0
+    return state
+
+
+def is_warm() -> bool:
+    """True quand les données MEGA sont prêtes à être servies sans attente"""
+    with _lock:
+        return _state['status'] == 'ready'
+
+
+def is_warming_up() -> bool:
+    """True tant que le préchargement est en cours (pages en mode dégradé)"""
+    with _lock:
+        return _state['status'] == 'running'
+
+
+def wait_until_warm(timeout: Optional[float] = None) -> bool:
+    """Attend la fin des étapes de préchargement (scripts, tests manuels)"""
+    if _thread is not None:
+        _ready.wait(timeout)
+    return is_warm()
+
+
+def wait_for_background_jobs(timeout: Optional[float] = None) -> bool:
+    """Attend la fin des tâches de fond ; True si le thread de préchargement est terminé"""
+    thread = _thread
+    if thread is not None:
+        thread.join(timeout)
+        return not thread.is_alive()
+    return True
+
+
+def _load_repository():
+    from mega_data_repository import get_mega_repository
+    # Table complète lue ici (les index suivants en ont besoin), hors du thread de script
+    get_mega_repository().compounds
+
+
+def _build_name_index():
+    from mega_search_index import get_name_index
+    get_name_index()
+
+
+def _build_search_engines():
+    from mega_fuzzy_search import get_fuzzy_matcher
+    get_fuzzy_matcher()
+
+
+def _build_bm25_index():
+    from mega_bm25_index import get_bm25_index
+    get_bm25_index()
+
+
+def _build_prefix_index():
+    from mega_prefix_index import get_prefix_index
+    get_prefix_index()
+
+
+def _build_filter_engine():
+    from mega_filter_engine import get_filter_engine
+    get_filter_engine()
+
+
+def _build_bitmap_index():
+    from mega_bitmap_index import get_bitmap_index
+    get_bitmap_index()
+
+
+def _build_similarity_index():
+    from mega_fingerprints import get_similarity_index
+    # Sur le store d'empreintes existant (éventuellement vide) : rien n'est calculé ici
+    get_similarity_index()
+
+
+def _extend_fingerprint_store():
+    from mega_columnar_store import PYARROW_AVAILABLE
+    from mega_data_repository import get_mega_repository
+    from mega_fingerprints import RDKIT_AVAILABLE, compound_smiles, get_similarity_index, update_fingerprint_store
+
+    repository = get_mega_repository()
+    smiles = compound_smiles(repository)
+    if smiles is None or not RDKIT_AVAILABLE or not PYARROW_AVAILABLE:
+        return
+    # Structures nouvelles seulement (rien à calculer si le store est à jour), dans ce
+    # thread : pas de pool de processus forké depuis le serveur
+    update_fingerprint_store(smiles, workers=1)
+    # L'index suit la taille du store : reconstruit ici plutôt qu'à la prochaine requête
+    get_similarity_index(repository)
+
+
+def _build_substructure_index():
+    from mega_substructure import get_substructure_index
+    # Sur le store de motifs existant (éventuellement vide) : rien n'est calculé ici
+    get_substructure_index()
+
+
+def _extend_pattern_store():
+    from mega_columnar_store import PYARROW_AVAILABLE
+    from mega_data_repository import get_mega_repository
+    from mega_fingerprints import RDKIT_AVAILABLE, compound_smiles
+    from mega_substructure import get_substructure_index, update_pattern_store
+
+    repository = get_mega_repository()
+    smiles = compound_smiles(repository)
+    if smiles is None or not RDKIT_AVAILABLE or not PYARROW_AVAILABLE:
+        return
+    update_pattern_store(smiles, workers=1)
+    get_substructure_index(repository)
+
+
+def _precompute_connector_stats():
+    from mega_streamlit_connector import get_mega_connector, get_mega_stats
+    # Chemin données seul (vue équilibrée partagée + comptages) : aucun appel st.*
+    # depuis ce thread, les messages de la barre latérale restent au script
+    get_mega_connector()
+    get_mega_stats()
+
+
+register_warmup_step('repository', "dépôt MEGA", _load_repository)
+register_warmup_step('name_index', "index des noms", _build_name_index)
+register_warmup_step('search_engines', "moteurs de recherche", _build_search_engines)
+register_warmup_step('prefix_index', "index d'autocomplétion", _build_prefix_index)
+register_warmup_step('bm25_index', "index BM25 multi-champs", _build_bm25_index)
+register_warmup_step('filter_engine', "moteur de filtres", _build_filter_engine)
+register_warmup_step('bitmap_index', "index bitmap", _build_bitmap_index)
+register_warmup_step('sidebar_stats', "statistiques MEGA", _precompute_connector_stats)
+register_warmup_step('similarity_index', "index de similarité", _build_similarity_index)
+register_warmup_step('substructure_index', "index de sous-structures", _build_substructure_index)
+
+# Calculs longs (RDKit sur toute la base au premier démarrage) : hors de l'état de préparation ;
+# un déploiement peut aussi les faire hors ligne (python mega_fingerprints.py / mega_substructure.py)
+register_background_job('fingerprint_store', "empreintes Morgan", _extend_fingerprint_store)
+register_background_job('pattern_store', "empreintes de motifs", _extend_pattern_store)
+
+
+if __name__ == "__main__":
+    start_warmup()
+    wait_until_warm()
+    wait_for_background_jobs()
+    print(get_warmup_state())
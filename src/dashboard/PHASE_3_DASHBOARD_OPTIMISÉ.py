@@ -37,6 +37,19 @@ except ImportError:
 
 # Ajout path pour imports locaux
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+try:
+    from mega_descriptors import get_molecular_properties
+    DESCRIPTOR_STORE_AVAILABLE = True
+except ImportError:
+    DESCRIPTOR_STORE_AVAILABLE = False
+
+try:
+    from mega_depictions import depiction_data_uri
+    DEPICTION_CACHE_AVAILABLE = True
+except ImportError:
+    DEPICTION_CACHE_AVAILABLE = False
 
 # Configuration optimale Streamlit
 st.set_page_config(
@@ -418,6 +431,10 @@ def generate_molecule_2d_image(smiles: str) -> str:
         return None
     
     try:
+        # Cache des dessins (mémoire puis disque) : pas de rendu RDKit à chaque rerun
+        if DEPICTION_CACHE_AVAILABLE:
+            return depiction_data_uri(smiles, size=(400, 300))
+        
         mol = Chem.MolFromSmiles(smiles)
         if mol is None:
             return None
@@ -520,6 +537,14 @@ def generate_target_specific_smiles(target_protein: str) -> str:
 
 def calculate_molecular_properties(smiles: str) -> Dict:
     """Calcule les propriétés moléculaires (règles de Lipinski, etc.)"""
+    if DESCRIPTOR_STORE_AVAILABLE:
+        # Store de descripteurs précalculés ; calcul RDKit seulement pour une molécule inconnue
+        try:
+            return get_molecular_properties(smiles)
+        except Exception as e:
+            st.error(f"Erreur calcul propriétés: {e}")
+            return {}
+    
     if not RDKIT_AVAILABLE:
         return {}
     
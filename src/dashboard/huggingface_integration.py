@@ -9,11 +9,39 @@ import pandas as pd
 import numpy as np
 from typing import Optional, Tuple
 import logging
+import os
+import sys
+
+# Dépôt MEGA partagé (racine du projet)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from mega_cache import fingerprint_cache
+from mega_data_repository import get_mega_repository
+
+# Sources du dépôt → catégories affichées par display_data_source_info
+_REPOSITORY_SOURCES = {
+    'mega_csv': 'mega_local',
+    'mega_json': 'mega_local',
+    'huggingface_streaming': 'huggingface',
+    'local_complete': 'huggingface',
+    'fallback_csv': 'local_fallback',
+    'simulated': 'local_fallback',
+}
 
 # Configuration logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _load_hf_split(dataset_name: str, split: str, max_rows: Optional[int]) -> pd.DataFrame:
+    """Split Hugging Face en DataFrame (vide si le split n'existe pas)"""
+    from mega_hf_stream import load_hf_dataframe
+
+    try:
+        return load_hf_dataframe(dataset_name, split=split, max_rows=max_rows)
+    except (KeyError, ValueError) as e:
+        logger.info(f"Split '{split}' indisponible: {e}")
+        return pd.DataFrame()
+
+
 @st.cache_data(ttl=3600, show_spinner=True)
 def load_mega_from_huggingface(
     dataset_name: str = "phytoai/mega-phytotherapy-dataset",
@@ -33,73 +61,36 @@ def load_mega_from_huggingface(
     """
     
     try:
-        # Tentative d'import des packages Hugging Face
-        from datasets import load_dataset
+        # Présence des packages Hugging Face (sans les importer)
+        from mega_hf_stream import datasets_available
+        if not datasets_available():
+            raise ImportError("datasets")
         logger.info("🤗 Packages Hugging Face disponibles")
         
-        # Configuration du chargement
-        load_config = {
-            "streaming": streaming,
-            "trust_remote_code": True  # Pour datasets personnalisés
-        }
-        
         st.info(f"🔄 Chargement depuis Hugging Face: {dataset_name}")
         
-        # Chargement du dataset
+        # Chargement par lots Arrow (thread producteur, aucun dict par ligne)
         try:
-            dataset = load_dataset(dataset_name, **load_config)
-            
             if streaming:
-                # Mode streaming - charge par chunks
-                compounds_data = []
-                bioactivities_data = []
-                
-                # Charger les composés en streaming
-                if 'compounds' in dataset:
-                    st.write("📊 Chargement des composés en streaming...")
-                    compounds_stream = dataset['compounds']
-                    
-                    # Prendre un échantillon intelligent
-                    count = 0
-                    for compound in compounds_stream:
-                        compounds_data.append(compound)
-                        count += 1
-                        
-                        if count >= max_compounds:
-                            break
-                    
-                    st.success(f"✅ {len(compounds_data):,} composés chargés depuis Hugging Face")
-                
-                # Charger les bioactivités si disponibles
-                if 'bioactivities' in dataset:
-                    st.write("🧪 Chargement des bioactivités...")
-                    bioactivities_stream = dataset['bioactivities']
-                    
-                    count = 0
-                    for bioactivity in bioactivities_stream:
-                        bioactivities_data.append(bioactivity)
-                        count += 1
-                        
-                        if count >= max_compounds * 3:  # Plus de bioactivités que de composés
-                            break
-                    
-                    st.success(f"✅ {len(bioactivities_data):,} bioactivités chargées")
-                
+                st.write("📊 Chargement des composés en streaming...")
             else:
-                # Mode complet - charge tout (attention mémoire!)
                 st.warning("⚠️ Chargement complet - peut être lent avec gros datasets")
-                
-                compounds_data = list(dataset['compounds']) if 'compounds' in dataset else []
-                bioactivities_data = list(dataset['bioactivities']) if 'bioactivities' in dataset else []
+
+            compounds_df = _load_hf_split(dataset_name, 'compounds',
+                                          max_compounds if streaming else None)
+            if len(compounds_df):
+                st.success(f"✅ {len(compounds_df):,} composés chargés depuis Hugging Face")
+
+            # Plus de bioactivités que de composés
+            bioactivities_df = _load_hf_split(dataset_name, 'bioactivities',
+                                              max_compounds * 3 if streaming else None)
+            if len(bioactivities_df):
+                st.success(f"✅ {len(bioactivities_df):,} bioactivités chargées")
         
         except Exception as hf_error:
             logger.error(f"Erreur Hugging Face: {hf_error}")
             raise hf_error
         
-        # Conversion en DataFrames
-        compounds_df = pd.DataFrame(compounds_data) if compounds_data else pd.DataFrame()
-        bioactivities_df = pd.DataFrame(bioactivities_data) if bioactivities_data else pd.DataFrame()
-        
         # Métadonnées
         metadata = {
             'source': 'huggingface',
@@ -121,7 +112,7 @@ def load_mega_from_huggingface(
         logger.error(f"❌ Erreur chargement Hugging Face: {e}")
         raise e
 
-@st.cache_data(ttl=1800)
+@fingerprint_cache(("real_compounds_dataset.csv",))
 def load_local_fallback() -> Tuple[pd.DataFrame, pd.DataFrame, dict]:
     """
     Fallback sur les données locales si Hugging Face échoue
@@ -151,10 +142,13 @@ def load_phytoai_data_smart(
     max_compounds: int = 10000
 ) -> Tuple[pd.DataFrame, pd.DataFrame, dict]:
     """
-    Chargement intelligent des données PhytoAI avec stratégie de fallback
+    Chargement intelligent des données PhytoAI depuis le dépôt MEGA partagé
+    
+    Le dépôt choisit la source une fois par processus (base MEGA locale,
+    Hugging Face, puis échantillon local) et la partage entre sessions.
     
     Args:
-        prefer_huggingface: Essayer Hugging Face d'abord
+        prefer_huggingface: Conservé pour compatibilité (ordre fixé par le dépôt)
         max_compounds: Limite de composés pour éviter surcharge mémoire
     
     Returns:
@@ -163,31 +157,28 @@ def load_phytoai_data_smart(
     
     st.markdown("### 🔄 Chargement Intelligent des Données PhytoAI")
     
-    if prefer_huggingface:
-        try:
-            # Tentative Hugging Face
-            st.info("🎯 Stratégie #1: Hugging Face (dataset complet)")
-            compounds_df, bioactivities_df, metadata = load_mega_from_huggingface(
-                max_compounds=max_compounds
-            )
-            
-            if len(compounds_df) > 0:
-                st.success(f"🎉 Succès Hugging Face! {len(compounds_df):,} composés chargés")
-                return compounds_df, bioactivities_df, metadata
-            
-        except Exception as e:
-            st.warning(f"⚠️ Hugging Face indisponible: {str(e)[:100]}...")
-            logger.warning(f"Fallback nécessaire: {e}")
-    
-    # Fallback sur données locales
-    st.info("🎯 Stratégie #2: Dataset local (échantillon représentatif)")
     try:
-        compounds_df, bioactivities_df, metadata = load_local_fallback()
-        st.success(f"✅ Fallback réussi! {len(compounds_df):,} composés locaux")
-        return compounds_df, bioactivities_df, metadata
+        repository = get_mega_repository().load()
+        compounds_df = repository.head(max_compounds)
+        bioactivities_df = repository.bioactivities
+        
+        metadata = {
+            'source': _REPOSITORY_SOURCES.get(repository.source, repository.source),
+            'dataset_name': repository.source,
+            'compounds_count': len(compounds_df),
+            'bioactivities_count': len(bioactivities_df),
+            'max_loaded': max_compounds,
+            'note': repository.status
+        }
+        
+        if len(compounds_df) > 0:
+            st.success(f"🎉 {len(compounds_df):,} composés disponibles ({repository.status})")
+            return compounds_df, bioactivities_df, metadata
+        
+        return pd.DataFrame(), pd.DataFrame(), {'source': 'empty', 'error': repository.status}
         
     except Exception as e:
-        st.error(f"❌ Échec des deux stratégies: {e}")
+        st.error(f"❌ Échec du chargement: {e}")
         # Dataset vide en dernier recours
         return pd.DataFrame(), pd.DataFrame(), {'source': 'empty', 'error': str(e)}
 
@@ -206,6 +197,14 @@ def display_data_source_info(metadata: dict):
         - 📈 Limite chargée: {metadata.get('max_loaded', 'N/A'):,}
         """)
         
+    elif source == 'mega_local':
+        st.success(f"""
+        🗄️ **Source: Base MEGA locale** (Dépôt partagé)
+        - 📊 Composés: {metadata.get('compounds_count', 0):,}
+        - 🧪 Bioactivités: {metadata.get('bioactivities_count', 0):,}
+        - ℹ️ Statut: {metadata.get('note', 'N/A')}
+        """)
+        
     elif source == 'local_fallback':
         st.info(f"""
         💾 **Source: Échantillon Local** (Fallback)
@@ -63,6 +63,7 @@ def page_assistant():
             import sys
             import os
             sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+            from mega_text_normalization import normalize_text
             
             # Recherche dans les données MEGA réelles
             mega_path = "phytoai/data/processed/MEGA_FINAL_DATASET_20250602_135508.json"
@@ -71,33 +72,23 @@ def page_assistant():
                 with open(mega_path, 'r') as f:
                     data = json.load(f)
                 
-                # Recherche fuzzy du composé avec variantes
-                compound_variants = [
-                    compound_name.lower(),
-                    compound_name.lower().replace('curcumine', 'curcumin'),
-                    compound_name.lower().replace('quercétine', 'quercetin'),
-                    compound_name.lower().replace('resvératrol', 'resveratrol')
-                ]
+                # Forme canonique (accents, casse, synonymes FR ↔ EN) des deux côtés
+                variant = normalize_text(compound_name)
                 
                 compound_data = None
                 bioactivities = []
                 
                 # Recherche dans tous les composés
                 for compound in data.get('compounds', []):
-                    compound_name_db = compound.get('name', '').lower()
-                    for variant in compound_variants:
-                        if variant in compound_name_db or compound_name_db in variant:
-                            compound_data = compound
-                            break
-                    if compound_data:
+                    compound_name_db = normalize_text(compound.get('name', ''))
+                    if compound_name_db and (variant in compound_name_db or compound_name_db in variant):
+                        compound_data = compound
                         break
                 
                 # Recherche bioactivités associées
                 for activity in data.get('bioactivities', []):
-                    activity_compound = activity.get('compound_name', '').lower()
-                    for variant in compound_variants:
-                        if variant in activity_compound:
-                            bioactivities.append(activity)
+                    if variant in normalize_text(activity.get('compound_name', '')):
+                        bioactivities.append(activity)
                 
                 if compound_data or bioactivities:
                     result = {
@@ -120,31 +111,12 @@ def page_assistant():
     # Fonction d'analyse intelligente de la question
     def analyze_question_for_compounds(question):
         """Analyse intelligente pour détecter composés et concepts"""
-        # Base élargie de composés
-        compound_database = [
-            'curcumin', 'curcumine', 'turmeric', 'curcuma',
-            'resveratrol', 'resvératrol',
-            'quercetin', 'quercétine', 'quercetine', 
-            'epigallocatechin', 'egcg', 'catechin', 'catéchine',
-            'baicalein', 'baicaline',
-            'luteolin', 'lutéoline',
-            'apigenin', 'apigénine',
-            'kaempferol', 'kaempférol',
-            'anthocyanin', 'anthocyane',
-            'flavonoid', 'flavonoide',
-            'polyphenol', 'polyphénol',
-            'ginkgo', 'ginseng', 'ginkgolide',
-            'silymarin', 'silymarine',
-            'ginsenoside', 'ginsénoside'
-        ]
+        from mega_text_normalization import find_known_compounds
         
-        detected_compounds = []
+        # Composés de la table de synonymes, ramenés à leur nom canonique
+        detected_compounds = find_known_compounds(question)
         question_lower = question.lower()
         
-        for compound in compound_database:
-            if compound in question_lower:
-                detected_compounds.append(compound)
-        
         # Détection de concepts thérapeutiques
         therapeutic_concepts = {
             'anti-inflammatoire': ['inflammation', 'anti-inflammatoire', 'cox-2', 'nf-kb'],
@@ -673,6 +645,47 @@ def page_analytics():
             )
             st.plotly_chart(fig_satisfaction, use_container_width=True)
 
+# Colonnes MEGA brutes lues par page_medecine (projection : ni SMILES ni colonnes inutilisées)
+MEDECINE_COLUMNS = [
+    'ID', 'Nom', 'Catégorie', 'Sous-catégorie', 'Tier_Qualité',
+    'Poids_Moléculaire', 'Score_Puissance', 'Index_Sécurité', 'Drug_Likeness',
+]
+
+def _medecine_balanced_view(repository):
+    """Vue équilibrée de la base MEGA brute (construite une fois par processus)"""
+    # 1. Top 2000 composés (meilleurs noms/qualité)
+    top_df = repository.head(2000, raw=True, columns=MEDECINE_COLUMNS)
+
+    # 2. Échantillon représentatif des 1.4M (une passe, quotas par catégorie et >670 Da)
+    sample_df = repository.stratified_sample(
+        3000,
+        raw=True,
+        columns=MEDECINE_COLUMNS,
+        strata=[{'name': 'poids_670', 'column': 'Poids_Moléculaire',
+                 'op': 'gt', 'value': 670, 'quota': 500}],
+        group_quotas={'Catégorie': 150},
+        key_column='Nom',
+    )
+
+    # 3. Combinaison intelligente
+    combined_df = pd.concat([top_df, sample_df], ignore_index=True)
+    return combined_df.drop_duplicates(subset=['Nom'])
+
+def _medecine_full_view(repository):
+    """Premiers composés de la base brute (limite sécurité 100K pour l'interface)"""
+    return repository.head(100000, raw=True, columns=MEDECINE_COLUMNS)
+
+def _medecine_stratified_view(repository):
+    """Lignes régulièrement espacées sur toute la base, après les 1000 premières"""
+    return repository.evenly_spaced(10000, skip_head=1000, raw=True, columns=MEDECINE_COLUMNS)
+
+# Vues du dépôt par mode d'accès : construites une fois par version des données
+MEDECINE_VIEWS = {
+    'full_exploration': (('medecine_full_exploration', 100000), _medecine_full_view),
+    'stratified': (('medecine_stratified', 10000, 1000), _medecine_stratified_view),
+    'balanced': (('medecine_balanced',), _medecine_balanced_view),
+}
+
 def page_medecine():
     """Médecine personnalisée et dosage optimal"""
     st.markdown("## 👥 Médecine Personnalisée")
@@ -718,66 +731,45 @@ def page_medecine():
     with col2:
         st.markdown("<br>", unsafe_allow_html=True)
         if st.button("🔄 Recharger Base", help="Recharger avec le nouveau mode sélectionné"):
-            # Clear cache to force reload
-            load_mega_database.clear()
+            # Vues oubliées : relues depuis le fichier au prochain chargement
+            from mega_data_repository import get_mega_repository
+            repository = get_mega_repository()
+            for key, _ in MEDECINE_VIEWS.values():
+                repository.discard_view(key)
             st.rerun()
     
     # Connexion à la base MEGA
-    @st.cache_data
     def load_mega_database(mode="balanced"):
         """Chargement intelligent de la base MEGA avec différents modes d'accès"""
         try:
-            mega_path = "../phytotherapy-ai-discovery/data/MEGA_COMPOSÉS_20250602_142023.csv"
-            if not os.path.exists(mega_path):
+            import sys
+            sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+            from mega_data_repository import get_mega_repository
+            
+            # Lignes MEGA brutes lues dans le fichier (coût ∝ échantillon, sans charger la base)
+            repository = get_mega_repository()
+            if not repository.file_backed:
                 return None, 0
+            total_rows = repository.total_rows
             
             if mode == "full_exploration":
                 # Mode exploration complète - Accès aux 1.4M composés
                 st.info("🔓 **Mode Exploration Complète** - Accès aux 1.4M composés activé")
-                # Chargement par chunks pour éviter les problèmes mémoire
-                chunk_size = 50000
-                chunks = []
-                total_loaded = 0
+                # Limite sécurité 100K pour l'interface
+                df = repository.view(*MEDECINE_VIEWS['full_exploration'])
                 
-                try:
-                    for chunk in pd.read_csv(mega_path, chunksize=chunk_size):
-                        # Nettoyage de base
-                        chunk = chunk.dropna(subset=['Nom'])
-                        chunk = chunk[chunk['Nom'].str.strip() != '']
-                        chunk = chunk[chunk['Nom'].str.len() > 2]
-                        chunks.append(chunk)
-                        total_loaded += len(chunk)
-                        
-                        # Limite sécurité pour éviter crash interface
-                        if total_loaded > 100000:  # 100K max pour interface
-                            st.warning(f"⚠️ Limite sécurité atteinte : {total_loaded:,} composés chargés")
-                            break
-                    
-                    if chunks:
-                        df = pd.concat(chunks, ignore_index=True)
-                        st.success(f"🎯 **{len(df):,} composés chargés** depuis la base 1.4M")
-                        return df, len(df)
-                    
-                except Exception as e:
-                    st.error(f"❌ Erreur chargement mode complet: {e}")
-                    return None, 0
+                if len(df) > 0:
+                    if len(df) >= 100000:
+                        st.warning(f"⚠️ Limite sécurité atteinte : {len(df):,} composés chargés")
+                    st.success(f"🎯 **{len(df):,} composés chargés** depuis la base 1.4M")
+                    return df, len(df)
                     
             elif mode == "stratified":
                 # Mode échantillonnage stratifié - Représentatif des 1.4M
                 st.info("🎯 **Mode Stratifié** - Échantillon représentatif des 1.4M")
                 
-                # Chargement par tranches représentatives
-                total_rows = sum(1 for line in open(mega_path)) - 1  # -1 pour header
-                sample_size = 10000  # Échantillon plus large
-                
-                # Stratégie d'échantillonnage intelligent
-                skip_interval = max(1, total_rows // sample_size)
-                rows_to_skip = list(range(1, total_rows, skip_interval))[1000:]  # Skip après les 1000 premiers
-                
-                df = pd.read_csv(mega_path, skiprows=rows_to_skip, nrows=sample_size)
-                df = df.dropna(subset=['Nom'])
-                df = df[df['Nom'].str.strip() != '']
-                df = df[df['Nom'].str.len() > 2]
+                # Lignes régulièrement espacées sur toute la base, après les 1000 premières
+                df = repository.view(*MEDECINE_VIEWS['stratified'])
                 
                 st.success(f"📊 **{len(df):,} composés** (échantillon stratifié sur {total_rows:,})")
                 return df, total_rows
@@ -785,24 +777,10 @@ def page_medecine():
             else:  # mode == "balanced" (par défaut)
                 # Mode équilibré - Best of both worlds
                 st.info("⚖️ **Mode Équilibré** - Top composés + échantillon diversifié")
-                
-                # 1. Top 2000 composés (meilleurs noms/qualité)
-                top_df = pd.read_csv(mega_path, nrows=2000)
-                top_df = top_df.dropna(subset=['Nom'])
-                top_df = top_df[top_df['Nom'].str.strip() != '']
-                
-                # 2. Échantillon représentatif du reste
-                skip_rows = list(range(2001, 10000, 5))  # Échantillonnage du milieu
-                sample_df = pd.read_csv(mega_path, skiprows=skip_rows, nrows=3000)
-                sample_df = sample_df.dropna(subset=['Nom'])
-                sample_df = sample_df[sample_df['Nom'].str.strip() != '']
-                
-                # 3. Combinaison intelligente
-                combined_df = pd.concat([top_df, sample_df], ignore_index=True)
-                combined_df = combined_df.drop_duplicates(subset=['Nom'])
+                combined_df = repository.view(*MEDECINE_VIEWS['balanced'])
                 
                 st.success(f"🎯 **{len(combined_df):,} composés** (top qualité + diversité)")
-                return combined_df, 1414328  # Nombre total réel MEGA
+                return combined_df, total_rows
                 
         except Exception as e:
             st.error(f"❌ Erreur chargement base MEGA: {e}")
@@ -127,82 +127,199 @@ try:
     from mega_streamlit_connector import (
         load_mega_streamlit_dataset, 
         search_mega_molecules, 
+        filter_mega_molecules,
+        get_mega_filter_bounds,
+        suggest_mega_molecules,
+        lookup_mega_molecule,
+        find_similar_mega_molecules,
         get_random_mega_molecules, 
+        get_mega_discoveries,
         get_mega_stats
     )
     MEGA_AVAILABLE = True
 except ImportError:
     MEGA_AVAILABLE = False
 
+# Caches invalidés par empreinte des données (plus de TTL fixes)
+from mega_bitmap_index import BitmapIndex, discovery_rows
+from mega_cache import fingerprint_cache, get_query_cache
+from mega_data_repository import repository_version
+from mega_pagination import PAGE_SIZE, paginate_frame
+from mega_text_normalization import normalize_series, normalize_text
+from mega_topk import top_k_frame
+from mega_warmup import get_warmup_state, is_warming_up, register_warmup_step, start_warmup
+
 # Données RÉELLES - 50K Molécules MEGA Représentatives
-@st.cache_data(ttl=3600)
-def load_compound_data(chunk_size=50000, search_term=None):
-    """Chargement intelligent des données de composés réels depuis le dataset MEGA optimisé"""
-    
-    if MEGA_AVAILABLE:
-        # Utilisation du connecteur MEGA optimisé pour Streamlit Cloud
-        try:
-            if search_term and len(search_term) >= 2:
-                # Recherche ciblée dans les 50K molécules MEGA
-                results, status = search_mega_molecules(search_term, 100)
-                
-                if not results.empty:
-                    st.sidebar.success("🟢 CONNECTÉ au dataset MEGA 50K")
-                    st.sidebar.info(f"🔍 {len(results)} résultats trouvés")
-                    
-                    # Conversion au format application
-                    processed_results = []
-                    for _, row in results.iterrows():
-                        processed_results.append({
-                            'name': row['name'],
-                            'bioactivity_score': row['bioactivity_score'],
-                            'targets': row['targets'],
-                            'toxicity': row['toxicity'],
-                            'mol_weight': row['molecular_weight'],
-                            'logp': row['logp'],
-                            'solubility': row['solubility'],
-                            'discovery_date': pd.to_datetime(row['discovery_date']),
-                            'is_champion': row['is_champion'],
-                            'mega_id': row['mega_id']
-                        })
-                    
-                    return pd.DataFrame(processed_results)
-                else:
-                    st.sidebar.warning(f"⚠️ Aucun résultat pour '{search_term}' dans MEGA")
-                    return pd.DataFrame()
-            else:
-                # Chargement de molécules aléatoires depuis MEGA
-                random_molecules, status = get_random_mega_molecules(min(chunk_size, 1000))
-                
-                if not random_molecules.empty:
-                    st.sidebar.success("🟢 CONNECTÉ au dataset MEGA 50K")
-                    st.sidebar.metric("Molécules chargées", f"{len(random_molecules):,}")
-                    
-                    # Conversion au format application
-                    processed_molecules = []
-                    for _, row in random_molecules.iterrows():
-                        processed_molecules.append({
-                            'name': row['name'],
-                            'bioactivity_score': row['bioactivity_score'],
-                            'targets': row['targets'],
-                            'toxicity': row['toxicity'],
-                            'mol_weight': row['molecular_weight'],
-                            'logp': row['logp'],
-                            'solubility': row['solubility'],
-                            'discovery_date': pd.to_datetime(row['discovery_date']),
-                            'is_champion': row['is_champion'],
-                            'mega_id': row['mega_id']
-                        })
-                    
-                    return pd.DataFrame(processed_molecules)
-                else:
-                    return load_fallback_data()
-                    
-        except Exception as e:
-            st.sidebar.error(f"❌ Erreur connecteur MEGA: {e}")
-            return load_fallback_data()
-    else:
+def filter_by_name(df, term):
+    """Lignes dont le nom contient term, avec la même normalisation que les index MEGA"""
+    if len(df) == 0:
+        return df
+    return df[normalize_series(df['name']).str.contains(normalize_text(term), regex=False).to_numpy(dtype=bool)]
+
+def load_compound_data(chunk_size=50000, search_term=None, search_mode="Partiel"):
+    """Données de composés : MEGA une fois préchargé, aperçu simulé rapide avant"""
+    if MEGA_AVAILABLE and is_warming_up():
+        st.info("⏳ Base MEGA en cours de préchargement - aperçu rapide affiché en attendant")
+        preview_df = load_simulated_data()
+        if search_term:
+            preview_df = filter_by_name(preview_df, search_term)
+        return preview_df
+    if not MEGA_AVAILABLE:
         return load_fallback_data()
+    
+    compounds_df, notices = load_mega_compound_data(chunk_size, search_term, search_mode)
+    # Messages rendus ici, à chaque exécution : le cache ne rejoue pas les appels st.*
+    show_sidebar_notices(notices)
+    return load_fallback_data() if compounds_df is None else compounds_df
+
+def show_sidebar_notices(notices):
+    """Affiche les messages (type, contenu) retournés par un chargement mis en cache"""
+    for kind, content in notices:
+        if kind == 'metric':
+            st.sidebar.metric(*content)
+        else:
+            getattr(st.sidebar, kind)(content)
+
+@fingerprint_cache(version=repository_version)
+def load_mega_compound_data(chunk_size=50000, search_term=None, search_mode="Partiel"):
+    """
+    Chargement intelligent des données de composés réels depuis le dataset MEGA optimisé
+    
+    Données seulement (aucun appel st.*, exécutable hors du thread de script) :
+    retourne (composés, messages de la barre latérale) ; composés None →
+    l'appelant bascule sur les données de secours.
+    """
+    # Utilisation du connecteur MEGA optimisé pour Streamlit Cloud
+    try:
+        if search_term and len(search_term) >= 2:
+            # Recherche ciblée dans les 50K molécules MEGA
+            results, status = search_mega_molecules(search_term, 100, search_mode)
+            
+            if not results.empty:
+                # Conversion au format application
+                return _to_app_format(results), [
+                    ('success', "🟢 CONNECTÉ au dataset MEGA 50K"),
+                    ('info', f"🔍 {len(results)} résultats trouvés"),
+                ]
+            return pd.DataFrame(), [('warning', f"⚠️ Aucun résultat pour '{search_term}' dans MEGA")]
+        
+        # Chargement de molécules aléatoires depuis MEGA
+        random_molecules, status = get_random_mega_molecules(min(chunk_size, 1000))
+        
+        if not random_molecules.empty:
+            # Conversion au format application
+            return _to_app_format(random_molecules), [
+                ('success', "🟢 CONNECTÉ au dataset MEGA 50K"),
+                ('metric', ("Molécules chargées", f"{len(random_molecules):,}")),
+            ]
+        return None, []
+    
+    except Exception as e:
+        return None, [('error', f"❌ Erreur connecteur MEGA: {e}")]
+
+# Choix proposés par page_analyse (meilleures bioactivités)
+ANALYSE_MAX_OPTIONS = 100
+
+# Colonnes MEGA → colonnes attendues par les pages
+_APP_COLUMNS = {
+    'name': 'name', 'bioactivity_score': 'bioactivity_score', 'targets': 'targets',
+    'toxicity': 'toxicity', 'molecular_weight': 'mol_weight', 'logp': 'logp',
+    'solubility': 'solubility', 'discovery_date': 'discovery_date',
+    'is_champion': 'is_champion', 'mega_id': 'mega_id'
+}
+
+def _to_app_format(results):
+    """Conversion colonne par colonne d'un résultat MEGA au format application"""
+    app_df = results[list(_APP_COLUMNS)].rename(columns=_APP_COLUMNS).reset_index(drop=True)
+    app_df['discovery_date'] = pd.to_datetime(app_df['discovery_date'])
+    return app_df
+
+@fingerprint_cache(version=repository_version)
+def load_exact_compound(name):
+    """Composé choisi dans les suggestions : accès direct par nom, sans recherche par sous-chaîne"""
+    results = lookup_mega_molecule(name)
+    return _to_app_format(results) if not results.empty else pd.DataFrame()
+
+@fingerprint_cache(version=repository_version)
+def load_filtered_page(search_term, search_mode, bioactivity_range, weight_range, toxicity, cursor=None):
+    """Une page des filtres avancés évalués sur toute la population de la recherche"""
+    page = filter_mega_molecules(search_term, search_mode, bioactivity_range,
+                                 weight_range, toxicity, PAGE_SIZE, cursor)
+    page.items = _to_app_format(page.items) if not page.items.empty else pd.DataFrame()
+    return page
+
+@fingerprint_cache(version=repository_version)
+def load_similar_compounds(name, count=5):
+    """Voisins structuraux d'un composé sur toute la base (Tanimoto sur empreintes ECFP4)"""
+    similar = find_similar_mega_molecules(name, count)
+    if similar.empty:
+        return pd.DataFrame()
+    return _to_app_format(similar).assign(similarity=similar['similarity'].to_numpy())
+
+def get_similar_compounds(name, count=5):
+    """Voisins structuraux, vide hors MEGA, pendant le préchargement ou sans empreintes calculées"""
+    if not MEGA_AVAILABLE or is_warming_up():
+        return pd.DataFrame()
+    return load_similar_compounds(name, count)
+
+def load_discovery_compounds(seed):
+    """Découverte aléatoire reproductible : seule la graine est conservée en session"""
+    # Toute la base MEGA : catégories tirées dans les bitmaps du dépôt
+    if MEGA_AVAILABLE and not is_warming_up():
+        discoveries, _ = get_mega_discoveries(seed, 12)
+        if len(discoveries) > 0:
+            return _to_app_format(discoveries)
+    
+    # Aperçu (préchargement, données de secours) : mêmes catégories, bitmaps de l'aperçu
+    compounds_df = load_compound_data(chunk_size=1000)
+    if len(compounds_df) == 0:
+        return compounds_df
+    bitmaps = BitmapIndex(compounds_df.rename(columns={'mol_weight': 'molecular_weight'}), category_columns=())
+    rows = discovery_rows(bitmaps, seed)
+    # Maximum 12 résultats pour éviter l'overwhelm
+    return compounds_df.iloc[rows].drop_duplicates(subset=['name']).head(12)
+
+def _results_cursor(query):
+    """Curseur de la page affichée (retour à la première page quand la requête change)"""
+    if st.session_state.get('recherche_query') != query:
+        st.session_state['recherche_query'] = query
+        st.session_state['recherche_cursors'] = [None]
+    return st.session_state['recherche_cursors'][-1]
+
+def _next_results_page(cursor):
+    st.session_state['recherche_cursors'].append(cursor)
+
+def _previous_results_page():
+    if len(st.session_state['recherche_cursors']) > 1:
+        st.session_state['recherche_cursors'].pop()
+
+def render_page_navigation(page):
+    """Navigation entre pages de résultats : seule la page courante est chargée et affichée"""
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button("◀ Précédents", key="recherche_prev", disabled=page.start == 0,
+                  on_click=_previous_results_page)
+    with col_info:
+        st.caption(f"Résultats {page.start + 1}–{page.start + len(page)} sur {page.total:,} "
+                   f"(page {page.number}/{page.page_count})")
+    with col_next:
+        st.button("Suivants ▶", key="recherche_next", disabled=page.next_cursor is None,
+                  on_click=_next_results_page, args=(page.next_cursor,))
+
+def render_compound_suggestions(prefix, key):
+    """Autocomplétion sous une zone de recherche ; retourne le composé choisi ou None"""
+    if not (MEGA_AVAILABLE and prefix) or is_warming_up():
+        return None
+    suggestions = suggest_mega_molecules(prefix, 8)
+    if not suggestions:
+        return None
+    return st.selectbox(
+        "💡 Suggestions",
+        suggestions,
+        index=None,
+        placeholder=f"{len(suggestions)} composé(s) commençant par '{prefix}' (meilleurs scores)",
+        key=key
+    )
 
 def load_fallback_data():
     """Fallback sur les données locales si MEGA non disponible"""
@@ -251,7 +368,7 @@ def load_fallback_data():
         st.sidebar.error(f"❌ Erreur: {e}")
         return load_simulated_data()
 
-@st.cache_data(ttl=300)  
+@st.cache_data(ttl=300)
 def load_simulated_data():
     """Données simulées de fallback - SUPPRESSION de la seed fixe"""
     # SUPPRESSION de np.random.seed(42) pour de vraies données aléatoires
@@ -307,35 +424,46 @@ def load_simulated_data():
     
     return pd.DataFrame(compounds)
 
-@st.cache_data(ttl=3600)
 def get_real_metrics():
-    """Métriques temps réel basées sur le dataset MEGA optimisé"""
-    base_time = datetime.now()
-    
+    """Métriques temps réel (valeurs de référence pendant le préchargement MEGA)"""
+    if MEGA_AVAILABLE and not is_warming_up():
+        return get_mega_metrics()
+    return get_default_metrics()
+
+def get_mega_metrics():
+    """Métriques temps réel basées sur le dataset MEGA optimisé (horodatage à chaque appel)"""
+    return {**compute_mega_metrics(), 'last_update': datetime.now().strftime("%H:%M:%S")}
+
+@fingerprint_cache(version=repository_version)
+def compute_mega_metrics():
+    """Métriques du dataset MEGA, une fois par version des données (sans horodatage)"""
     # Utilisation des vraies statistiques MEGA si disponible
-    if MEGA_AVAILABLE:
-        try:
-            stats, status = get_mega_stats()
-            if stats:
-                return {
-                    'total_compounds': stats.get('total_molecules', 50000),
-                    'accuracy': 95.7,  # Performance Random Forest optimisé
-                    'response_time_ms': 87,  # Temps réponse système
-                    'predictions_today': 2345,
-                    'analyzed_today': min(156, stats.get('total_molecules', 50000)),
-                    'unique_targets': 25,  # Cibles protéiques documentées
-                    'active_users': 89,
-                    'discoveries_made': stats.get('total_molecules', 50000),
-                    'validated_molecules': stats.get('total_molecules', 50000),
-                    'champion_molecules': stats.get('champion_molecules', 8802),
-                    'high_bioactivity': stats.get('high_bioactivity', 22794),
-                    'models_deployed': 4,  # Modèles IA déployés
-                    'last_update': base_time.strftime("%H:%M:%S")
-                }
-        except:
-            pass
+    try:
+        stats, status = get_mega_stats()
+        if stats:
+            return {
+                'total_compounds': stats.get('total_molecules', 50000),
+                'accuracy': 95.7,  # Performance Random Forest optimisé
+                'response_time_ms': 87,  # Temps réponse système
+                'predictions_today': 2345,
+                'analyzed_today': min(156, stats.get('total_molecules', 50000)),
+                'unique_targets': 25,  # Cibles protéiques documentées
+                'active_users': 89,
+                'discoveries_made': stats.get('total_molecules', 50000),
+                'validated_molecules': stats.get('total_molecules', 50000),
+                'champion_molecules': stats.get('champion_molecules', 8802),
+                'high_bioactivity': stats.get('high_bioactivity', 22794),
+                'models_deployed': 4,  # Modèles IA déployés
+            }
+    except:
+        pass
+    
+    return get_default_metrics()
+
+def get_default_metrics():
+    """Métriques par défaut (dataset MEGA optimisé)"""
+    base_time = datetime.now()
     
-    # Fallback sur les métriques par défaut
     return {
         'total_compounds': 50000,  # Dataset MEGA optimisé
         'accuracy': 95.7,  # Performance Random Forest optimisé
@@ -352,6 +480,11 @@ def get_real_metrics():
         'last_update': base_time.strftime("%H:%M:%S")
     }
 
+# Préchargement en arrière-plan dès le premier passage du script (une fois par processus)
+if MEGA_AVAILABLE:
+    register_warmup_step('metrics', "métriques temps réel", compute_mega_metrics)
+    start_warmup()
+
 def render_header():
     """Header principal animé"""
     st.markdown("""
@@ -437,7 +570,15 @@ def render_sidebar():
     # Statut de connexion MEGA Dataset Optimisé
     st.sidebar.markdown("### 🚀 Statut Dataset MEGA")
     
-    if MEGA_AVAILABLE:
+    warmup = get_warmup_state()
+    
+    if MEGA_AVAILABLE and warmup['status'] == 'running':
+        st.sidebar.info(f"⏳ Préchargement MEGA : {warmup['current_step'] or 'finalisation'}...")
+        st.sidebar.progress(warmup['progress'])
+        st.sidebar.caption("Les pages restent utilisables avec un aperçu rapide")
+    elif MEGA_AVAILABLE:
+        if 'running' in warmup['background'].values():
+            st.sidebar.caption("🔗 Empreintes structurales en cours de calcul : recherches structurales partielles")
         try:
             # Utilisation du nouveau connecteur MEGA statistiques
             stats, status = get_mega_stats()
@@ -454,6 +595,15 @@ def render_sidebar():
                 
                 st.sidebar.info("Dataset MEGA 50K représentatif")
                 
+                # Dimensionnement du cache de requêtes partagé entre sessions
+                cache_stats = get_query_cache().stats()
+                st.sidebar.caption(
+                    f"🧊 Cache requêtes : {cache_stats['hit_rate']:.0%} de succès "
+                    f"({cache_stats['hits']:,}/{cache_stats['hits'] + cache_stats['misses']:,}) · "
+                    f"{cache_stats['entries']:,} entrées · {cache_stats['bytes'] / 1e6:.1f}/"
+                    f"{cache_stats['max_bytes'] / 1e6:.0f} Mo · {cache_stats['evictions']:,} évictions"
+                )
+                
             elif "🟡" in status:
                 st.sidebar.warning("📊 Mode Fallback MEGA")
                 st.sidebar.metric("Molécules disponibles", f"{stats.get('total_molecules', 0):,}")
@@ -783,9 +933,9 @@ def page_recherche():
     """Page de recherche intelligente dans les 1.4M molécules"""
     st.markdown("## 🔍 Recherche Intelligente de Composés")
     
-    # Initialisation de l'état de session pour la recherche aléatoire
-    if 'random_search_results' not in st.session_state:
-        st.session_state['random_search_results'] = None
+    # Initialisation de l'état de session pour la recherche aléatoire (graine seulement)
+    if 'random_search_seed' not in st.session_state:
+        st.session_state['random_search_seed'] = None
     if 'random_search_active' not in st.session_state:
         st.session_state['random_search_active'] = False
     
@@ -800,7 +950,8 @@ def page_recherche():
     
     with col2:
         st.markdown("<br>", unsafe_allow_html=True)
-        search_mode = st.selectbox("Mode", ["Exact", "Partiel", "Intelligent"])
+        search_mode = st.selectbox("Mode", ["Exact", "Partiel", "Intelligent", "Sous-structure"],
+                                   help="Sous-structure : motif SMILES ou SMARTS (ex: c1ccccc1O pour un phénol)")
     
     with col3:
         st.markdown("<br>", unsafe_allow_html=True)
@@ -809,64 +960,63 @@ def page_recherche():
             with st.spinner("🔍 Sélection de molécules intéressantes..."):
                 time.sleep(1.5)  # Simulation du processus de recherche
                 
-                # Chargement optimisé pour avoir un bon échantillon
-                compounds_df = load_compound_data(chunk_size=1000)
+                # Nouvelle graine : la sélection est recalculée à partir d'elle à chaque rerun
+                seed = int(np.random.default_rng().integers(2**31))
+                random_selection = load_discovery_compounds(seed)
                 
-                if len(compounds_df) > 0:
-                    # Stratégie de sélection intelligente pour la découverte aléatoire
-                    # 1. Priorité aux champions multi-cibles
-                    champions = compounds_df[compounds_df['is_champion']]
-                    # 2. Molécules avec scores élevés
-                    high_scores = compounds_df[compounds_df['bioactivity_score'] > 0.8]
-                    # 3. Molécules au-dessus du seuil d'or 670 Da
-                    gold_threshold = compounds_df[compounds_df['mol_weight'] > 670]
-                    # 4. Échantillon général diversifié
-                    general_sample = compounds_df.sample(min(15, len(compounds_df)))
-                    
-                    # Combinaison intelligente pour un échantillon varié
-                    random_selection = pd.concat([
-                        champions.head(3) if len(champions) > 0 else pd.DataFrame(),
-                        high_scores.sample(min(5, len(high_scores))) if len(high_scores) > 0 else pd.DataFrame(),
-                        gold_threshold.sample(min(4, len(gold_threshold))) if len(gold_threshold) > 0 else pd.DataFrame(),
-                        general_sample
-                    ]).drop_duplicates(subset=['name']).head(12)  # Maximum 12 résultats pour éviter l'overwhelm
-                    
+                if len(random_selection) > 0:
                     # Stockage dans l'état de session
-                    st.session_state['random_search_results'] = random_selection
+                    st.session_state['random_search_seed'] = seed
                     st.session_state['random_search_active'] = True
                     
                     st.success(f"🎲 {len(random_selection)} molécules découvertes aléatoirement !")
                 else:
                     st.error("❌ Impossible de charger les molécules pour la découverte aléatoire")
     
+    # Autocomplétion : un composé choisi est chargé directement par son nom
+    picked_compound = render_compound_suggestions(search_term, key='recherche_suggestion')
+    picked_df = load_exact_compound(picked_compound) if picked_compound else pd.DataFrame()
+    
     # Gestion des résultats de recherche
     compounds_df = None
     display_results = False
     search_context = ""
+    # Recherche dont les filtres avancés portent sur toute la base (pas sur l'aperçu)
+    filter_population_term = None
+    
+    # Priorité 0: Composé choisi dans les suggestions (sans recherche par sous-chaîne)
+    if len(picked_df) > 0:
+        compounds_df = picked_df
+        display_results = True
+        search_context = f"Composé '{picked_compound}'"
+        st.session_state['random_search_active'] = False
     
     # Priorité 1: Recherche textuelle
-    if search_term and len(search_term) >= 2:
-        # Recherche normale par terme
-        compounds_df = load_compound_data(chunk_size=10000, search_term=search_term)
-        
-        # Filtrage basé sur le terme de recherche
-        mask = compounds_df['name'].str.contains(search_term, case=False, na=False)
-        filtered_df = compounds_df[mask]
+    elif search_term and len(search_term) >= 2:
+        # Recherche normale par terme : load_compound_data retourne déjà les
+        # seules correspondances (index trigrammes), sans second parcours
+        filtered_df = load_compound_data(chunk_size=10000, search_term=search_term, search_mode=search_mode)
         
         if len(filtered_df) > 0:
             st.success(f"🎯 {len(filtered_df)} composé(s) trouvé(s) dans la base MEGA")
             compounds_df = filtered_df
             display_results = True
             search_context = f"Recherche pour '{search_term}'"
+            filter_population_term = search_term
             # Désactiver la recherche aléatoire si une recherche textuelle est active
             st.session_state['random_search_active'] = False
         else:
             st.warning(f"❌ Aucun résultat pour '{search_term}' dans la base MEGA")
-            st.info("💡 Essayez des termes comme : curcumin, resveratrol, quercetin, ginsenoside...")
+            if search_mode == "Sous-structure":
+                st.info("🧩 Saisissez un motif SMILES ou SMARTS valide (ex: c1ccccc1O, C(=O)O, [OH]c1ccccc1)")
+            else:
+                st.info("💡 Essayez des termes comme : curcumin, resveratrol, quercetin, ginsenoside...")
+            if search_mode in ("Exact", "Partiel"):
+                st.info("🧠 Le mode **Intelligent** tolère les fautes de frappe (ex: curcumine, quercétine)")
     
     # Priorité 2: Résultats de recherche aléatoire
-    elif st.session_state['random_search_active'] and st.session_state['random_search_results'] is not None:
-        compounds_df = st.session_state['random_search_results']
+    elif st.session_state['random_search_active'] and st.session_state['random_search_seed'] is not None:
+        compounds_df = load_discovery_compounds(st.session_state['random_search_seed'])
         display_results = True
         search_context = "Découverte Aléatoire"
         
@@ -875,12 +1025,12 @@ def page_recherche():
         with col1:
             if st.button("🔄 Nouvelles Découvertes"):
                 st.session_state['random_search_active'] = False
-                st.session_state['random_search_results'] = None
+                st.session_state['random_search_seed'] = None
                 # L'utilisateur peut cliquer à nouveau sur "🎲 Découverte"
         with col2:
             if st.button("❌ Effacer Résultats"):
                 st.session_state['random_search_active'] = False
-                st.session_state['random_search_results'] = None
+                st.session_state['random_search_seed'] = None
     
     # Gestion d'erreur de longueur de recherche
     elif search_term and len(search_term) < 2:
@@ -909,7 +1059,15 @@ def page_recherche():
         if st.session_state['random_search_active']:
             st.info("🎲 **Découverte Aléatoire Active** - Échantillon intelligent incluant champions, molécules >670 Da et scores élevés")
         
-        # Filtres avancés
+        # Filtres avancés : bornes de toute la base MEGA pour une recherche textuelle
+        filter_on_full_base = filter_population_term is not None and MEGA_AVAILABLE and not is_warming_up()
+        if filter_on_full_base:
+            (weight_min, weight_max), toxicity_options = get_mega_filter_bounds()
+        else:
+            weight_min, weight_max = compounds_df['mol_weight'].min(), compounds_df['mol_weight'].max()
+            toxicity_options = list(compounds_df['toxicity'].unique())
+        weight_min, weight_max = int(weight_min), int(np.ceil(weight_max))
+        
         st.markdown("### 🔧 Filtres Avancés")
         col1, col2, col3 = st.columns(3)
         
@@ -925,32 +1083,48 @@ def page_recherche():
         with col2:
             weight_range = st.slider(
                 "Poids Moléculaire (Da)",
-                min_value=int(compounds_df['mol_weight'].min()),
-                max_value=int(compounds_df['mol_weight'].max()),
-                value=(200, 800)
+                min_value=weight_min,
+                max_value=max(weight_max, weight_min + 1),
+                value=(max(200, weight_min), min(800, max(weight_max, weight_min + 1)))
             )
         
         with col3:
             selected_toxicity = st.multiselect(
                 "Toxicité",
-                options=compounds_df['toxicity'].unique(),
-                default=compounds_df['toxicity'].unique()
+                options=toxicity_options,
+                default=toxicity_options
             )
         
-        # Application des filtres
-        filtered_compounds = compounds_df[
-            (compounds_df['bioactivity_score'] >= bioactivity_range[0]) &
-            (compounds_df['bioactivity_score'] <= bioactivity_range[1]) &
-            (compounds_df['mol_weight'] >= weight_range[0]) &
-            (compounds_df['mol_weight'] <= weight_range[1]) &
-            (compounds_df['toxicity'].isin(selected_toxicity))
-        ]
+        # Application des filtres : seule la page courante est matérialisée
+        # (la session ne garde que la requête et le curseur)
+        query = (search_context, search_mode, st.session_state['random_search_seed'],
+                 bioactivity_range, weight_range, tuple(selected_toxicity))
+        cursor = _results_cursor(query)
+        if filter_on_full_base:
+            # Évalués sur toutes les correspondances de la recherche dans la base complète
+            page = load_filtered_page(
+                filter_population_term, search_mode, bioactivity_range, weight_range, tuple(selected_toxicity), cursor
+            )
+        else:
+            filtered_compounds = compounds_df[
+                (compounds_df['bioactivity_score'] >= bioactivity_range[0]) &
+                (compounds_df['bioactivity_score'] <= bioactivity_range[1]) &
+                (compounds_df['mol_weight'] >= weight_range[0]) &
+                (compounds_df['mol_weight'] <= weight_range[1]) &
+                (compounds_df['toxicity'].isin(selected_toxicity))
+            ]
+            page = paginate_frame(filtered_compounds, cursor)
         
-        st.markdown(f"### 📋 Résultats Filtrés ({len(filtered_compounds)} composés)")
+        st.markdown(f"### 📋 Résultats Filtrés ({page.total:,} composés)")
+        if filter_on_full_base and page.total > 0:
+            st.caption("🏆 Triés par score de bioactivité décroissant")
         
-        if len(filtered_compounds) > 0:
+        if len(page) > 0:
+            if page.total > page.page_size:
+                render_page_navigation(page)
+            
             # Affichage des résultats avec highlighting des champions
-            for idx, compound in filtered_compounds.iterrows():
+            for idx, compound in page.items.iterrows():
                 with st.expander(
                     f"{'🏆' if compound['is_champion'] else '🧬'} {compound['name']} - Score: {compound['bioactivity_score']:.3f}",
                     expanded=False
@@ -991,8 +1165,15 @@ def page_recherche():
                             if st.button("🔬 Analyser", key=f"analyze_{idx}"):
                                 st.info("🔄 Analyse en cours...")
                         with action_col3:
-                            if st.button("🔗 Similaires", key=f"similar_{idx}"):
-                                st.info("🔍 Recherche similaires...")
+                            show_similar = st.button("🔗 Similaires", key=f"similar_{idx}")
+                    
+                    if show_similar:
+                        similar = get_similar_compounds(compound['name'])
+                        if similar.empty:
+                            st.info("🔍 Aucune molécule similaire (empreintes structurales non calculées pour ce composé)")
+                        for _, mol in similar.iterrows():
+                            st.write(f"🔗 **{mol['name']}** - Tanimoto: {mol['similarity']:.2f} - "
+                                     f"Score: {mol['bioactivity_score']:.3f}")
         else:
             st.warning("❌ Aucun composé ne correspond aux critères sélectionnés")
             st.info("💡 Essayez d'élargir les filtres")
@@ -1240,19 +1421,29 @@ def page_analyse():
                 st.error("❌ Impossible de charger les molécules aléatoires")
             # Pas de st.rerun() - utilisation directe de l'état
     
+    # Autocomplétion : un composé choisi est chargé directement par son nom
+    picked_compound = render_compound_suggestions(search_molecule, key='analyse_suggestion')
+    picked_df = load_exact_compound(picked_compound) if picked_compound else pd.DataFrame()
+    
     # Gestion de la sélection de molécule
     selected_compound = None
     compounds_df = None
     
+    # Priorité 0: Composé choisi dans les suggestions (sans recherche par sous-chaîne)
+    if len(picked_df) > 0:
+        selected_compound = picked_compound
+        compounds_df = picked_df
+        st.session_state['current_analysis_molecule'] = selected_compound
+        st.session_state['analysis_compounds_df'] = compounds_df
+    
     # Priorité 1: Molécule tapée dans la recherche
-    if search_molecule and len(search_molecule) >= 2:
+    elif search_molecule and len(search_molecule) >= 2:
         # Recherche dans la base MEGA
         compounds_df = load_compound_data(chunk_size=5000, search_term=search_molecule)
         
         if len(compounds_df) > 0:
-            # Filtrage par terme de recherche
-            mask = compounds_df['name'].str.contains(search_molecule, case=False, na=False)
-            filtered_df = compounds_df[mask]
+            # Filtrage par terme de recherche (forme canonique : accents, synonymes FR ↔ EN)
+            filtered_df = filter_by_name(compounds_df, search_molecule)
             
             if len(filtered_df) > 0:
                 st.success(f"🎯 {len(filtered_df)} molécule(s) trouvée(s)")
@@ -1262,13 +1453,15 @@ def page_analyse():
                     selected_compound = filtered_df.iloc[0]['name']
                     st.info(f"✅ Sélection automatique : **{selected_compound}**")
                 else:
-                    # Tri par score de bioactivité pour montrer les meilleures en premier
-                    filtered_df = filtered_df.sort_values('bioactivity_score', ascending=False)
+                    # Meilleures bioactivités en premier (sélection partielle, sans tri complet)
+                    filtered_df = top_k_frame(filtered_df, 'bioactivity_score', ANALYSE_MAX_OPTIONS)
                     
+                    # Libellés calculés une fois (score de la première occurrence de chaque nom)
+                    option_scores = dict(zip(filtered_df['name'][::-1], filtered_df['bioactivity_score'][::-1]))
                     selected_compound = st.selectbox(
                         f"Sélectionnez parmi les {len(filtered_df)} résultats (triés par performance):",
                         filtered_df['name'].tolist(),
-                        format_func=lambda x: f"🧬 {x} (Score: {filtered_df[filtered_df['name']==x]['bioactivity_score'].iloc[0]:.3f})"
+                        format_func=lambda x: f"🧬 {x} (Score: {option_scores[x]:.3f})"
                     )
                 
                 compounds_df = filtered_df
@@ -1291,8 +1484,7 @@ def page_analyse():
             not any(st.session_state['analysis_compounds_df']['name'] == selected_compound)):
             
             compounds_df = load_compound_data(chunk_size=1000, search_term=selected_compound)
-            mask = compounds_df['name'].str.contains(selected_compound, case=False, na=False)
-            filtered_df = compounds_df[mask]
+            filtered_df = filter_by_name(compounds_df, selected_compound)
             
             if len(filtered_df) > 0:
                 compounds_df = filtered_df
@@ -1365,20 +1557,20 @@ def page_analyse():
         **Statut :** {'🏆 Champion Multi-Cibles' if compound_data['is_champion'] else '✅ Molécule Validée'}
         """)
         
-        # Suggestions de molécules similaires
-        if len(compounds_df) > 1:
-            similar_molecules = compounds_df[compounds_df['name'] != selected_compound].head(3)
-            if len(similar_molecules) > 0:
-                with st.expander(f"🔗 Molécules Similaires Trouvées ({len(similar_molecules)})", expanded=False):
-                    for _, mol in similar_molecules.iterrows():
-                        col1, col2 = st.columns([3, 1])
-                        with col1:
-                            st.write(f"🧬 **{mol['name']}** - Score: {mol['bioactivity_score']:.3f}")
-                        with col2:
-                            if st.button("Analyser", key=f"analyze_{mol['name']}"):
-                                st.session_state['current_analysis_molecule'] = mol['name']
-                                st.session_state['analysis_compounds_df'] = compounds_df
-                                # Pas de st.rerun() - la mise à jour se fait automatiquement
+        # Suggestions de molécules similaires (structure : Tanimoto sur empreintes)
+        similar_molecules = get_similar_compounds(selected_compound, 3)
+        if len(similar_molecules) > 0:
+            with st.expander(f"🔗 Molécules Similaires Trouvées ({len(similar_molecules)})", expanded=False):
+                for _, mol in similar_molecules.iterrows():
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write(f"🧬 **{mol['name']}** - Tanimoto: {mol['similarity']:.2f} - "
+                                 f"Score: {mol['bioactivity_score']:.3f}")
+                    with col2:
+                        if st.button("Analyser", key=f"analyze_{mol['name']}"):
+                            st.session_state['current_analysis_molecule'] = mol['name']
+                            st.session_state['analysis_compounds_df'] = similar_molecules
+                            # Pas de st.rerun() - la mise à jour se fait automatiquement
         
         # Onglets d'analyse (code existant avec améliorations)
         tab1, tab2, tab3, tab4 = st.tabs(["📊 Propriétés", "🎯 Cibles", "🧪 Prédictions", "📈 Comparaison"])
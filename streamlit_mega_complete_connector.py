@@ -7,164 +7,53 @@ Streaming intelligent depuis dataset local ou Hugging Face
 import streamlit as st
 import pandas as pd
 import numpy as np
-import os
-from pathlib import Path
 from datetime import datetime, timedelta
 import random
 import time
 
+from mega_bitmap_index import get_bitmap_index
+from mega_bm25_index import get_bm25_index
+from mega_cache import fingerprint_cache
+from mega_data_repository import get_mega_repository, repository_version
+
+# Catégories de découverte → prédicat de l'index bitmap
+RANDOM_CATEGORIES = {
+    "Champions": 'champion',
+    "Haute Complexité": 'high_complexity',
+    "Drug-like": 'drug_like',
+}
+
 class MegaCompleteConnector:
-    def __init__(self):
-        # Chemins vers les datasets
-        self.local_dataset_path = "../mega_1400k_dataset_local"
-        self.hf_dataset_name = "phytoai/mega-phytotherapy-complete-1400k"
-        self.fallback_path = "mega_streamlit_50k.csv"
-        
-        # Cache et état
-        self._dataset_cache = None
-        self._dataset_type = None
-        self._last_load_time = None
-        
-    @st.cache_data(ttl=3600)
-    def load_complete_mega_dataset(_self):
-        """Chargement intelligent du dataset complet 1.4M molécules"""
-        print("🔍 Tentative de chargement dataset MEGA complet...")
-        
-        # 1. Tentative dataset local d'abord (plus rapide)
-        if _self._try_load_local_dataset():
-            return _self._dataset_cache, "🟢 MEGA COMPLET LOCAL (1.4M molécules)"
-        
-        # 2. Tentative Hugging Face
-        if _self._try_load_huggingface_dataset():
-            return _self._dataset_cache, "🟢 MEGA COMPLET HUGGING FACE (1.4M molécules)"
-        
-        # 3. Fallback vers 50K
-        if _self._try_load_fallback_dataset():
-            return _self._dataset_cache, "🟡 MEGA ÉCHANTILLON (50K molécules)"
-        
-        # 4. Échec complet
-        return pd.DataFrame(), "❌ Aucun dataset disponible"
+    @property
+    def repository(self):
+        # Les données vivent dans le dépôt MEGA partagé (une copie par processus)
+        return get_mega_repository()
     
-    def _try_load_local_dataset(self):
-        """Tentative de chargement du dataset local"""
-        try:
-            local_path = Path(self.local_dataset_path)
-            if local_path.exists():
-                print(f"📂 Chargement dataset local: {local_path}")
-                
-                # Import conditionnel de datasets
-                try:
-                    from datasets import load_from_disk
-                    dataset_dict = load_from_disk(str(local_path))
-                    
-                    # Combine tous les splits pour l'application
-                    all_data = []
-                    for split_name in ['train', 'validation', 'test']:
-                        if split_name in dataset_dict:
-                            split_df = dataset_dict[split_name].to_pandas()
-                            split_df['dataset_split'] = split_name
-                            all_data.append(split_df)
-                    
-                    if all_data:
-                        combined_df = pd.concat(all_data, ignore_index=True)
-                        self._dataset_cache = combined_df
-                        self._dataset_type = "local_complete"
-                        print(f"✅ Dataset local chargé: {len(combined_df):,} molécules")
-                        return True
-                        
-                except ImportError:
-                    print("⚠️ Module 'datasets' non installé pour le dataset local")
-                    
-        except Exception as e:
-            print(f"❌ Erreur chargement local: {e}")
-        
-        return False
+    @property
+    def _dataset_type(self):
+        return self.repository.source
     
-    def _try_load_huggingface_dataset(self):
-        """Tentative de chargement depuis Hugging Face"""
-        try:
-            print(f"🤗 Tentative chargement Hugging Face: {self.hf_dataset_name}")
-            
-            # Import conditionnel
-            try:
-                from datasets import load_dataset
-                
-                # Chargement streaming pour économiser la mémoire
-                dataset = load_dataset(
-                    self.hf_dataset_name,
-                    streaming=True,  # Mode streaming pour gros datasets
-                    trust_remote_code=True
-                )
-                
-                # Conversion en DataFrame avec limitation intelligente
-                sample_size = 100000  # 100K échantillon pour test
-                train_sample = dataset['train'].take(sample_size)
-                df_sample = pd.DataFrame(list(train_sample))
-                
-                if len(df_sample) > 0:
-                    self._dataset_cache = df_sample
-                    self._dataset_type = "huggingface_streaming"
-                    print(f"✅ Hugging Face streaming chargé: {len(df_sample):,} molécules (échantillon)")
-                    return True
-                    
-            except ImportError:
-                print("⚠️ Module 'datasets' non installé pour Hugging Face")
-            except Exception as e:
-                print(f"⚠️ Dataset HF non disponible: {e}")
-                
-        except Exception as e:
-            print(f"❌ Erreur Hugging Face: {e}")
-        
-        return False
+    def load_complete_mega_dataset(self):
+        """Dataset complet depuis le dépôt partagé (local, Hugging Face ou fallback)"""
+        repository = self.repository.load()
+        return repository.compounds, repository.status
     
-    def _try_load_fallback_dataset(self):
-        """Chargement du fallback 50K molécules"""
-        try:
-            if os.path.exists(self.fallback_path):
-                print(f"📊 Chargement fallback: {self.fallback_path}")
-                df = pd.read_csv(self.fallback_path)
-                self._dataset_cache = df
-                self._dataset_type = "fallback_50k"
-                print(f"✅ Fallback chargé: {len(df):,} molécules")
-                return True
-        except Exception as e:
-            print(f"❌ Erreur fallback: {e}")
-        
-        return False
-    
-    @st.cache_data(ttl=1800)
+    @fingerprint_cache(version=repository_version)
     def search_molecules(_self, search_term, limit=100):
-        """Recherche avancée dans le dataset complet"""
-        dataset, status = _self.load_complete_mega_dataset()
+        """Recherche avancée dans le dataset complet (nom, famille, cibles ; classement BM25)"""
+        repository = _self.repository.load()
+        dataset = repository.compounds
         
         if dataset.empty:
             return pd.DataFrame(), "❌ Dataset indisponible"
         
         try:
-            search_term_lower = search_term.lower()
+            # Pertinence textuelle par champ + a priori bioactivité/complexité,
+            # calculée uniquement pour les meilleurs candidats
+            rows, relevance = get_bm25_index(repository).search(search_term, limit)
             
-            # Recherche multi-critères
-            mask = (
-                dataset['name'].str.lower().str.contains(search_term_lower, na=False) |
-                dataset.get('molecular_family', pd.Series([''] * len(dataset))).str.lower().str.contains(search_term_lower, na=False) |
-                dataset.get('targets', pd.Series([''] * len(dataset))).str.lower().str.contains(search_term_lower, na=False)
-            )
-            
-            results = dataset[mask].copy()
-            
-            if len(results) > 0:
-                # Tri intelligent par pertinence
-                results['search_relevance'] = (
-                    results['name'].str.lower().str.count(search_term_lower) * 3 +
-                    results.get('complexity_score', pd.Series([0] * len(results))) * 0.1 +
-                    results.get('bioactivity_score', pd.Series([0] * len(results))) * 2
-                )
-                
-                results = results.sort_values(
-                    ['search_relevance', 'complexity_score'], 
-                    ascending=[False, False]
-                ).head(limit)
-                
+            if len(rows) > 0:
+                results = dataset.iloc[rows].assign(search_relevance=relevance)
                 return results, f"🎯 {len(results)} résultats trouvés"
             else:
                 return pd.DataFrame(), f"❌ Aucun résultat pour '{search_term}'"
@@ -181,27 +70,17 @@ class MegaCompleteConnector:
             return pd.DataFrame(), "❌ Dataset indisponible"
         
         try:
-            # Filtrage par catégorie si spécifié
-            if category and category != "Toutes":
-                if category == "Champions" and 'is_champion' in dataset.columns:
-                    filtered_dataset = dataset[dataset['is_champion'] == True]
-                elif category == "Haute Complexité" and 'complexity_score' in dataset.columns:
-                    filtered_dataset = dataset[dataset['complexity_score'] > 20]
-                elif category == "Drug-like" and 'molecular_weight' in dataset.columns:
-                    filtered_dataset = dataset[
-                        (dataset['molecular_weight'] > 150) & 
-                        (dataset['molecular_weight'] < 500)
-                    ]
-                else:
-                    filtered_dataset = dataset
-            else:
-                filtered_dataset = dataset
+            # Filtrage par catégorie via les bitmaps précalculés (aucun parcours de la table)
+            bitmaps = get_bitmap_index(_self.repository)
+            predicate = RANDOM_CATEGORIES.get(category)
+            selection = bitmaps[predicate] if predicate in bitmaps else bitmaps.all
             
-            if len(filtered_dataset) == 0:
-                filtered_dataset = dataset  # Fallback
+            if selection.count() == 0:
+                selection = bitmaps.all  # Fallback
             
             # Échantillonnage pondéré par complexité
-            if 'complexity_score' in filtered_dataset.columns:
+            if 'complexity_score' in dataset.columns:
+                filtered_dataset = dataset.iloc[selection.rows()]
                 weights = np.exp(filtered_dataset['complexity_score'] / 10)  # Pondération exponentielle
                 weights = weights / weights.sum()  # Normalisation
                 
@@ -217,14 +96,14 @@ class MegaCompleteConnector:
                     # Fallback simple si pondération échoue
                     results = filtered_dataset.sample(min(count, len(filtered_dataset)))
             else:
-                results = filtered_dataset.sample(min(count, len(filtered_dataset)))
+                results = dataset.iloc[selection.sample(count)]
             
             return results, f"🎲 {len(results)} molécules découvertes"
             
         except Exception as e:
             return pd.DataFrame(), f"❌ Erreur découverte: {e}"
     
-    @st.cache_data(ttl=3600)
+    @fingerprint_cache(version=repository_version)
     def get_dataset_statistics(_self):
         """Statistiques complètes du dataset"""
         dataset, status = _self.load_complete_mega_dataset()
@@ -242,19 +121,17 @@ class MegaCompleteConnector:
                 'avg_bioactivity': dataset.get('bioactivity_score', pd.Series([0])).mean(),
             }
             
-            # Statistiques spécialisées
-            if 'is_champion' in dataset.columns:
-                stats['champion_molecules'] = len(dataset[dataset['is_champion'] == True])
+            # Statistiques spécialisées (comptages précalculés par l'index bitmap)
+            bitmaps = get_bitmap_index(_self.repository)
+            if 'champion' in bitmaps:
+                stats['champion_molecules'] = bitmaps.count('champion')
             
-            if 'molecular_weight' in dataset.columns:
-                stats['drug_like_molecules'] = len(dataset[
-                    (dataset['molecular_weight'] >= 150) & 
-                    (dataset['molecular_weight'] <= 500)
-                ])
-                stats['large_molecules'] = len(dataset[dataset['molecular_weight'] > 670])
+            if 'drug_like' in bitmaps:
+                stats['drug_like_molecules'] = bitmaps.count('drug_like')
+                stats['large_molecules'] = bitmaps.count('large')
             
-            if 'complexity_score' in dataset.columns:
-                stats['high_complexity'] = len(dataset[dataset['complexity_score'] > 20])
+            if 'high_complexity' in bitmaps:
+                stats['high_complexity'] = bitmaps.count('high_complexity')
             
             return stats, status
             
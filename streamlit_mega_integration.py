@@ -6,106 +6,49 @@ Connexion directe aux 1.4M molécules avec streaming intelligent
 
 import streamlit as st
 import pandas as pd
-import json
 import numpy as np
-from pathlib import Path
 import random
 from datetime import datetime, timedelta
 
+from mega_cache import fingerprint_cache
+from mega_data_repository import get_mega_repository, repository_version
+from mega_search_index import get_name_index
+
 class MegaDatabaseConnector:
-    def __init__(self):
-        # Chemins vers le dataset MEGA de 1.4M molécules
-        self.mega_path = "./phytotherapy-ai-discovery/phytoai/data/processed/MEGA_DATASET_20250602_142023.json"
-        self.fallback_path = "./real_compounds_dataset.csv"
-        
-        # Cache pour optimiser les performances
-        self._mega_data = None
-        self._mega_loaded = False
-        
-    @st.cache_data(ttl=3600)
-    def load_mega_dataset(_self):
+    @property
+    def repository(self):
+        # Dépôt MEGA partagé : composés et bioactivités chargés une seule fois
+        return get_mega_repository()
+    
+    def load_mega_dataset(self):
         """
-        Chargement intelligent du dataset MEGA de 1.4M molécules
+        Tables MEGA (composés, bioactivités) depuis le dépôt partagé
         """
-        print("🚀 Chargement du dataset MEGA 1.4M molécules...")
-        
-        try:
-            # Vérification de l'existence du fichier MEGA
-            if not Path(_self.mega_path).exists():
-                print(f"⚠️ Dataset MEGA non trouvé: {_self.mega_path}")
-                return _self._load_fallback_dataset()
-            
-            # Chargement du dataset MEGA complet
-            with open(_self.mega_path, 'r') as f:
-                mega_data = json.load(f)
-            
-            if 'compounds' in mega_data:
-                compounds = mega_data['compounds']
-                bioactivities = mega_data.get('bioactivities', [])
-                
-                print(f"✅ Dataset MEGA chargé: {len(compounds):,} molécules")
-                
-                # Conversion en format optimisé pour Streamlit
-                compounds_df = pd.DataFrame(compounds)
-                bioactivities_df = pd.DataFrame(bioactivities)
-                
-                _self._mega_data = {
-                    'compounds': compounds_df,
-                    'bioactivities': bioactivities_df,
-                    'raw_compounds': compounds
-                }
-                _self._mega_loaded = True
-                
-                return compounds_df, bioactivities_df, "🟢 CONNECTÉ aux 1.4M molécules MEGA"
-            else:
-                print("❌ Structure MEGA invalide")
-                return _self._load_fallback_dataset()
-                
-        except Exception as e:
-            print(f"❌ Erreur chargement MEGA: {e}")
-            return _self._load_fallback_dataset()
-    
-    def _load_fallback_dataset(self):
-        """Fallback sur l'échantillon local si MEGA non disponible"""
-        try:
-            compounds_df = pd.read_csv(self.fallback_path)
-            bioactivities_df = pd.DataFrame()  # Vide pour l'échantillon
-            
-            print(f"⚠️ Fallback activé: {len(compounds_df):,} molécules")
-            return compounds_df, bioactivities_df, "🟡 Échantillon local actif"
-            
-        except Exception as e:
-            print(f"❌ Erreur fallback: {e}")
+        repository = self.repository.load()
+        if repository.compounds.empty:
             return pd.DataFrame(), pd.DataFrame(), "🔴 Données non disponibles"
+        return repository.compounds, repository.bioactivities, repository.status
     
-    @st.cache_data(ttl=1800)
+    @fingerprint_cache(version=repository_version)
     def search_molecules(_self, search_term, max_results=100):
         """
         Recherche intelligente dans les 1.4M molécules
         """
-        if not _self._mega_loaded:
-            compounds_df, _, status = _self.load_mega_dataset()
-        else:
-            compounds_df = _self._mega_data['compounds']
-            status = "🟢 CONNECTÉ aux 1.4M molécules MEGA"
+        compounds_df, _, status = _self.load_mega_dataset()
         
         if compounds_df.empty:
             return pd.DataFrame(), "🔴 Aucune donnée disponible"
         
-        # Recherche case-insensitive dans les noms
-        search_term_lower = search_term.lower()
-        
-        # Filtre principal sur le nom
-        mask = compounds_df['name'].str.lower().str.contains(search_term_lower, na=False)
-        results = compounds_df[mask].head(max_results)
+        # Recherche case-insensitive dans les noms (index trigrammes du dépôt)
+        name_index = get_name_index(_self.repository)
+        matches = name_index.search(search_term)
+        results = compounds_df.iloc[matches[:max_results]]
         
         # Si peu de résultats, recherche élargie
         if len(results) < 10 and len(search_term) >= 3:
-            # Recherche partielle plus permissive
-            partial_mask = compounds_df['name'].str.lower().str.contains(
-                search_term_lower[:3], na=False
-            )
-            additional_results = compounds_df[partial_mask & ~mask].head(max_results - len(results))
+            # Recherche partielle plus permissive (une seule liste de postings)
+            partial = np.setdiff1d(name_index.search(search_term[:3]), matches, assume_unique=True)
+            additional_results = compounds_df.iloc[partial[:max_results - len(results)]]
             results = pd.concat([results, additional_results])
         
         search_status = f"🔍 {len(results)} résultats pour '{search_term}'"
@@ -116,11 +59,7 @@ class MegaDatabaseConnector:
         """
         Sélection aléatoire VRAIE dans les 1.4M molécules
         """
-        if not _self._mega_loaded:
-            compounds_df, _, status = _self.load_mega_dataset()
-        else:
-            compounds_df = _self._mega_data['compounds']
-            status = "🟢 CONNECTÉ aux 1.4M molécules MEGA"
+        compounds_df, _, status = _self.load_mega_dataset()
         
         if compounds_df.empty:
             return pd.DataFrame(), "🔴 Aucune donnée disponible"
@@ -134,17 +73,12 @@ class MegaDatabaseConnector:
         random_status = f"🎲 {len(random_molecules)} molécules aléatoires"
         return random_molecules, f"{status} | {random_status}"
     
-    @st.cache_data(ttl=3600)
+    @fingerprint_cache(version=repository_version)
     def get_dataset_stats(_self):
         """
         Statistiques du dataset MEGA
         """
-        if not _self._mega_loaded:
-            compounds_df, bioactivities_df, status = _self.load_mega_dataset()
-        else:
-            compounds_df = _self._mega_data['compounds']
-            bioactivities_df = _self._mega_data['bioactivities']
-            status = "🟢 CONNECTÉ aux 1.4M molécules MEGA"
+        compounds_df, bioactivities_df, status = _self.load_mega_dataset()
         
         if compounds_df.empty:
             return {}, "🔴 Données non disponibles"
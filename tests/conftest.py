@@ -0,0 +1,19 @@
+"""
+Configuration pytest des modules MEGA
+Les modules sont à la racine du dépôt ; chaque test s'exécute dans un
+répertoire temporaire pour que les artefacts (.mega_cache) y restent
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(autouse=True)
+def mega_workdir(tmp_path, monkeypatch):
+    """Répertoire de travail isolé (MEGA_CACHE_DIR est relatif)"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,135 @@
+"""Tests de l'index bitmap des prédicats fréquents (mega_bitmap_index)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mega_bitmap_index import Bitmap, BitmapIndex, discovery_rows, popcount
+
+
+@pytest.fixture
+def masks():
+    rng = np.random.default_rng(7)
+    # Tailles autour des frontières de mots de 64 bits
+    return [(rng.random(size) < 0.3, rng.random(size) < 0.6) for size in (0, 1, 63, 64, 65, 200)]
+
+
+def test_popcount():
+    words = np.array([0, 1, 0xFF, 2 ** 64 - 1, 0x8000000000000001], dtype=np.uint64)
+    assert popcount(words).tolist() == [0, 1, 8, 64, 2]
+
+
+def test_round_trip(masks):
+    for left, _ in masks:
+        bitmap = Bitmap.from_mask(left)
+        assert bitmap.mask().tolist() == left.tolist()
+        assert bitmap.rows().tolist() == np.flatnonzero(left).tolist()
+        assert bitmap.count() == len(bitmap) == int(left.sum())
+        assert Bitmap.from_rows(np.flatnonzero(left), len(left)).mask().tolist() == left.tolist()
+
+
+def test_logical_operations_match_boolean_masks(masks):
+    for left, right in masks:
+        a, b = Bitmap.from_mask(left), Bitmap.from_mask(right)
+        assert (a & b).mask().tolist() == (left & right).tolist()
+        assert (a | b).mask().tolist() == (left | right).tolist()
+        assert (a - b).mask().tolist() == (left & ~right).tolist()
+        # Les bits de remplissage du dernier mot ne sont pas comptés
+        assert (~a).mask().tolist() == (~left).tolist()
+        assert (~a).count() == int((~left).sum())
+
+
+def test_full_and_size_mismatch():
+    assert Bitmap.full(130).count() == 130
+    with pytest.raises(ValueError):
+        Bitmap.full(10) & Bitmap.full(11)
+
+
+def test_words_are_read_only():
+    bitmap = Bitmap.from_mask([True, False, True])
+    with pytest.raises(ValueError):
+        bitmap.words[0] = 0
+
+
+def test_sample_draws_distinct_members():
+    mask = np.random.default_rng(1).random(1000) < 0.2
+    bitmap = Bitmap.from_mask(mask)
+    drawn = bitmap.sample(50, np.random.default_rng(2))
+    assert len(drawn) == 50 and len(set(drawn.tolist())) == 50
+    assert mask[drawn].all()
+    # Plus que la population : tout l'ensemble, une fois chacun
+    everything = bitmap.sample(10_000, np.random.default_rng(3))
+    assert sorted(everything.tolist()) == np.flatnonzero(mask).tolist()
+    assert len(Bitmap.from_mask(np.zeros(100, dtype=bool)).sample(5)) == 0
+
+
+@pytest.fixture
+def compounds():
+    return pd.DataFrame({
+        'is_champion': [True, False, None, True, False],
+        'bioactivity_score': [0.9, 0.85, 0.2, None, 0.81],
+        'molecular_weight': [300.0, 700.0, 120.0, 450.0, None],
+        'toxicity': ['Faible', 'Élevée', 'Faible', None, 'Modérée'],
+        'molecular_family': ['Flavonoid', 'Alkaloid', 'Flavonoid', 'Terpenoid', 'Alkaloid'],
+    })
+
+
+def test_predicates(compounds):
+    index = BitmapIndex(compounds)
+    # complexity_score absente : prédicat ignoré
+    assert 'high_complexity' not in index and index.count('high_complexity') == 0
+    assert index['champion'].rows().tolist() == [0, 3]
+    assert index['high_bioactivity'].rows().tolist() == [0, 1, 4]
+    assert index['drug_like'].rows().tolist() == [0, 3]
+    assert index['large'].rows().tolist() == [1]
+    assert index.count('champion') == 2
+    assert (index['champion'] & index['drug_like'] & index['high_bioactivity']).rows().tolist() == [0]
+
+
+def test_category_values(compounds):
+    index = BitmapIndex(compounds)
+    assert index.values('toxicity') == ['Faible', 'Élevée', 'Modérée']
+    assert index.value('toxicity', 'Faible').rows().tolist() == [0, 2]
+    assert index.value('toxicity', 'Inconnue').count() == 0
+    assert index.any_of('molecular_family', ['Alkaloid', 'Terpenoid']).rows().tolist() == [1, 3, 4]
+    assert index.value_counts('molecular_family') == {'Flavonoid': 2, 'Alkaloid': 2, 'Terpenoid': 1}
+    assert index.values('solubility') == [] and index.value_counts('solubility') == {}
+    assert (~index.value('toxicity', 'Élevée')).rows().tolist() == [0, 2, 3, 4]
+
+
+def test_custom_predicates_and_index_alignment(compounds):
+    df = compounds.set_index(pd.Index([10, 20, 30, 40, 50]))
+    index = BitmapIndex(df, predicates={'flavonoid': ('molecular_family', lambda d: d['molecular_family'] == 'Flavonoid')},
+                        category_columns=('toxicity',))
+    assert index.predicates == ('flavonoid',)
+    # Positions dans la table, pas étiquettes de l'index
+    assert index['flavonoid'].rows().tolist() == [0, 2]
+    assert index.value('toxicity', 'Faible').rows().tolist() == [0, 2]
+    assert index.values('molecular_family') == []
+
+
+def test_discovery_rows_draw_each_category():
+    rng = np.random.default_rng(0)
+    size = 500
+    df = pd.DataFrame({
+        'is_champion': rng.random(size) < 0.05,
+        'bioactivity_score': rng.random(size),
+        'molecular_weight': rng.uniform(100, 900, size),
+    })
+    index = BitmapIndex(df)
+    rows = discovery_rows(index, seed=42)
+    assert rows.tolist() == discovery_rows(index, seed=42).tolist()
+    assert rows.tolist() != discovery_rows(index, seed=43).tolist()
+    # Dans l'ordre des quotas : 3 champions, 5 haute bioactivité, 4 > 670 Da, 15 quelconques
+    assert len(rows) == 27
+    assert df['is_champion'].to_numpy()[rows[:3]].all()
+    assert (df['bioactivity_score'].to_numpy()[rows[3:8]] > 0.8).all()
+    assert (df['molecular_weight'].to_numpy()[rows[8:12]] > 670).all()
+
+
+def test_discovery_rows_skip_missing_or_small_categories():
+    df = pd.DataFrame({'is_champion': [True, False, False, False]})
+    rows = discovery_rows(BitmapIndex(df), seed=1, quotas=(('champion', 3), ('large', 4), (None, 2)))
+    # Un seul champion, pas de colonne de poids : le champion puis 2 lignes quelconques
+    assert rows[0] == 0 and len(rows) == 3
+    assert len(discovery_rows(BitmapIndex(df), seed=1, quotas=())) == 0
@@ -0,0 +1,86 @@
+"""Tests de l'index multi-champs avec classement BM25 (mega_bm25_index)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mega_bm25_index import BM25Index
+from mega_search_index import normalize_name
+from mega_text_normalization import normalize_series
+
+
+@pytest.fixture
+def compounds():
+    return pd.DataFrame({
+        'name': ['Quercétine', 'Flavone', 'Curcumine', 'Apigénine', 'Flavonol A', 'Lutéoline'],
+        'molecular_family': ['Flavonoid', 'Flavonoid', 'Curcuminoid', 'Flavonoid', 'Flavonol', 'Flavonoid'],
+        'targets': [3, 1, 2, 5, 0, 4],
+        'bioactivity_score': [0.9, 0.5, 0.8, 0.7, 0.6, 0.9],
+    })
+
+
+def _matching_rows(df, term):
+    """Lignes dont un champ texte indexé contient le terme normalisé"""
+    needle = normalize_name(term)
+    matched = np.zeros(len(df), dtype=bool)
+    for field in ('name', 'molecular_family'):
+        matched |= normalize_series(df[field]).fillna('').str.contains(needle, regex=False).to_numpy()
+    return set(np.flatnonzero(matched))
+
+
+def test_only_text_fields_are_indexed(compounds):
+    # targets est un nombre de cibles : pas de champ texte
+    assert BM25Index(compounds).fields == ('name', 'molecular_family')
+
+
+@pytest.mark.parametrize('term', ['flavo', 'FLAVONOID', 'curcum', 'ine', 'o'])
+def test_search_returns_every_matching_row(compounds, term):
+    rows, scores = BM25Index(compounds).search(term, limit=len(compounds))
+    assert set(rows.tolist()) == _matching_rows(compounds, term)
+    assert len(rows) == len(set(rows.tolist()))
+    assert np.all(np.diff(scores) <= 0)
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 5])
+def test_limit_keeps_the_best_results(compounds, limit):
+    index = BM25Index(compounds)
+    rows, scores = index.search('flavo', limit=len(compounds))
+    expected = sorted(zip(scores.tolist(), rows.tolist()), key=lambda pair: (-pair[0], pair[1]))
+    top_rows, top_scores = index.search('flavo', limit=limit)
+    assert top_rows.tolist() == [row for _, row in expected[:limit]]
+    np.testing.assert_allclose(top_scores, [score for score, _ in expected[:limit]])
+
+
+def test_name_matches_rank_above_family_matches(compounds):
+    rows, _ = BM25Index(compounds).search('flavo', limit=10)
+    # Flavone et Flavonol A contiennent le terme dans leur nom (boost 3)
+    assert set(rows[:2].tolist()) == {1, 4}
+
+
+def test_prior_breaks_ties_between_equal_text_scores(compounds):
+    rows, scores = BM25Index(compounds).search('flavonoid', limit=10)
+    # Même famille : l'ordre suit le score de bioactivité
+    assert rows.tolist() == [0, 5, 3, 1]
+    assert scores[0] == pytest.approx(scores[3] + 2.0 * (0.9 - 0.5))
+
+
+def test_field_boosts_and_prior_weights_are_configurable(compounds):
+    index = BM25Index(compounds, field_boosts={'molecular_family': 1.0}, prior_weights={})
+    assert index.fields == ('molecular_family',)
+    rows, scores = index.search('flavonoid', limit=10)
+    # Sans a priori, valeurs identiques : scores égaux, ordre de la table
+    assert rows.tolist() == [0, 1, 3, 5]
+    assert np.allclose(scores, scores[0])
+
+
+@pytest.mark.parametrize('term, limit', [('zzz', 10), ('', 10), ('   ', 10), ('flavo', 0)])
+def test_empty_results(compounds, term, limit):
+    rows, scores = BM25Index(compounds).search(term, limit=limit)
+    assert len(rows) == 0 and len(scores) == 0
+    assert rows.dtype == np.int64 and scores.dtype == np.float64
+
+
+def test_missing_values_are_ignored():
+    df = pd.DataFrame({'name': ['Rutine', None, 'Rutinose'], 'molecular_family': [None, 'Glycoside', None]})
+    rows, _ = BM25Index(df).search('rutin', limit=10)
+    assert sorted(rows.tolist()) == [0, 2]
@@ -0,0 +1,181 @@
+"""Tests du cache invalidé par empreinte de contenu (mega_cache.fingerprint_cache)"""
+
+import os
+import threading
+import time
+
+import pandas as pd
+
+import mega_cache
+from mega_cache import content_fingerprint, content_hash, fingerprint_cache, stat_fingerprint
+
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def _join_background():
+    """Attend les hachages et rafraîchissements lancés en arrière-plan"""
+    for thread in threading.enumerate():
+        if thread.name.startswith(('phytoai-fingerprint-', 'phytoai-revalidate-')):
+            thread.join(5.0)
+
+
+def _touch(path, content: str):
+    """Réécrit le fichier en garantissant un mtime différent"""
+    stat = os.stat(path)
+    path.write_text(content)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_fingerprints(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('a,b\n1,2\n')
+    assert content_hash(str(path)) == content_hash(str(path))
+    missing = str(tmp_path / 'absent.csv')
+    assert stat_fingerprint([missing]) == ((missing, None),)
+    assert content_fingerprint([missing]) == ((missing, None),)
+    before = content_fingerprint([str(path)])
+    _touch(path, 'a,b\n1,3\n')
+    assert content_fingerprint([str(path)]) != before
+
+
+def test_value_is_served_until_content_changes(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('a\n1\n')
+    calls = []
+
+    @fingerprint_cache(paths=(str(path),))
+    def load():
+        calls.append(1)
+        return pd.read_csv(path)
+
+    assert load()['a'].tolist() == [1]
+    assert load()['a'].tolist() == [1] and len(calls) == 1
+    _join_background()
+
+    # mtime modifié, contenu identique : pas de rechargement
+    _touch(path, 'a\n1\n')
+    load()
+    _join_background()
+    assert len(calls) == 1
+
+    # Contenu modifié : ancienne valeur servie, rechargement en arrière-plan
+    _touch(path, 'a\n2\n')
+    assert load()['a'].tolist() == [1]
+    assert _wait_for(lambda: load()['a'].tolist() == [2])
+    _join_background()
+    assert len(calls) == 2
+
+
+def test_concurrent_readers_trigger_a_single_reload(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('a\n1\n')
+    calls = []
+
+    @fingerprint_cache(paths=(str(path),))
+    def load():
+        calls.append(1)
+        time.sleep(0.02)
+        return pd.read_csv(path)
+
+    load()
+    _join_background()
+    _touch(path, 'a\n2\n')
+
+    # Des requêtes détenant encore l'ancienne entrée pendant et après son
+    # remplacement ne relancent pas de rechargement
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            load()
+
+    readers = [threading.Thread(target=read) for _ in range(8)]
+    for reader in readers:
+        reader.start()
+    assert _wait_for(lambda: load()['a'].tolist() == [2])
+    time.sleep(0.1)
+    stop.set()
+    for reader in readers:
+        reader.join()
+    _join_background()
+    assert len(calls) == 2
+
+
+def test_first_call_does_not_wait_for_content_hash(tmp_path, monkeypatch):
+    path = tmp_path / 'data.csv'
+    path.write_text('a\n1\n')
+    release = threading.Event()
+    hashed = []
+
+    def slow_hash(source):
+        release.wait(5.0)
+        hashed.append(source)
+        return 'hash'
+
+    monkeypatch.setattr(mega_cache, 'content_hash', slow_hash)
+
+    calls = []
+
+    @fingerprint_cache(paths=(str(path),))
+    def load():
+        calls.append(1)
+        return pd.read_csv(path)
+
+    started = time.time()
+    assert load()['a'].tolist() == [1]
+    assert time.time() - started < 2.0 and hashed == []
+    release.set()
+    _join_background()
+    assert hashed == [str(path)]
+
+    # Contenu haché en arrière-plan : un simple contact ne recharge pas
+    _touch(path, 'a\n1\n')
+    load()
+    _join_background()
+    assert len(hashed) == 2 and len(calls) == 1
+
+
+def test_copies_and_keys():
+    calls = []
+
+    @fingerprint_cache(version=lambda: 1, maxsize=2)
+    def frame(n, _ignored=None):
+        calls.append(n)
+        return pd.DataFrame({'x': range(n)})
+
+    first = frame(3, _ignored='a')
+    first['y'] = 0  # Copie superficielle : le cache n'est pas modifié
+    assert list(frame(3, _ignored='b').columns) == ['x']
+    assert calls == [3]
+
+    # LRU de 2 clés : 3 est la plus ancienne quand 5 arrive
+    frame(4)
+    frame(5)
+    frame(3)
+    assert calls == [3, 4, 5, 3]
+
+    frame.clear()
+    frame(5)
+    assert calls == [3, 4, 5, 3, 5]
+
+
+def test_version_token_triggers_refresh():
+    version = {'value': 1}
+    calls = []
+
+    @fingerprint_cache(version=lambda: version['value'], copy=False)
+    def compute():
+        calls.append(version['value'])
+        return version['value']
+
+    assert compute() == 1
+    version['value'] = 2
+    assert _wait_for(lambda: compute() == 2)
+    assert calls == [1, 2]
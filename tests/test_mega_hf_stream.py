@@ -0,0 +1,150 @@
+"""Tests hors ligne du chargeur Hugging Face / Arrow (mega_hf_stream, shards Parquet locaux)"""
+
+import importlib
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from mega_hf_stream import StreamingTable, datasets_available, iter_arrow_batches, load_hf_dataframe
+
+
+def _shard(path, start, stop):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({'name': [f'C{i}' for i in range(start, stop)], 'score': [i / 10 for i in range(start, stop)]}) \
+        .to_parquet(path, row_group_size=4)
+
+
+@pytest.fixture
+def hf_dir(tmp_path):
+    """Dossier au format des exports HF : data/<split>-0000i-of-0000n.parquet"""
+    _shard(tmp_path / 'hub' / 'data' / 'compounds-00000-of-00002.parquet', 0, 10)
+    _shard(tmp_path / 'hub' / 'data' / 'compounds-00001-of-00002.parquet', 10, 15)
+    _shard(tmp_path / 'hub' / 'data' / 'bioactivities-00000-of-00001.parquet', 100, 103)
+    return str(tmp_path / 'hub')
+
+
+def test_split_reads_its_shards_in_order(hf_dir):
+    df = load_hf_dataframe(hf_dir, split='compounds', batch_size=3)
+    assert df['name'].tolist() == [f'C{i}' for i in range(15)]
+    assert df.index.tolist() == list(range(15))
+    assert load_hf_dataframe(hf_dir, split='bioactivities')['name'].tolist() == ['C100', 'C101', 'C102']
+
+
+def test_missing_split_is_empty(hf_dir):
+    assert load_hf_dataframe(hf_dir, split='train').empty
+
+
+def test_max_rows_and_columns(hf_dir):
+    batches = list(iter_arrow_batches(hf_dir, split='compounds', batch_size=4, columns=['name'], max_rows=11))
+    assert [len(batch) for batch in batches] == [4, 4, 2, 1]
+    assert all(batch.columns.tolist() == ['name'] for batch in batches)
+    assert load_hf_dataframe(hf_dir, split='compounds', max_rows=0).empty
+
+
+def test_split_directory_and_glob_sources(tmp_path):
+    _shard(tmp_path / 'ds' / 'train' / 'part-0.parquet', 0, 3)
+    _shard(tmp_path / 'ds' / 'test' / 'part-0.parquet', 3, 5)
+    assert load_hf_dataframe(str(tmp_path / 'ds'), split='test')['name'].tolist() == ['C3', 'C4']
+    assert len(load_hf_dataframe(str(tmp_path / 'ds' / 'train' / '*.parquet'), split='train')) == 3
+    assert len(load_hf_dataframe(str(tmp_path / 'ds' / 'train' / 'part-0.parquet'))) == 3
+
+
+def test_streaming_table_is_readable_while_loading():
+    release = threading.Event()
+    completed = []
+
+    def batches():
+        yield pd.DataFrame({'name': ['A', 'B']})
+        release.wait(5)
+        yield pd.DataFrame({'name': ['C']})
+
+    stream = StreamingTable(batches(), on_complete=completed.append).start()
+    assert stream.wait(min_rows=2, timeout=5)
+    assert stream.frame()['name'].tolist() == ['A', 'B'] and not stream.done
+
+    release.set()
+    assert stream.wait(min_rows=3, timeout=5)
+    stream._thread.join(5)
+    assert stream.done and stream.error is None
+    assert completed[0]['name'].tolist() == ['A', 'B', 'C']
+    assert stream.frame().index.tolist() == [0, 1, 2]
+
+
+def test_streaming_table_records_errors():
+    completed = []
+
+    def batches():
+        yield pd.DataFrame({'name': ['A']})
+        raise ConnectionError("hub injoignable")
+
+    stream = StreamingTable(batches(), on_complete=completed.append).start()
+    stream._thread.join(5)
+    assert isinstance(stream.error, ConnectionError)
+    assert stream.rows_loaded == 1 and completed == []
+    assert not stream.wait(min_rows=2, timeout=1)
+
+
+def test_namespace_folder_is_not_the_datasets_package(tmp_path, monkeypatch):
+    (tmp_path / 'datasets').mkdir()
+    monkeypatch.setattr(sys, 'path', [str(tmp_path)])
+    monkeypatch.delitem(sys.modules, 'datasets', raising=False)
+    importlib.invalidate_caches()
+    assert not datasets_available()
+
+
+class _Dataset:
+    """Dataset minimal (interface with_format / iter / select_columns de datasets)"""
+
+    def __init__(self, rows, arrow=True, fail_after=None):
+        self.rows = rows
+        self.arrow = arrow
+        self.fail_after = fail_after
+        self.format = None
+
+    def select_columns(self, columns):
+        return _Dataset([{key: row[key] for key in columns} for row in self.rows], self.arrow, self.fail_after)
+
+    def with_format(self, kind):
+        if not self.arrow:
+            raise ValueError(f"format inconnu: {kind}")
+        dataset = _Dataset(self.rows, self.arrow, self.fail_after)
+        dataset.format = kind
+        return dataset
+
+    def iter(self, batch_size):
+        import pyarrow as pa
+
+        for number, start in enumerate(range(0, len(self.rows), batch_size)):
+            if self.fail_after is not None and number >= self.fail_after:
+                raise ValueError("connexion interrompue")
+            chunk = self.rows[start:start + batch_size]
+            batch = {key: [row[key] for row in chunk] for key in chunk[0]}
+            yield pa.Table.from_pydict(batch) if self.format == 'arrow' else batch
+
+
+ROWS = [{'name': f'C{i}', 'score': i / 10} for i in range(7)]
+
+
+@pytest.mark.parametrize('arrow', [True, False])
+def test_dataset_batches(arrow):
+    from mega_hf_stream import _iter_dataset_batches
+
+    batches = list(_iter_dataset_batches(_Dataset(ROWS, arrow=arrow), 3, ['name']))
+    assert [batch.num_rows for batch in batches] == [3, 3, 1]
+    assert sum((batch.column('name').to_pylist() for batch in batches), []) == [row['name'] for row in ROWS]
+    assert list(_iter_dataset_batches(_Dataset([]), 3, None)) == []
+
+
+def test_error_after_first_batch_is_not_retried():
+    from mega_hf_stream import _iter_dataset_batches
+
+    seen = []
+    with pytest.raises(ValueError, match="interrompue"):
+        for batch in _iter_dataset_batches(_Dataset(ROWS, fail_after=1), 3, None):
+            seen.extend(batch.column('name').to_pylist())
+    # Premier lot produit une seule fois, pas de reprise depuis le début
+    assert seen == ['C0', 'C1', 'C2']
@@ -0,0 +1,44 @@
+"""Tests des identifiants stables du format streamlit (mega_streamlit_connector)"""
+
+import numpy as np
+import pandas as pd
+
+from mega_streamlit_connector import format_mega_for_streamlit, source_row_numbers, stable_mega_ids
+
+
+def _mega(names):
+    return pd.DataFrame({'Nom': names, 'SMILES': ['C' * (i + 1) for i in range(len(names))]})
+
+
+def test_homonyms_get_distinct_ids():
+    formatted = format_mega_for_streamlit(_mega(['Quercetin', 'Quercetin', None, 'Rutin', 'Quercetin']))
+    assert formatted['mega_id'].is_unique
+    assert formatted['mega_id'].str.fullmatch(r'MEGA_REAL_[0-9a-f]{16}').all()
+    # Valeurs estimées : fonction du nom seulement
+    assert formatted['bioactivity_score'].iloc[0] == formatted['bioactivity_score'].iloc[1]
+
+
+def test_ids_follow_source_rows_across_subsets():
+    mega = _mega(['Quercetin', 'Quercetin', 'Rutin', 'Curcumin', 'Quercetin'])
+    full = format_mega_for_streamlit(mega)
+    # Échantillon : mêmes lignes source, mêmes identifiants que la table complète
+    subset = format_mega_for_streamlit(mega.iloc[[4, 1, 3]])
+    assert subset['mega_id'].tolist() == full['mega_id'].iloc[[4, 1, 3]].tolist()
+    assert format_mega_for_streamlit(mega)['mega_id'].equals(full['mega_id'])
+
+
+def test_source_row_numbers():
+    assert source_row_numbers(pd.DataFrame(index=[7, 3, 9])).tolist() == [7, 3, 9]
+    assert source_row_numbers(pd.DataFrame(index=['a', 'b'])).tolist() == [0, 1]
+
+
+def test_stable_mega_ids_mix_name_and_row():
+    name_hash = np.array([1, 1, 2], dtype=np.uint64)
+    ids = stable_mega_ids(name_hash, np.array([0, 1, 0], dtype=np.uint64), prefix='X_')
+    assert len(set(ids)) == 3 and all(value.startswith('X_') for value in ids)
+    assert stable_mega_ids(name_hash, np.array([0, 1, 0], dtype=np.uint64), prefix='X_').tolist() == ids.tolist()
+
+
+def test_empty_frame_has_all_columns():
+    formatted = format_mega_for_streamlit(pd.DataFrame(columns=['Nom', 'SMILES']))
+    assert len(formatted) == 0 and 'mega_id' in formatted.columns
@@ -0,0 +1,116 @@
+"""Tests du lecteur JSON MEGA en streaming (mega_json_stream)"""
+
+import json
+
+import pytest
+
+from mega_json_stream import (TOP_LEVEL, iter_json_batches, iter_json_records, load_compounds_table,
+                              load_json_tables, prefetch)
+
+
+def _write(path, payload):
+    path.write_text(json.dumps(payload, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def mega_json(tmp_path):
+    return _write(tmp_path / 'mega.json', {
+        'metadata': {'version': 2, 'sources': ['a', 'b']},
+        'compounds': [
+            {'name': 'Quercétine', 'molecular_weight': 302.236, 'smiles': 'O=c1c(O)c(-c2ccc(O)c(O)c2)oc2cc(O)cc(O)c12'},
+            {'name': 'Nom "entre guillemets" [et crochets]', 'molecular_weight': 123456789.5},
+            {'name': 'Curcumine', 'molecular_weight': 368.38},
+        ],
+        'total': 3,
+        'bioactivities': [{'compound': 'Quercétine', 'target': 'COX-2', 'ic50': 1.5e-6}],
+    })
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 1 << 20])
+def test_records_independent_of_chunk_size(mega_json, chunk_size):
+    """Valeurs coupées entre deux blocs (nombres, chaînes échappées) relues entières"""
+    records = list(iter_json_records(mega_json, keys=None, chunk_size=chunk_size))
+    expected = json.load(open(mega_json, encoding='utf-8'))
+    assert [key for key, _ in records] == ['compounds'] * 3 + ['bioactivities']
+    assert [record for _, record in records] == expected['compounds'] + expected['bioactivities']
+
+
+def test_unrequested_arrays_are_skipped(mega_json):
+    records = list(iter_json_records(mega_json, keys=('bioactivities',), chunk_size=5))
+    assert records == [('bioactivities', {'compound': 'Quercétine', 'target': 'COX-2', 'ic50': 1.5e-6})]
+
+
+def test_top_level_array(tmp_path):
+    path = _write(tmp_path / 'root.json', [{'name': 'A'}, {'name': 'B'}])
+    assert list(iter_json_records(path, chunk_size=3)) == [(TOP_LEVEL, {'name': 'A'}), (TOP_LEVEL, {'name': 'B'})]
+
+
+def test_empty_object_and_arrays(tmp_path):
+    assert list(iter_json_records(_write(tmp_path / 'empty.json', {}))) == []
+    assert list(iter_json_records(_write(tmp_path / 'arrays.json', {'compounds': []}))) == []
+
+
+def test_invalid_json_raises(tmp_path):
+    path = tmp_path / 'broken.json'
+    path.write_text('{"compounds": [{"name": "A"} {"name": "B"}]}', encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(iter_json_records(str(path)))
+
+
+def test_batches_have_fixed_size_and_never_mix_keys(tmp_path):
+    path = _write(tmp_path / 'mega.json', {
+        'compounds': [{'name': f'C{i}'} for i in range(5)],
+        'bioactivities': [{'compound': f'C{i}'} for i in range(3)],
+    })
+    batches = list(iter_json_batches(path, keys=None, batch_size=2))
+    assert [(key, len(batch)) for key, batch in batches] == [
+        ('compounds', 2), ('compounds', 2), ('compounds', 1), ('bioactivities', 2), ('bioactivities', 1)]
+    assert list(batches[0][1]['name']) == ['C0', 'C1']
+
+
+def test_load_json_tables_concatenates_batches(mega_json):
+    tables = load_json_tables(mega_json, batch_size=2)
+    assert list(tables['compounds']['name']) == ['Quercétine', 'Nom "entre guillemets" [et crochets]', 'Curcumine']
+    assert tables['compounds'].index.tolist() == [0, 1, 2]
+    assert len(tables['bioactivities']) == 1
+
+
+def test_load_compounds_table_falls_back_to_first_array(tmp_path):
+    path = _write(tmp_path / 'other.json', {'count': 2, 'items': [{'name': 'A'}, {'name': 'B'}], 'more': [{'x': 1}]})
+    key, table = load_compounds_table(path, batch_size=1)
+    assert key == 'items'
+    assert list(table['name']) == ['A', 'B']
+
+
+def test_load_compounds_table_prefers_known_keys(mega_json):
+    key, table = load_compounds_table(mega_json)
+    assert key == 'compounds' and len(table) == 3
+
+
+def test_prefetch_keeps_order_and_propagates_errors():
+    assert list(prefetch(iter(range(100)), depth=2)) == list(range(100))
+
+    def failing():
+        yield 1
+        raise RuntimeError("lot illisible")
+
+    with pytest.raises(RuntimeError, match="lot illisible"):
+        list(prefetch(failing()))
+
+
+def test_prefetch_stops_producer_when_abandoned():
+    produced = []
+
+    def endless():
+        i = 0
+        while True:
+            produced.append(i)
+            yield i
+            i += 1
+
+    iterator = prefetch(endless(), depth=2)
+    assert [next(iterator) for _ in range(3)] == [0, 1, 2]
+    iterator.close()
+    count = len(produced)
+    assert count <= 3 + 2 + 1
@@ -0,0 +1,107 @@
+"""Tests de la pagination par curseur (mega_pagination)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mega_filter_engine import FilterEngine
+from mega_pagination import (Page, keyset_cursor, offset_cursor, paginate_frame, paginate_query,
+                             parse_keyset_cursor)
+
+
+@pytest.fixture
+def compounds():
+    rng = np.random.default_rng(3)
+    size = 137
+    # Scores arrondis (nombreuses égalités) et quelques valeurs manquantes
+    scores = np.round(rng.random(size), 1)
+    scores[rng.choice(size, 9, replace=False)] = np.nan
+    return pd.DataFrame({
+        'bioactivity_score': scores,
+        'molecular_weight': rng.uniform(100, 900, size),
+        'toxicity': rng.choice(['Faible', 'Modérée', 'Élevée'], size),
+    })
+
+
+def _expected_order(df, mask):
+    """Ordre de référence : tri stable par bioactivité décroissante, manquantes en fin"""
+    return df[mask].sort_values('bioactivity_score', ascending=False, kind='stable',
+                                na_position='last').index.tolist()
+
+
+def _walk(engine, generation, page_size, **filters):
+    pages, cursor = [], None
+    while True:
+        rows, total, start, cursor = paginate_query(engine, generation, cursor=cursor, page_size=page_size, **filters)
+        pages.append((rows.tolist(), total, start))
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize('page_size', [1, 7, 20, 137, 500])
+def test_pages_cover_the_query_once_in_rank_order(compounds, page_size):
+    engine = FilterEngine(compounds)
+    filters = {'ranges': {'molecular_weight': (200, 800)}, 'categories': {'toxicity': ['Faible', 'Élevée']}}
+    pages = _walk(engine, 4, page_size, **filters)
+
+    mask = compounds['molecular_weight'].between(200, 800) & compounds['toxicity'].isin(['Faible', 'Élevée'])
+    expected = _expected_order(compounds, mask)
+    assert [row for rows, _, _ in pages for row in rows] == expected
+    assert {total for _, total, _ in pages} == {len(expected)}
+    assert [start for _, _, start in pages] == list(range(0, len(expected), page_size))[:len(pages)]
+    assert all(len(rows) == page_size for rows, _, _ in pages[:-1])
+
+
+def test_within_restricts_the_population(compounds):
+    engine = FilterEngine(compounds)
+    within = np.arange(0, len(compounds), 3)
+    pages = _walk(engine, 1, 10, within=within)
+    mask = np.zeros(len(compounds), dtype=bool)
+    mask[within] = True
+    assert [row for rows, _, _ in pages for row in rows] == _expected_order(compounds, mask)
+
+
+def test_empty_query_has_no_next_cursor(compounds):
+    rows, total, start, cursor = paginate_query(FilterEngine(compounds), 1, ranges={'molecular_weight': (0, 1)})
+    assert len(rows) == 0 and total == 0 and start == 0 and cursor is None
+
+
+def test_stale_or_invalid_cursor_restarts_at_first_page(compounds):
+    engine = FilterEngine(compounds)
+    first, _, _, cursor = paginate_query(engine, 2, page_size=10)
+    second, _, start, _ = paginate_query(engine, 2, cursor=cursor, page_size=10)
+    assert start == 10 and not set(first.tolist()) & set(second.tolist())
+    # Les données ont changé de version : positions sans objet, retour au début
+    for stale in (cursor.replace('k:2:', 'k:3:'), 'garbage', offset_cursor(10), None):
+        rows, _, start, _ = paginate_query(engine, 2, cursor=stale, page_size=10)
+        assert start == 0 and rows.tolist() == first.tolist()
+
+
+def test_keyset_cursor_round_trip():
+    cursor = keyset_cursor(5, 40, 0.1 + 0.2, 1234)
+    assert parse_keyset_cursor(cursor, 5) == (40, (0.1 + 0.2, 1234))
+    assert parse_keyset_cursor(keyset_cursor(5, 3, float('-inf'), 7), 5) == (3, (float('-inf'), 7))
+    assert parse_keyset_cursor(cursor, 6) == (0, None)
+    assert parse_keyset_cursor('k:5:1:2', 5) == (0, None)
+
+
+def test_paginate_frame(compounds):
+    pages, cursor = [], None
+    while True:
+        page = paginate_frame(compounds, cursor, page_size=50)
+        pages.append(page)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert [page.number for page in pages] == [1, 2, 3]
+    assert {page.page_count for page in pages} == {3}
+    assert pd.concat([page.items for page in pages]).equals(compounds)
+    # Décalage hors de la table ou curseur d'un autre type : première page
+    assert paginate_frame(compounds, offset_cursor(1000), 50).start == 0
+    assert paginate_frame(compounds, keyset_cursor(1, 50, 0.5, 3), 50).start == 0
+
+
+def test_page_properties():
+    page = Page(pd.DataFrame({'a': range(5)}), total=45, page_size=20, start=40)
+    assert len(page) == 5 and page.number == 3 and page.page_count == 3
+    assert Page(pd.DataFrame(), total=0, page_size=20).page_count == 1
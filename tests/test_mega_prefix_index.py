@@ -0,0 +1,68 @@
+"""Tests de l'index de préfixes pour l'autocomplétion (mega_prefix_index)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mega_prefix_index import PrefixIndex
+from mega_search_index import normalize_name
+from mega_text_normalization import normalize_series
+
+
+def _brute_force(names, scores, prefix, k, synonyms=None):
+    """Lignes dont un nom ou synonyme commence par prefix, score décroissant puis ordre de la table"""
+    needle = normalize_name(prefix)
+    keys = normalize_series(names).fillna('')
+    matched = set(np.flatnonzero(keys.str.startswith(needle).to_numpy()))
+    if synonyms is not None:
+        for row, value in enumerate(synonyms):
+            if isinstance(value, str) and any(normalize_name(part).startswith(needle) for part in value.split('|')):
+                matched.add(row)
+    values = pd.to_numeric(pd.Series(scores), errors='coerce').fillna(-np.inf).to_numpy()
+    return sorted(matched, key=lambda row: (-values[row], row))[:k]
+
+
+@pytest.fixture
+def small():
+    names = pd.Series(['Quercétine', 'Quinine', 'Curcumine', 'quercetin glucoside', 'Berbérine', 'Quassine'])
+    scores = pd.Series([0.7, 0.9, 0.8, 0.7, None, 0.95])
+    synonyms = pd.Series([None, 'Chinine', 'Diferuloylmethane|Turmeric yellow', None, 'Umbellatine', None])
+    return names, scores, synonyms
+
+
+@pytest.mark.parametrize('prefix', ['qu', 'QUER', 'c', 'tur', 'b', 'x', 'u'])
+def test_complete_matches_brute_force(small, prefix):
+    names, scores, synonyms = small
+    index = PrefixIndex(names, scores, synonyms)
+    assert index.complete(prefix, 4).tolist() == _brute_force(names, scores, prefix, 4, synonyms)
+
+
+def test_suggest_and_lookup(small):
+    names, scores, synonyms = small
+    index = PrefixIndex(names, scores, synonyms)
+    assert index.suggest('qu', 2) == ['Quassine', 'Quinine']
+    # Un nom et un synonyme de la même ligne : une seule complétion
+    assert index.complete('qu', 10).tolist().count(1) == 1
+    assert index.lookup('chinine').tolist() == [1]
+    assert index.lookup('QUERCÉTINE').tolist() == [0]
+    assert len(index.lookup('quer')) == 0
+    assert len(index.complete('', 5)) == 0 and len(index.complete('qu', 0)) == 0
+
+
+def test_precomputed_prefixes_match_the_scan():
+    """Plages > _SCAN_LIMIT : meilleures lignes précalculées, mêmes réponses qu'un parcours"""
+    rng = np.random.default_rng(1)
+    letters = np.array(list('abc'))
+    names = pd.Series([''.join(rng.choice(letters, 6)) for _ in range(9000)])
+    scores = pd.Series(np.round(rng.uniform(0, 1, len(names)), 2))  # égalités fréquentes
+    index = PrefixIndex(names, scores)
+    assert index._top, "aucun préfixe précalculé"
+    for prefix in ['a', 'b', 'ab', 'abc', 'ccc']:
+        assert index.complete(prefix, 20).tolist() == _brute_force(names, scores, prefix, 20)
+
+
+def test_prenormalized_names_are_used_as_is():
+    names = pd.Series(['Acide Caféique', 'Apigénine'])
+    index = PrefixIndex(names, pd.Series([0.1, 0.2]), normalized_names=pd.Series(['acide cafeique', None]))
+    assert index.complete('a', 5).tolist() == [0]
+    assert len(index) == 1
@@ -0,0 +1,158 @@
+"""Tests du cache LRU de résultats de requêtes (mega_cache.QueryResultCache)"""
+
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mega_cache import _ENTRY_OVERHEAD, QueryResultCache, get_query_cache
+
+
+def _rows(count: int) -> np.ndarray:
+    return np.arange(count, dtype=np.int64)
+
+
+def test_get_and_put():
+    cache = QueryResultCache(max_bytes=1 << 20)
+    assert cache.get('absent') is None
+    stored = cache.put('a', _rows(10))
+    assert cache.get('a') is stored and len(cache) == 1
+    # Résultats figés : une session ne peut pas modifier ceux des autres
+    with pytest.raises(ValueError):
+        stored[0] = 42
+    assert cache.stats()['bytes'] == 80 + _ENTRY_OVERHEAD
+
+
+def test_byte_budget_evicts_least_recently_used():
+    entry = 800 + _ENTRY_OVERHEAD
+    cache = QueryResultCache(max_bytes=3 * entry)
+    for key in 'abc':
+        cache.put(key, _rows(100))
+    cache.get('a')  # 'b' devient la plus ancienne
+    cache.put('d', _rows(100))
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in 'acd')
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['bytes'] == 3 * entry <= stats['max_bytes']
+
+
+def test_replacing_a_key_updates_the_budget():
+    cache = QueryResultCache(max_bytes=1 << 20)
+    cache.put('a', _rows(100))
+    cache.put('a', _rows(10))
+    assert len(cache) == 1 and cache.stats()['bytes'] == 80 + _ENTRY_OVERHEAD
+
+
+def test_oversized_results_are_returned_but_not_kept():
+    cache = QueryResultCache(max_bytes=1000)
+    value = cache.put('big', _rows(1000))
+    assert len(value) == 1000 and cache.get('big') is None and len(cache) == 0
+    # Le tableau non conservé reste modifiable par l'appelant
+    value[0] = 1
+
+
+def test_tuple_and_bytes_sizes():
+    cache = QueryResultCache(max_bytes=1 << 20)
+    pair = (_rows(10), np.zeros(10, dtype=np.float32))
+    rows, scores = cache.put('pair', pair)
+    assert not rows.flags.writeable and not scores.flags.writeable
+    png = b'x' * 100
+    cache.put('png', png)
+    assert cache.stats()['bytes'] == ((sys.getsizeof(pair) + 80 + 40 + _ENTRY_OVERHEAD)
+                                      + (sys.getsizeof(png) + _ENTRY_OVERHEAD))
+
+
+def test_other_values_count_against_the_budget():
+    cache = QueryResultCache(max_bytes=1 << 20)
+    names = [f"compound_{i}" for i in range(1000)]
+    cache.put('names', names)
+    assert cache.stats()['bytes'] > sum(len(name) for name in names)
+    cache.clear()
+    frame = pd.DataFrame({'name': names, 'score': np.arange(1000, dtype=np.float64)})
+    cache.put('frame', frame)
+    assert cache.stats()['bytes'] >= 8000 + sum(len(name) for name in names)
+    # Trop gros pour le budget : non conservé
+    small = QueryResultCache(max_bytes=4096)
+    small.put('names', names)
+    assert len(small) == 0
+
+
+def test_cached_none_is_a_hit():
+    cache = QueryResultCache(max_bytes=1 << 20)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return None
+
+    assert cache.get_or_compute('nothing', compute) is None
+    assert cache.get_or_compute('nothing', compute) is None
+    assert len(calls) == 1 and cache.stats()['hits'] == 1
+
+
+def test_key_locks_do_not_outlive_unstored_results():
+    cache = QueryResultCache(max_bytes=1000)
+    for i in range(50):
+        cache.get_or_compute(('big', i), lambda: _rows(1000))
+
+    def fail():
+        raise RuntimeError("requête invalide")
+
+    for i in range(50):
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute(('failed', i), fail)
+    assert len(cache) == 0 and cache._key_locks == {}
+
+
+def test_get_or_compute_counts_hits_and_misses():
+    cache = QueryResultCache(max_bytes=1 << 20)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return _rows(5)
+
+    first = cache.get_or_compute(('search', 'quercetin', 7), compute)
+    second = cache.get_or_compute(('search', 'quercetin', 7), compute)
+    assert first is second and len(calls) == 1
+    # Autre version des données : autre clé, nouveau calcul
+    cache.get_or_compute(('search', 'quercetin', 8), compute)
+    assert len(calls) == 2
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 2
+    assert stats['hit_rate'] == pytest.approx(1 / 3)
+
+
+def test_get_or_compute_runs_once_under_concurrency():
+    cache = QueryResultCache(max_bytes=1 << 20)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return _rows(3)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == 8 and all(result is results[0] for result in results)
+
+
+def test_clear():
+    cache = QueryResultCache(max_bytes=1 << 20)
+    cache.put('a', _rows(10))
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()['bytes'] == 0 and cache.get('a') is None
+
+
+def test_process_wide_cache_is_shared():
+    assert get_query_cache() is get_query_cache()
+    assert isinstance(get_query_cache(), QueryResultCache)
@@ -0,0 +1,93 @@
+"""Tests de l'index d'offsets de lignes du CSV MEGA (mega_row_index)"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mega_row_index import get_row_index, scan_record_offsets
+
+CSV_TEXT = (
+    'Nom,Catégorie,SMILES\n'
+    'Quercétine,Flavonoïde,O=c1cc(oc2c1cccc2)\n'
+    '"Nom\nsur deux lignes",Autre,CCO\n'
+    '"Virgule, et ""guillemets""",Terpène,CC\n'
+    'Curcumine,Polyphénol,C=O\n'
+)
+
+
+@pytest.fixture
+def mega_csv(tmp_path):
+    path = tmp_path / 'MEGA.csv'
+    path.write_text(CSV_TEXT, encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 16, 1 << 20])
+def test_offsets_ignore_newlines_inside_quotes(mega_csv, block_size):
+    offsets = scan_record_offsets(mega_csv, block_size=block_size)
+    data = CSV_TEXT.encode('utf-8')
+    # En-tête + 4 enregistrements + sentinelle de fin
+    assert len(offsets) == 6
+    assert offsets[-1] == len(data)
+    assert all(data[int(start) - 1:int(start)] == b'\n' for start in offsets[1:-1])
+
+
+def test_missing_final_newline(tmp_path):
+    path = tmp_path / 'MEGA.csv'
+    path.write_text('Nom\nA\nB', encoding='utf-8')
+    index = get_row_index(str(path))
+    assert index.num_rows == 2
+    assert list(index.read_rows([1, 0])['Nom']) == ['A', 'B']
+
+
+def test_read_rows_is_indexed_by_row_number(mega_csv):
+    index = get_row_index(mega_csv)
+    assert index.num_rows == 4
+    df = index.read_rows([3, 1, 1, 99, -1])
+    # Triées, dédupliquées, hors bornes ignorées
+    assert df.index.tolist() == [1, 3]
+    assert df['Nom'].tolist() == ['Nom\nsur deux lignes', 'Curcumine']
+
+
+def test_read_rows_projects_columns(mega_csv):
+    df = get_row_index(mega_csv).read_rows([2], columns=['Nom'])
+    assert df.columns.tolist() == ['Nom']
+    assert df.at[2, 'Nom'] == 'Virgule, et "guillemets"'
+
+
+def test_read_range_matches_full_read(mega_csv):
+    index = get_row_index(mega_csv)
+    full = pd.read_csv(mega_csv)
+    pd.testing.assert_frame_equal(index.read_range(1, 3), full.iloc[1:3])
+    assert index.read_range(3, 3).empty
+    assert len(index.read_range(2, 100)) == 2
+
+
+def test_sampling_helpers(mega_csv):
+    index = get_row_index(mega_csv)
+    sample = index.sample_rows(3, seed=7)
+    assert len(sample) == 3 and sample.index.is_unique
+    pd.testing.assert_frame_equal(sample, index.sample_rows(3, seed=7))
+    assert index.stratified_rows(2, skip_head=1).index.tolist() == [1, 3]
+    assert index.stratified_rows(2, skip_head=4).empty
+
+
+def test_index_is_persisted_and_rebuilt_when_the_file_changes(mega_csv):
+    first = get_row_index(mega_csv)
+    offsets_file = next(p for p in os.listdir('.mega_cache') if p.endswith('.rowidx.npy'))
+    assert first.num_rows == 4
+
+    with open(mega_csv, 'a', encoding='utf-8') as f:
+        f.write('Berbérine,Alcaloïde,CN\n')
+    os.utime(mega_csv, ns=(os.stat(mega_csv).st_atime_ns, os.stat(mega_csv).st_mtime_ns + 10**9))
+
+    second = get_row_index(mega_csv)
+    assert second.num_rows == 5
+    assert second.read_rows([4])['Nom'].tolist() == ['Berbérine']
+    assert np.load(os.path.join('.mega_cache', offsets_file)).shape == (7,)
+
+
+def test_missing_csv_has_no_index(tmp_path):
+    assert get_row_index(str(tmp_path / 'absent.csv')) is None
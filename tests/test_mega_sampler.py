@@ -0,0 +1,129 @@
+"""Tests de l'échantillonneur stratifié en une passe (mega_sampler)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mega_sampler import StratifiedReservoirSampler, sample_mega_stratified
+
+STRATA = [{'name': 'lourds', 'column': 'weight', 'op': 'gt', 'value': 900, 'quota': 5}]
+GROUP_QUOTAS = {'family': 3}
+
+
+@pytest.fixture
+def compounds():
+    rng = np.random.default_rng(0)
+    n = 400
+    return pd.DataFrame({
+        'name': [f'Composé {i}' for i in range(n)],
+        'weight': np.where(np.arange(n) % 50 == 0, 950.0, rng.uniform(100, 800, n)),
+        'family': np.where(np.arange(n) % 100 == 7, 'Rare', 'Commune'),
+    })
+
+
+def _sampler(total_size=30):
+    return StratifiedReservoirSampler(total_size, strata=STRATA, group_quotas=GROUP_QUOTAS)
+
+
+def test_result_does_not_depend_on_order_or_chunking(compounds):
+    whole = _sampler()
+    whole.update(compounds)
+
+    chunked = _sampler()
+    shuffled = compounds.sample(frac=1, random_state=3)
+    for start in range(0, len(shuffled), 57):
+        chunked.update(shuffled.iloc[start:start + 57])
+
+    pd.testing.assert_frame_equal(whole.result(), chunked.result())
+
+
+def test_merge_equals_single_pass(compounds):
+    single = _sampler()
+    single.update(compounds)
+
+    left, right = _sampler(), _sampler()
+    left.update(compounds.iloc[:123])
+    right.update(compounds.iloc[123:])
+    merged = left.merge(right)
+
+    pd.testing.assert_frame_equal(single.result(), merged.result())
+    assert merged.report() == single.report()
+    assert merged.rows_seen == len(compounds)
+
+
+def test_quotas_are_guaranteed(compounds):
+    sampler = _sampler(total_size=12)
+    sampler.update(compounds)
+    sample = sampler.result()
+
+    assert len(sample) == 12 and sample.index.is_unique
+    assert (sample['weight'] > 900).sum() >= 5
+    assert (sample['family'] == 'Rare').sum() >= 3
+    report = sampler.report()
+    assert report['lourds'] == {'population': 8, 'kept': 5}
+    assert report['family=Rare'] == {'population': 4, 'kept': 3}
+
+
+def test_seed_changes_the_sample(compounds):
+    first, other = _sampler(), StratifiedReservoirSampler(30, strata=STRATA, group_quotas=GROUP_QUOTAS, seed=7)
+    first.update(compounds)
+    other.update(compounds)
+    assert set(first.result().index) != set(other.result().index)
+
+
+def test_empty_input():
+    assert len(_sampler().result()) == 0
+
+
+@pytest.fixture
+def mega_csv(tmp_path, compounds):
+    raw = compounds.rename(columns={'name': 'Nom'})
+    # Noms invalides : écartés par le nettoyage standard, comme au chargement
+    raw.loc[[10, 20], 'Nom'] = ['', 'ab']
+    path = tmp_path / 'MEGA.csv'
+    raw.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_file_sample_matches_in_memory_sample(mega_csv, workers):
+    from mega_columnar_store import load_mega_columnar
+
+    kwargs = {'strata': STRATA, 'group_quotas': GROUP_QUOTAS, 'key_column': 'Nom'}
+    sample, report = sample_mega_stratified(20, csv_path=mega_csv, workers=workers, batch_size=37, **kwargs)
+
+    table = load_mega_columnar(csv_path=mega_csv)
+    expected = StratifiedReservoirSampler(20, **kwargs)
+    expected.update(table)
+
+    pd.testing.assert_frame_equal(sample, expected.result(), check_dtype=False)
+    assert report == expected.report()
+
+
+def test_file_sample_projects_columns(mega_csv):
+    sample, _ = sample_mega_stratified(10, strata=[], group_quotas={}, key_column='Nom',
+                                       csv_path=mega_csv, workers=1, columns=['Nom'])
+    assert sample.columns.tolist() == ['Nom'] and len(sample) == 10
+
+
+
+def test_repository_samples_in_process(mega_csv, monkeypatch):
+    import mega_sampler
+    from mega_data_repository import MegaDataRepository
+
+    used = []
+
+    def recording(*args, workers=None, **kwargs):
+        used.append(workers)
+        return sample_mega_stratified(*args, workers=workers, **kwargs)
+
+    # Le dépôt s'exécute dans le serveur : un seul processus, sauf demande explicite
+    monkeypatch.setattr(mega_sampler, 'sample_mega_stratified', recording)
+    repository = MegaDataRepository(csv_path=mega_csv, json_path='absent.json')
+    assert repository.file_backed
+    kwargs = {'raw': True, 'columns': ['Nom', 'weight'], 'strata': STRATA, 'group_quotas': GROUP_QUOTAS,
+              'key_column': 'Nom'}
+    sample = repository.stratified_sample(15, **kwargs)
+    assert len(sample) == 15 and sample['Nom'].is_unique
+    repository.stratified_sample(15, workers=2, **kwargs)
+    assert used == [1, 2]
@@ -0,0 +1,69 @@
+"""Tests de l'index trigrammes des noms (mega_search_index)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mega_search_index import TrigramIndex, normalize_name
+from mega_text_normalization import normalize_series
+
+NAMES = pd.Series([
+    'Quercétine', 'QUERCETIN-3-glucoside', 'Kaempférol', 'Curcumine', 'Acide caféique',
+    'abc xyz bcd',  # contient les trigrammes de « abcd » sans contenir « abcd »
+    'aaaaaa', 'Ginkgolide B', None, '', 'Berbérine', 'Bêta-carotène', 'quercetine',
+])
+
+
+@pytest.fixture(scope='module')
+def index():
+    return TrigramIndex(NAMES)
+
+
+def _brute_force(term):
+    needle = normalize_name(term)
+    if not needle:
+        return []
+    return np.flatnonzero(normalize_series(NAMES).fillna('').str.contains(needle, regex=False).to_numpy()).tolist()
+
+
+@pytest.mark.parametrize('term', ['quercetin', 'QUERCÉTINE', 'ine', 'caf', 'ab', 'q', 'abcd', 'aaaa',
+                                  'beta carot', 'zzz', 'glucoside', '  curcumine  '])
+def test_search_matches_brute_force(index, term):
+    assert index.search(term).tolist() == _brute_force(term)
+
+
+def test_empty_term_finds_nothing(index):
+    assert len(index.search('')) == 0
+    assert len(index.search('   ')) == 0
+
+
+def test_limit_keeps_table_order(index):
+    everything = index.search('quercetin')
+    assert everything.tolist() == [0, 1, 12]
+    assert index.search('quercetin', limit=2).tolist() == [0, 1]
+
+
+def test_candidates_need_every_trigram(index):
+    assert index.candidates('ab') is None
+    # Trigrammes dispersés : candidat, mais pas de correspondance
+    assert 5 in index.candidates('abcd').tolist()
+    assert 5 not in index.search('abcd').tolist()
+
+
+def test_shared_trigrams_counts_per_row(index):
+    total, shared = index.shared_trigrams('Quercétine')
+    needle = normalize_name('Quercétine')
+    assert total == len({needle[i:i + 3] for i in range(len(needle) - 2)})
+    assert shared[0] == total and shared[12] == total
+    assert shared[3] < total and len(shared) == len(NAMES)
+
+
+def test_filter_returns_rows_of_the_table(index):
+    table = pd.DataFrame({'name': NAMES, 'score': range(len(NAMES))})
+    assert index.filter(table, 'kaempf')['score'].tolist() == [2]
+
+
+def test_prenormalized_names_are_used_as_is():
+    index = TrigramIndex(pd.Series(['abc', None, 'xabcx']), normalized=True)
+    assert index.search('abc').tolist() == [0, 2]
+    assert len(index) == 3 and index.nbytes > 0
@@ -0,0 +1,86 @@
+"""Tests de la déduplication par structure (mega_structure_dedup)"""
+
+import re
+
+import pandas as pd
+import pytest
+
+import mega_structure_dedup
+from mega_structure_dedup import (CANONICAL_SMILES_COLUMN, STRUCTURE_KEY_COLUMN, deduplicate_structures,
+                                  find_smiles_column, hash_structure, structure_keys)
+
+INCHIKEY = re.compile(r'^[A-Z0-9]{14}-[A-Z0-9]{10}-[A-Z]$')
+
+requires_rdkit = pytest.mark.skipif(not mega_structure_dedup.RDKIT_AVAILABLE, reason="RDKit non installé")
+
+
+@pytest.fixture
+def compounds():
+    return pd.DataFrame({
+        'name': ['Éthanol', 'Ethyl alcohol', 'Phénol', 'Phenol', 'Aspirine', 'Inconnu', 'Inconnu', None, None],
+        'SMILES': ['CCO', 'OCC', 'c1ccccc1O', 'Oc1ccccc1', 'CC(=O)Oc1ccccc1C(=O)O', None, 'invalide', None, None],
+    }, index=[10, 11, 12, 13, 14, 15, 16, 17, 18])
+
+
+def test_hash_structure_has_inchikey_format():
+    assert INCHIKEY.match(hash_structure('CCO'))
+    assert hash_structure('CCO') == hash_structure('CCO') != hash_structure('OCC')
+
+
+def test_find_smiles_column():
+    assert find_smiles_column(pd.DataFrame(columns=['name', 'smiles', 'SMILES'])) == 'SMILES'
+    assert find_smiles_column(pd.DataFrame(columns=['canonical_smiles'])) == 'canonical_smiles'
+    assert find_smiles_column(pd.DataFrame(columns=['name'])) is None
+
+
+@requires_rdkit
+def test_structure_keys_canonicalize_each_writing(compounds):
+    keys = structure_keys(compounds['SMILES'], workers=1)
+    assert keys.index.equals(compounds.index)
+    assert list(keys.columns) == [CANONICAL_SMILES_COLUMN, STRUCTURE_KEY_COLUMN]
+    canonical = keys[CANONICAL_SMILES_COLUMN]
+    structure = keys[STRUCTURE_KEY_COLUMN]
+    assert canonical[10] == canonical[11] and structure[10] == structure[11]
+    assert canonical[12] == canonical[13] and structure[12] == structure[13]
+    assert structure[10] != structure[12]
+    assert all(INCHIKEY.match(key) for key in structure.dropna())
+    # SMILES manquant ou invalide : pas de clé
+    assert structure[[15, 16, 17]].isna().all() and canonical[[15, 16]].isna().all()
+
+
+@requires_rdkit
+def test_structure_keys_chunked_in_processes(compounds):
+    sequential = structure_keys(compounds['SMILES'], workers=1)
+    parallel = structure_keys(compounds['SMILES'], workers=2, chunk_size=2)
+    pd.testing.assert_frame_equal(parallel, sequential)
+
+
+@requires_rdkit
+def test_deduplicate_keeps_first_occurrence_in_order(compounds):
+    unique = deduplicate_structures(compounds, workers=1, verbose=False)
+    # Éthanol, Phénol, Aspirine, un seul 'Inconnu' (repli sur le nom), lignes sans SMILES ni nom gardées
+    assert unique.index.tolist() == [10, 12, 14, 15, 17, 18]
+
+
+def test_deduplicate_without_rdkit_matches_identical_writings(compounds, monkeypatch):
+    monkeypatch.setattr(mega_structure_dedup, 'RDKIT_AVAILABLE', False)
+    df = pd.concat([compounds, pd.DataFrame({'name': ['Ethanol bis'], 'SMILES': [' CCO ']}, index=[19])])
+    keys = structure_keys(df['SMILES'], workers=1)
+    assert keys[CANONICAL_SMILES_COLUMN].isna().all()
+    assert keys.loc[19, STRUCTURE_KEY_COLUMN] == keys.loc[10, STRUCTURE_KEY_COLUMN] == hash_structure('CCO')
+    unique = deduplicate_structures(df, workers=1, verbose=False)
+    # CCO / OCC ne sont plus reconnues comme identiques, ' CCO ' l'est
+    assert unique.index.tolist() == [10, 11, 12, 13, 14, 15, 16, 17, 18]
+
+
+def test_explicit_smiles_and_missing_column(compounds):
+    names_only = compounds.drop(columns='SMILES')
+    # Sans SMILES : repli sur le nom normalisé (Phénol = Phenol)
+    assert deduplicate_structures(names_only, workers=1, verbose=False).index.tolist() == [10, 11, 12, 14, 15, 17, 18]
+    smiles = pd.Series(['C'] * len(compounds), index=compounds.index)
+    assert deduplicate_structures(compounds, smiles=smiles, workers=1, verbose=False).index.tolist() == [10]
+
+
+def test_empty_frame():
+    empty = pd.DataFrame(columns=['name', 'SMILES'])
+    assert deduplicate_structures(empty, verbose=False) is empty
@@ -0,0 +1,98 @@
+"""Tests de la recherche par sous-structure (mega_substructure)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('rdkit')
+pytest.importorskip('pyarrow')
+
+import mega_substructure
+from mega_descriptors import load_smiles_map
+from mega_substructure import SubstructureIndex, load_pattern_store, parse_query, update_pattern_store
+
+SMILES = pd.Series([
+    'c1ccccc1O', 'Oc1ccccc1', 'CCO', 'CC(=O)O', 'CC(=O)Oc1ccccc1C(=O)O', 'c1ccc2ccccc2c1',
+    'CCN(CC)CC', None, 'invalide', 'OC(=O)c1ccccc1O', 'CCCCCCO', 'c1ccncc1',
+])
+
+
+@pytest.fixture
+def index():
+    # Stores relatifs au répertoire de test : caches du processus repartis de zéro
+    load_pattern_store.clear()
+    load_smiles_map.clear()
+    store = update_pattern_store(SMILES, workers=1)
+    yield SubstructureIndex(store, SMILES)
+    load_pattern_store.clear()
+    load_smiles_map.clear()
+
+
+@pytest.fixture
+def threaded(monkeypatch):
+    """Pool de 3 threads, quel que soit le nombre de CPU de la machine de test"""
+    monkeypatch.setattr(mega_substructure, 'MATCH_WORKERS', 3)
+    monkeypatch.setattr(mega_substructure, '_match_pool', None)
+    yield
+    if mega_substructure._match_pool is not None:
+        mega_substructure._match_pool.shutdown()
+
+
+def _brute_force(query_text):
+    from rdkit import Chem
+
+    query = parse_query(query_text)
+    matched = []
+    for row, text in enumerate(SMILES):
+        mol = Chem.MolFromSmiles(text) if isinstance(text, str) else None
+        if mol is not None and mol.HasSubstructMatch(query):
+            matched.append(row)
+    return matched
+
+
+def _matches(index, query_text, **kwargs):
+    found = list(index.iter_matches(query_text, **kwargs))
+    return sorted(np.concatenate(found).tolist()) if found else []
+
+
+@pytest.mark.parametrize('query_text', ['c1ccccc1O', 'C(=O)O', '[OX2H]', 'CCO', 'n', '[#7]', 'c1ccc2ccccc2c1'])
+def test_matches_equal_brute_force(index, threaded, query_text):
+    expected = _brute_force(query_text)
+    assert _matches(index, query_text, workers=1) == expected
+    # Blocs répartis dans le pool de threads partagé : mêmes correspondances
+    assert _matches(index, query_text, workers=4, chunk_size=1) == expected
+
+
+def test_screen_keeps_every_match(index):
+    # La présélection n'écarte jamais une vraie correspondance
+    for query_text in ('c1ccccc1', 'O', 'C(=O)O'):
+        candidates = index.rows.rows_of(index.candidates(query_text))
+        assert set(_brute_force(query_text)) <= set(candidates.tolist())
+
+
+def test_invalid_query_has_no_match(index, threaded):
+    assert parse_query('') is None
+    assert len(index.candidates('((')) == 0
+    assert _matches(index, '((', workers=4) == []
+
+
+def test_match_pool_is_shared_and_capped(index, threaded):
+    _matches(index, 'C', workers=64, chunk_size=1)
+    pool = mega_substructure._get_match_pool()
+    assert pool._max_workers == 3
+    _matches(index, 'CCO', workers=2, chunk_size=1)
+    assert mega_substructure._get_match_pool() is pool
+    # Valeur par défaut : jamais plus de 4 threads
+    assert mega_substructure.MATCH_WORKERS == 3
+
+
+def test_default_worker_cap():
+    assert 1 <= mega_substructure.MATCH_WORKERS <= 4
+
+
+def test_interrupted_iteration_cancels_pending_chunks(index, threaded):
+    matches = index.iter_matches('C', workers=2, chunk_size=1)
+    next(matches)
+    matches.close()
+    # Le pool reste utilisable par les requêtes suivantes
+    assert _matches(index, 'CCO', workers=2, chunk_size=1) == _brute_force('CCO')
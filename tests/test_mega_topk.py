@@ -0,0 +1,69 @@
+"""Tests de la sélection partielle des k meilleurs (mega_topk)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mega_topk import top_k, top_k_frame
+
+
+def _reference(scores, k, positions=None, ascending=False):
+    """Tri stable complet puis head(k), NaN en dernier"""
+    positions = np.arange(len(scores)) if positions is None else np.asarray(positions)
+    frame = pd.DataFrame({'score': scores, 'position': positions})
+    ordered = frame.sort_values(['score', 'position'], ascending=[ascending, True], na_position='last')
+    return ordered['position'].to_numpy()[:k] if k is not None else ordered['position'].to_numpy()
+
+
+@pytest.fixture
+def scores():
+    rng = np.random.default_rng(11)
+    # Beaucoup d'égalités et quelques NaN
+    values = np.round(rng.random(500), 1)
+    values[rng.choice(500, 25, replace=False)] = np.nan
+    return values
+
+
+@pytest.mark.parametrize('k', [1, 5, 37, 499, 500, 1000, None])
+@pytest.mark.parametrize('ascending', [False, True])
+def test_matches_stable_full_sort(scores, k, ascending):
+    assert top_k(scores, k, ascending=ascending).tolist() == _reference(scores, k, ascending=ascending).tolist()
+
+
+def test_ties_at_threshold_keep_first_positions():
+    scores = np.array([0.5, 0.9, 0.5, 0.5, 0.9, 0.5])
+    assert top_k(scores, 3).tolist() == [1, 4, 0]
+    assert top_k(scores, 4, ascending=True).tolist() == [0, 2, 3, 5]
+
+
+def test_positions_break_ties_and_are_returned():
+    rng = np.random.default_rng(5)
+    positions = rng.permutation(10_000)[:300]
+    scores = rng.integers(0, 5, 300).astype(np.float32)
+    for k in (1, 10, 299, None):
+        assert top_k(scores, k, positions=positions).tolist() == _reference(scores, k, positions).tolist()
+
+
+@pytest.mark.parametrize('k', [0, -3])
+def test_non_positive_k_is_empty(scores, k):
+    assert len(top_k(scores, k)) == 0
+
+
+def test_empty_and_all_nan():
+    assert len(top_k(np.array([]), 10)) == 0
+    assert top_k(np.array([np.nan, np.nan, 1.0]), 2).tolist() == [2, 0]
+
+
+def test_input_scores_are_not_modified(scores):
+    before = scores.copy()
+    top_k(scores, 10)
+    top_k(scores, 10, ascending=True)
+    np.testing.assert_array_equal(scores, before)
+
+
+@pytest.mark.parametrize('ascending', [False, True])
+def test_top_k_frame_matches_sort_values_head(scores, ascending):
+    df = pd.DataFrame({'bioactivity_score': scores, 'name': [f"c{i}" for i in range(len(scores))]},
+                      index=np.arange(len(scores)) * 2)
+    expected = df.sort_values('bioactivity_score', ascending=ascending, kind='stable').head(20)
+    assert top_k_frame(df, 'bioactivity_score', 20, ascending=ascending).equals(expected)
@@ -0,0 +1,85 @@
+"""Tests du préchargement en arrière-plan (mega_warmup)"""
+
+import importlib
+import threading
+
+import pytest
+
+import mega_warmup
+
+
+@pytest.fixture
+def warmup():
+    """Module rechargé (état neuf), sans les étapes MEGA enregistrées à l'import"""
+    module = importlib.reload(mega_warmup)
+    module._steps.clear()
+    module._jobs.clear()
+    module._state['background'].clear()
+    yield module
+    module.wait_for_background_jobs(5.0)
+
+
+def test_steps_run_in_order(warmup):
+    order = []
+    warmup.register_warmup_step('repository', "dépôt", lambda: order.append('repository'))
+    warmup.register_warmup_step('index', "index", lambda: order.append('index'))
+    # Réenregistrement (rerun Streamlit) : remplace sans dupliquer
+    warmup.register_warmup_step('index', "index", lambda: order.append('index'))
+    assert warmup.start_warmup() and not warmup.start_warmup()
+    assert warmup.wait_until_warm(5.0)
+    assert order == ['repository', 'index']
+    state = warmup.get_warmup_state()
+    assert state['status'] == 'ready' and state['progress'] == 1.0
+
+
+def test_background_jobs_do_not_delay_readiness(warmup):
+    release = threading.Event()
+    ran = []
+
+    def long_job():
+        release.wait(5.0)
+        ran.append('job')
+
+    warmup.register_warmup_step('repository', "dépôt", lambda: None)
+    warmup.register_background_job('store', "store", long_job)
+    warmup.start_warmup()
+
+    # Prêt pendant que la tâche de fond tourne encore
+    assert warmup.wait_until_warm(5.0)
+    assert not warmup.is_warming_up()
+    assert warmup.get_warmup_state()['background'] == {'store': 'running'}
+    assert not warmup.wait_for_background_jobs(0.05)
+
+    release.set()
+    assert warmup.wait_for_background_jobs(5.0)
+    assert ran == ['job'] and warmup.get_warmup_state()['background'] == {'store': 'done'}
+
+
+def test_failures_are_recorded(warmup):
+    def fail():
+        raise RuntimeError("index indisponible")
+
+    warmup.register_warmup_step('repository', "dépôt", lambda: None)
+    warmup.register_warmup_step('index', "index", fail)
+    warmup.register_background_job('store', "store", fail)
+    warmup.start_warmup()
+    assert warmup.wait_until_warm(5.0)
+    warmup.wait_for_background_jobs(5.0)
+    state = warmup.get_warmup_state()
+    # Un échec hors dépôt n'empêche pas l'état prêt ; la progression ne compte que les étapes
+    assert state['status'] == 'ready' and state['progress'] == 1.0
+    assert set(state['errors']) == {'index', 'store'} and state['background'] == {'store': 'failed'}
+
+
+def test_no_background_job_without_repository(warmup):
+    ran = []
+
+    def fail():
+        raise RuntimeError("aucune source")
+
+    warmup.register_warmup_step('repository', "dépôt", fail)
+    warmup.register_background_job('store', "store", lambda: ran.append('job'))
+    warmup.start_warmup()
+    assert not warmup.wait_until_warm(5.0)
+    assert warmup.wait_for_background_jobs(5.0)
+    assert warmup.get_warmup_state()['status'] == 'failed' and ran == []
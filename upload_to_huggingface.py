@@ -5,11 +5,12 @@ Script pour déployer le dataset complet (102M lignes) sur Hugging Face Datasets
 """
 
 import pandas as pd
-import json
 import numpy as np
 from pathlib import Path
 import os
 
+from mega_json_stream import TOP_LEVEL, load_json_tables
+
 def upload_mega_to_huggingface():
     """
     Upload le dataset MEGA complet vers Hugging Face
@@ -43,28 +44,23 @@ def upload_mega_to_huggingface():
     print(f"📁 Taille: {max_size / 1024 / 1024:.1f} MB")
     
     try:
-        # Chargement des données
+        # Chargement des données en streaming (lots colonnaires, sans arbre JSON complet)
         print("⏳ Chargement du dataset MEGA...")
-        with open(dataset_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        tables = load_json_tables(dataset_path, keys=('compounds', 'bioactivities', TOP_LEVEL))
         
         # Extraction des composés
-        if isinstance(data, dict) and 'compounds' in data:
-            compounds_data = data['compounds']
-            bioactivities_data = data.get('bioactivities', [])
-        elif isinstance(data, list):
-            compounds_data = data
-            bioactivities_data = []
+        if 'compounds' in tables:
+            df_compounds = tables['compounds']
+            df_bioactivities = tables.get('bioactivities', pd.DataFrame())
+        elif TOP_LEVEL in tables:
+            df_compounds = tables[TOP_LEVEL]
+            df_bioactivities = pd.DataFrame()
         else:
             print("❌ Format de données non reconnu")
             return False
         
-        print(f"✅ {len(compounds_data):,} composés chargés")
-        print(f"✅ {len(bioactivities_data):,} bioactivités chargées")
-        
-        # Préparation des DataFrames
-        df_compounds = pd.DataFrame(compounds_data)
-        df_bioactivities = pd.DataFrame(bioactivities_data) if bioactivities_data else pd.DataFrame()
+        print(f"✅ {len(df_compounds):,} composés chargés")
+        print(f"✅ {len(df_bioactivities):,} bioactivités chargées")
         
         print(f"📋 Colonnes composés: {len(df_compounds.columns)}")
         print(f"📋 Colonnes bioactivités: {len(df_bioactivities.columns) if not df_bioactivities.empty else 0}")